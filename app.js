@@ -19,12 +19,131 @@ let currentResults = {
 };
 let lastStreamlitPayload = null;
 
+// 평가기준 버전 (학년도별 기준표)
+// window.PAPS_CRITERIA_VERSIONS = { current, builtin, versions: [{version, label, effective_from, url}] }
+// builtin 버전은 PAPS_DATA, 오늘 적용되는 버전은 <script type="application/json" id="paps-criteria-버전">에
+// 문자열로 들어 있고, 나머지는 처음 선택될 때 url(Streamlit 정적 파일)에서 내려받음
+// 기준표는 선택될 때 파싱해 LRU에 보관
+const CRITERIA_CACHE_SIZE = 2;
+const criteriaCache = new Map();
+const fetchedCriteria = new Map();   // 버전 → 내려받은 기준표 JSON 문자열
+const pendingCriteria = new Map();   // 버전 → 내려받는 중인 Promise
+
+function criteriaKey(학교과정, 학년, 성별, 체력요인, 평가종목) {
+    return [학교과정, 학년, 성별, 체력요인, 평가종목].map(value => String(value || '').trim()).join('|');
+}
+
+function selectedCriteriaVersion() {
+    const versionElement = document.getElementById('기준버전');
+    if (versionElement && versionElement.value) {
+        return versionElement.value;
+    }
+    const registry = window.PAPS_CRITERIA_VERSIONS;
+    return registry ? registry.current : '기본';
+}
+
+function loadCriteriaData(version) {
+    const registry = window.PAPS_CRITERIA_VERSIONS;
+    if (!registry || version === registry.builtin) {
+        return typeof PAPS_DATA !== 'undefined' ? PAPS_DATA : null;
+    }
+    const source = document.getElementById(`paps-criteria-${version}`);
+    const text = source ? source.textContent : fetchedCriteria.get(version);
+    if (!text) {
+        return null;  // 아직 내려받지 않음 (fetchCriteriaVersion 후 다시 계산)
+    }
+    return JSON.parse(text);
+}
+
+function isCriteriaAvailable(version) {
+    const registry = window.PAPS_CRITERIA_VERSIONS;
+    return !registry || version === registry.builtin || fetchedCriteria.has(version) ||
+        !!document.getElementById(`paps-criteria-${version}`);
+}
+
+// 문서에 없는 버전의 기준표를 내려받음 (성공하면 true)
+function fetchCriteriaVersion(version) {
+    if (isCriteriaAvailable(version)) return Promise.resolve(true);
+    if (pendingCriteria.has(version)) return pendingCriteria.get(version);
+    const entry = window.PAPS_CRITERIA_VERSIONS.versions.find(v => v.version === version);
+    if (!entry || !entry.url) {
+        console.error(`평가기준 버전 ${version}을(를) 찾을 수 없습니다.`);
+        return Promise.resolve(false);
+    }
+    const request = fetch(new URL(entry.url, document.baseURI))
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.text();
+        })
+        .then(text => {
+            // 빌드 산출물은 "const PAPS_DATA = {...};" 형식
+            fetchedCriteria.set(version, text.slice(text.indexOf('{'), text.lastIndexOf('}') + 1));
+            return true;
+        })
+        .catch(error => {
+            console.error(`평가기준 버전 ${version} 내려받기 실패:`, error);
+            return false;
+        })
+        .finally(() => pendingCriteria.delete(version));
+    pendingCriteria.set(version, request);
+    return request;
+}
+
+// 학생군/종목별 기록 구간 목록 (원본 순서 유지 → 기존 find와 같은 결과)
+function buildCriteriaIndex(data) {
+    const index = new Map();
+    (data.평가기준 || []).forEach(item => {
+        if (!item.기록) return;
+        const key = criteriaKey(item.학교과정, item.학년, item.성별, item.체력요인, item.평가종목);
+        const [min, max] = item.기록.split('~').map(str => parseFloat(str.trim()));
+        if (!index.has(key)) index.set(key, []);
+        index.get(key).push({ min, max, 기록: item.기록, 점수: item.점수, 등급: item.등급 });
+    });
+    return index;
+}
+
+function getCriteriaIndex(version) {
+    if (criteriaCache.has(version)) {
+        const cached = criteriaCache.get(version);
+        criteriaCache.delete(version);
+        criteriaCache.set(version, cached);
+        return cached;
+    }
+    const data = loadCriteriaData(version);
+    if (!data || !data.평가기준) return null;
+    const index = buildCriteriaIndex(data);
+    criteriaCache.set(version, index);
+    while (criteriaCache.size > CRITERIA_CACHE_SIZE) {
+        criteriaCache.delete(criteriaCache.keys().next().value);
+    }
+    return index;
+}
+
+function setupCriteriaVersionSelect() {
+    const versionElement = document.getElementById('기준버전');
+    const registry = window.PAPS_CRITERIA_VERSIONS;
+    if (!versionElement) return;
+    if (!registry || registry.versions.length < 2) {
+        versionElement.style.display = 'none';
+        return;
+    }
+    versionElement.innerHTML = '';
+    registry.versions.forEach(entry => {
+        const option = document.createElement('option');
+        option.value = entry.version;
+        option.textContent = entry.label || entry.version;
+        versionElement.appendChild(option);
+    });
+    versionElement.value = registry.current;
+}
+
 function sendResultsToStreamlit(totalScore = 0, totalGrade = '-') {
     try {
         const userInfo = {
             학교과정: document.getElementById('학교과정')?.value || '',
             학년: document.getElementById('학년')?.value || '',
-            성별: document.getElementById('성별')?.value || ''
+            성별: document.getElementById('성별')?.value || '',
+            기준버전: selectedCriteriaVersion()
         };
 
         const factorDetails = {};
@@ -387,14 +506,21 @@ function initializeChart() {
 
 // 이벤트 리스너 설정
 function setupEventListeners() {
+    setupCriteriaVersionSelect();
+
     // 학생 정보 변경 시 모든 결과 초기화
-    ['학교과정', '학년', '성별'].forEach(id => {
+    ['학교과정', '학년', '성별', '기준버전'].forEach(id => {
         const element = document.getElementById(id);
         if (element) {
             element.addEventListener('change', () => {
                 resetAllResults();
-                // 기존 기록이 입력되어 있다면 즉시 재계산
-                factors.forEach(factor => calculateResult(factor));
+                // 기존 기록이 입력되어 있다면 즉시 재계산 (기준 버전은 내려받은 뒤)
+                const recalculate = () => factors.forEach(factor => calculateResult(factor));
+                if (id === '기준버전') {
+                    fetchCriteriaVersion(element.value).then(recalculate);
+                } else {
+                    recalculate();
+                }
             });
         }
     });
@@ -607,22 +733,21 @@ function calculateResult(factor) {
         return;
     }
 
-    // PAPS_DATA 확인
-    if (!PAPS_DATA || !PAPS_DATA.평가기준) {
+    // 선택된 버전의 평가기준 인덱스 (처음 사용할 때만 파싱)
+    const version = selectedCriteriaVersion();
+    const criteriaIndex = getCriteriaIndex(version);
+    if (!criteriaIndex) {
+        if (!isCriteriaAvailable(version)) {
+            // 아직 내려받지 않은 버전: 받은 뒤 다시 계산
+            fetchCriteriaVersion(version).then(ok => { if (ok) calculateResult(factor); });
+            return;
+        }
         console.error('PAPS_DATA가 로드되지 않았습니다.');
         return;
     }
 
-    const 평가결과 = PAPS_DATA.평가기준.find(item => {
-        const 체력요인일치 = item.체력요인 && item.체력요인.trim() === factor;
-        const 평가종목일치 = item.평가종목 && item.평가종목.trim() === 평가종목;
-        const 학년일치 = item.학년 && item.학년.trim() === 학년;
-        const 성별일치 = item.성별 && item.성별.trim() === 성별;
-        const 학교과정일치 = item.학교과정 && item.학교과정.trim() === 학교과정;
-        const 기록범위일치 = item.기록 && isInRange(기록, item.기록);
-        
-        return 체력요인일치 && 평가종목일치 && 학년일치 && 성별일치 && 학교과정일치 && 기록범위일치;
-    });
+    const 일치하는항목 = criteriaIndex.get(criteriaKey(학교과정, 학년, 성별, factor, 평가종목)) || [];
+    const 평가결과 = 일치하는항목.find(item => 기록 >= item.min && 기록 <= item.max);
 
     if (평가결과) {
         currentResults[factor] = {
@@ -633,13 +758,6 @@ function calculateResult(factor) {
     } else {
         console.warn(`[${factor}] 일치하는 평가기준을 찾을 수 없습니다.`);
         // 디버깅: 일치하는 항목이 있는지 확인
-        const 일치하는항목 = PAPS_DATA.평가기준.filter(item => {
-            return item.체력요인 && item.체력요인.trim() === factor &&
-                   item.평가종목 && item.평가종목.trim() === 평가종목 &&
-                   item.학년 && item.학년.trim() === 학년 &&
-                   item.성별 && item.성별.trim() === 성별 &&
-                   item.학교과정 && item.학교과정.trim() === 학교과정;
-        });
         console.log(`[${factor}] 조건 일치 항목 수:`, 일치하는항목.length);
         if (일치하는항목.length > 0) {
             console.log(`[${factor}] 기록 범위 확인:`, 일치하는항목.map(item => ({
@@ -684,6 +802,36 @@ function updateChart() {
     papsChart.update();
 }
 
+// 같은 학교과정·학년·성별 집단 내 총점 위치 (집단 분석 스냅샷이 있을 때만 표시)
+// PAPS_COHORT_PERCENTILES['학교과정|학년|성별'][s] = s점 미만 인원, 마지막 값 = 전체 인원
+function cohortTopPercent(totalScore) {
+    const table = window.PAPS_COHORT_PERCENTILES;
+    if (!table) return null;
+    // cohort_analytics.calculator_table 키와 같은 형식 (criteriaKey는 체력요인/평가종목까지 붙으므로 사용하지 않음)
+    const key = ['학교과정', '학년', '성별']
+        .map(id => String(document.getElementById(id)?.value || '').trim())
+        .join('|');
+    const cumulative = table[key];
+    if (!cumulative) return null;
+    const n = cumulative[cumulative.length - 1];
+    const s = Math.max(0, Math.min(totalScore, cumulative.length - 2));
+    if (!n) return null;
+    const percentile = (cumulative[s] + 0.5 * (cumulative[s + 1] - cumulative[s])) / n * 100;
+    return { topPercent: Math.max(1, Math.round(100 - percentile)), n };
+}
+
+function updateTotalStanding(totalScore) {
+    const standingElement = document.getElementById('total-standing');
+    if (!standingElement) return;
+    const standing = totalScore > 0 ? cohortTopPercent(totalScore) : null;
+    if (!standing) {
+        standingElement.style.display = 'none';
+        return;
+    }
+    document.getElementById('total-percentile').textContent = `상위 ${standing.topPercent}% (${standing.n}명 중)`;
+    standingElement.style.display = '';
+}
+
 // 전체 결과 업데이트
 function updateTotalResult() {
     const totalScore = factors.reduce((sum, factor) => sum + currentResults[factor].점수, 0);
@@ -691,6 +839,7 @@ function updateTotalResult() {
 
     document.getElementById('total-score').textContent = totalScore;
     document.getElementById('total-grade').textContent = totalGrade;
+    updateTotalStanding(totalScore);
     
     // 결과가 변경되고 총점이 0보다 크면 자동으로 Streamlit에 전송
     if (totalScore > 0) {
@@ -0,0 +1,249 @@
+"""
+학급 전체 상담 보고서 일괄 생성
+채점된 명단의 학생마다 챗봇과 같은 컨텍스트로 상담 피드백을 생성하고 학생별 파일로 저장
+
+- 동시 실행 수 상한(--parallel)과 분당 요청 수 제한(--rate)
+- 체크포인트: 완료된 학생은 _checkpoint.jsonl에 기록되어 재실행 시 다시 요청하지 않음
+- --school/--class를 주면 결과 저장소의 이전 측정 추이를 상담 컨텍스트에 포함
+- 작업 스레드마다 챗봇을 따로 만들어 학생별 프롬프트 통계(체크포인트에 기록)가 섞이지 않음
+
+사용 예:
+    python batch_reports.py roster.csv --out reports/3-2 --parallel 8 --rate 120
+    python batch_reports.py roster.csv --out reports/3-2 --school 한빛중 --class 3-2
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from fair_scheduler import SchedulerConfig, configure_scheduler, tenant_key
+from roster import load_roster, score_roster
+
+CHECKPOINT_NAME = "_checkpoint.jsonl"
+
+REPORT_REQUEST = (
+    "아래 측정 결과를 바탕으로 이 학생에게 전달할 PAPS 체력 상담 피드백을 작성해주세요. "
+    "잘한 점, 부족한 체력요인, 다음 등급을 위한 목표 기록, 4주 실천 운동 계획 순서로 정리해주세요."
+)
+
+
+class RateLimiter:
+    """분당 요청 수 제한 (토큰 버킷, 스레드 안전)"""
+
+    def __init__(self, per_minute: float, burst: Optional[int] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, int(per_minute // 10) or 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _safe_filename(text: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', text).strip('_') or 'student'
+
+
+def report_filename(student: Dict) -> str:
+    name = f"{student['student_id']}_{student['name']}" if student.get('name') else student['student_id']
+    return _safe_filename(name) + ".md"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def render_report(student: Dict, feedback: str) -> str:
+    """보고서 파일 내용 (학생 정보 + 결과 표 + 상담 피드백)"""
+    info = student['user_info']
+    lines = [
+        f"# PAPS 체력 상담 보고서 - {student.get('name') or student['student_id']}",
+        "",
+        f"- 번호: {student['student_id']}",
+        f"- 학교과정/학년/성별: {info.get('학교과정', '')} {info.get('학년', '')} {info.get('성별', '')}".rstrip(),
+        f"- 총점: {student['total_summary']['총점']}점 ({student['total_summary']['등급']})",
+        "",
+        "| 체력요인 | 평가종목 | 기록 | 점수 | 등급 |",
+        "|---|---|---|---|---|",
+    ]
+    for factor, result in student['user_results'].items():
+        record = result.get('기록')
+        lines.append(
+            f"| {factor} | {result.get('평가종목') or '-'} | "
+            f"{record if record is not None else '-'} | {result.get('점수', 0)} | {result.get('등급') or '-'} |"
+        )
+    lines += ["", "## 상담 피드백", "", feedback.strip(), ""]
+    return "\n".join(lines)
+
+
+class Checkpoint:
+    """완료된 학생 기록 (추가 전용 JSONL)"""
+
+    def __init__(self, out_dir: Path):
+        self.path = out_dir / CHECKPOINT_NAME
+        self._lock = threading.Lock()
+        self.done: Set[str] = set()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 중단 시 마지막 줄이 잘렸을 수 있음
+                    if (out_dir / entry["file"]).exists():
+                        self.done.add(entry["student_id"])
+
+    def mark_done(self, student_id: str, filename: str, elapsed: float,
+                  prompt_stats: Optional[Dict] = None) -> None:
+        line = json.dumps({
+            "student_id": student_id,
+            "file": filename,
+            "elapsed_s": round(elapsed, 3),
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "prompt_stats": prompt_stats or {},
+        }, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.add(student_id)
+
+
+class _WorkerChatbots:
+    """작업 스레드별 챗봇 (챗봇의 last_prompt_stats/cohort 등은 인스턴스 상태이므로 스레드 간 공유하지 않음)"""
+
+    def __init__(self, factory: Callable[[], object]):
+        self._factory = factory
+        self._local = threading.local()
+
+    def get(self):
+        chatbot = getattr(self._local, "chatbot", None)
+        if chatbot is None:
+            chatbot = self._local.chatbot = self._factory()
+        return chatbot
+
+
+def _generate_one(chatbots: _WorkerChatbots, student: Dict, out_dir: Path, checkpoint: Checkpoint,
+                  limiter: Optional[RateLimiter], trend_source=None, tenant: Optional[str] = None) -> float:
+    started = time.perf_counter()
+    chatbot = chatbots.get()
+    chatbot.reset_conversation()  # 같은 스레드의 이전 학생 학생군/대화가 남지 않도록
+    messages = chatbot.build_messages(
+        REPORT_REQUEST,
+        user_results=student['user_results'],
+        user_info=student['user_info'],
+        total_summary=student['total_summary'],
+        trend=trend_source(student) if trend_source else None,
+    )
+    if limiter is not None:
+        limiter.acquire()
+    feedback = chatbot.complete(messages, tenant=tenant)
+    filename = report_filename(student)
+    _write_atomic(out_dir / filename, render_report(student, feedback))
+    elapsed = time.perf_counter() - started
+    checkpoint.mark_done(student['student_id'], filename, elapsed, dict(chatbot.last_prompt_stats))
+    return elapsed
+
+
+def run_batch(students: List[Dict], out_dir, chatbot_factory: Optional[Callable[[], object]] = None,
+              parallel: int = 4,
+              rate_per_minute: Optional[float] = None, trend_source=None,
+              tenant: Optional[str] = None) -> Dict:
+    """명단 전체 보고서 생성 (이미 완료된 학생은 건너뜀) 후 요약 반환
+
+    chatbot_factory: 작업 스레드마다 챗봇을 만드는 함수 (기본: PAPSChatbot, 이때 스케줄러도 이 실행 설정으로 교체)
+    trend_source: 학생 레코드 → 이전 측정 추이 목록 (없으면 추이 없이 생성)
+    tenant: 공정 스케줄러의 학교/학급 (같은 프로세스의 다른 학급과 몫을 나눔)
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(out_dir)
+    pending = [s for s in students if s['student_id'] not in checkpoint.done]
+    summary = {"total": len(students), "skipped": len(students) - len(pending),
+               "completed": 0, "failed": []}
+    if not pending:
+        return summary
+
+    if chatbot_factory is None:
+        # 앱 배포의 학급별 몫 대신 이 실행의 --parallel/--rate가 호출 수를 정함
+        configure_scheduler(SchedulerConfig(max_concurrent=max(1, parallel), max_wait=3600.0))
+        from chat_module import PAPSChatbot
+        chatbot_factory = PAPSChatbot
+    chatbots = _WorkerChatbots(chatbot_factory)
+    limiter = RateLimiter(rate_per_minute) if rate_per_minute else None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        futures = {
+            pool.submit(_generate_one, chatbots, student, out_dir, checkpoint, limiter,
+                        trend_source, tenant): student
+            for student in pending
+        }
+        for future in as_completed(futures):
+            student = futures[future]
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                summary["failed"].append(student['student_id'])
+                print(f"[{student['student_id']}] 보고서 생성 실패: {e}")
+                continue
+            summary["completed"] += 1
+            print(f"[{student['student_id']}] 완료 ({elapsed:.1f}s) "
+                  f"{summary['completed']}/{len(pending)}")
+    summary["duration_s"] = time.perf_counter() - started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학급 전체 PAPS 상담 보고서 일괄 생성")
+    parser.add_argument("roster", help="학생 명단 CSV (roster.py 참고)")
+    parser.add_argument("--out", default="reports", help="보고서 저장 폴더")
+    parser.add_argument("--parallel", type=int, default=4, help="동시 요청 수 상한")
+    parser.add_argument("--rate", type=float, default=None, help="분당 최대 요청 수")
+    parser.add_argument("--school", default=None, help="결과 저장소의 학교 이름 (추이 포함 시)")
+    parser.add_argument("--class", dest="class_name", default=None, help="결과 저장소의 학급 이름")
+    parser.add_argument("--db", default=None, help="결과 저장소 DB 경로")
+    args = parser.parse_args()
+
+    students = score_roster(load_roster(args.roster))
+    trend_source = None
+    if args.school and args.class_name:
+        from results_store import DEFAULT_DB_PATH, ResultsStore
+        store = ResultsStore(args.db or DEFAULT_DB_PATH)
+
+        def trend_source(student):
+            # 이번 회차 이전 기록만 (같은 날짜로 이미 저장된 경우 제외)
+            return [entry for entry in store.student_trend(args.school, args.class_name, student['student_id'])
+                    if not student.get('measured_on') or entry['measured_on'] < student['measured_on']]
+
+    summary = run_batch(students, args.out, parallel=args.parallel, rate_per_minute=args.rate,
+                        trend_source=trend_source, tenant=tenant_key(args.school, args.class_name))
+    print(f"전체 {summary['total']}명: 완료 {summary['completed']}, "
+          f"이전 실행에서 완료 {summary['skipped']}, 실패 {len(summary['failed'])}")
+    if summary["failed"]:
+        print("실패한 학생은 같은 명령을 다시 실행하면 이어서 생성합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+계산기 HTML 조립
+index.html의 <body>에 style.css, paps_data.js, app.js(및 평가기준 버전/집단 백분위 스크립트)를 넣어
+Streamlit 컴포넌트용 단일 문서를 만듦
+
+조립 결과는 원본 파일의 수정 시각을 키로 프로세스 단위 캐시 (세션/재실행마다 다시 읽지 않음)
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+ROOT = Path(__file__).parent
+ASSET_FILES = ('index.html', 'style.css', 'app.js', 'paps_data.js', 'criteria_versions.json')
+# cohort_analytics.DEFAULT_SNAPSHOT_PATH (numpy를 불러오지 않도록 경로만 따로 둠)
+SNAPSHOT_PATH = ROOT / 'paps_analytics.npz'
+
+# Streamlit iframe 안에서 스크롤 제거 및 높이 자동 조정
+ADDITIONAL_CSS = """
+html, body {
+    overflow-x: hidden !important;
+    overflow-y: visible !important;
+    height: auto !important;
+    min-height: auto !important;
+    margin: 0;
+    padding: 0;
+}
+.container {
+    padding-bottom: 20px;
+    max-width: 100%;
+}
+"""
+
+
+def _asset_stamp() -> Tuple[float, ...]:
+    """원본 파일 수정 시각 (파일이 바뀌면 캐시 무효화)"""
+    stamps = []
+    for name in ASSET_FILES:
+        path = ROOT / name
+        stamps.append(path.stat().st_mtime if path.exists() else 0.0)
+    stamps.append(SNAPSHOT_PATH.stat().st_mtime if SNAPSHOT_PATH.exists() else 0.0)
+    return tuple(stamps)
+
+
+def _extract_body(index_html: str) -> str:
+    """<body>만 추출하고, body 안에 있을 수도 있는 중복된 내부 리소스 태그 제거"""
+    m = re.search(r"<body[^>]*>(?P<body>.*)</body>", index_html, flags=re.I | re.S)
+    body = m.group("body") if m else index_html
+    body = re.sub(
+        r"<script[^>]*src=[\"']?(?:\.\/)?(?:paps_data\.js|app\.js)[\"']?[^>]*></script>",
+        "",
+        body,
+        flags=re.I | re.S,
+    )
+    return re.sub(
+        r"<link[^>]*href=[\"']?(?:\.\/)?style\.css[\"']?[^>]*>",
+        "",
+        body,
+        flags=re.I | re.S,
+    )
+
+
+@lru_cache(maxsize=2)
+def _build(stamp: Tuple[float, ...]) -> str:
+    from paps_criteria import calculator_versions_html, load_versions
+
+    load_versions.cache_clear()
+    idx = (ROOT / "index.html").read_text(encoding="utf-8")
+    css = (ROOT / "style.css").read_text(encoding="utf-8")
+    app = (ROOT / "app.js").read_text(encoding="utf-8")
+    data = (ROOT / "paps_data.js").read_text(encoding="utf-8")
+    criteria_versions = calculator_versions_html()
+    cohort_percentiles = ""
+    if stamp[-1]:
+        # 집단 분석 스냅샷이 있을 때만 numpy를 불러옴
+        from cohort_analytics import calculator_percentiles_html
+        cohort_percentiles = calculator_percentiles_html()
+
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8" />
+    <style>{css}</style>
+    <style>{ADDITIONAL_CSS}</style>
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
+    </head>
+<body>
+{_extract_body(idx)}
+<script>{data}</script>
+{criteria_versions}
+{cohort_percentiles}
+<script>{app}</script>
+</body></html>"""
+
+
+def build_calculator_html() -> str:
+    """Streamlit에 넣을 계산기 문서 (원본이 바뀌지 않았으면 캐시된 문자열)"""
+    return _build(_asset_stamp())
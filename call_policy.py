@@ -0,0 +1,286 @@
+"""
+완성 API 호출 정책 모듈
+요청 마감시간, 지터 지수 백오프 재시도, 서킷 브레이커, 지연 SLO 초과 시 대체 모델 전환 제공
+"""
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+# 재시도 가능한 HTTP 상태 코드 (요청 시간 초과, 속도 제한, 서버 오류)
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+@dataclass
+class CallPolicyConfig:
+    """호출 정책 설정 (단위: 초)"""
+    timeout: float = 30.0               # 요청 하나에 대한 전체 마감시간 (재시도 포함)
+    max_retries: int = 3                # 첫 시도 이후 최대 재시도 횟수
+    backoff_base: float = 0.5           # 지수 백오프 기본값
+    backoff_max: float = 8.0            # 백오프 상한
+    breaker_threshold: int = 5          # 연속 실패가 이 횟수에 도달하면 회로 차단
+    breaker_cooldown: float = 30.0      # 차단 후 다시 시도하기까지 대기 시간
+    fallback_model: Optional[str] = None  # 지연 SLO 초과 시 사용할 빠른 모델
+    latency_slo: Optional[float] = None   # 기본 모델 응답 지연 목표
+    slo_cooldown: float = 60.0          # SLO 초과 후 대체 모델을 유지하는 시간
+
+    @classmethod
+    def from_settings(cls, get_setting: Callable[[str], Optional[str]]) -> "CallPolicyConfig":
+        """Secrets/환경변수 조회 함수로부터 설정 생성 (없는 값은 기본값 사용)"""
+        config = cls()
+        numeric = {
+            "REQUEST_TIMEOUT": ("timeout", float),
+            "MAX_RETRIES": ("max_retries", int),
+            "RETRY_BACKOFF_BASE": ("backoff_base", float),
+            "RETRY_BACKOFF_MAX": ("backoff_max", float),
+            "CIRCUIT_BREAKER_THRESHOLD": ("breaker_threshold", int),
+            "CIRCUIT_BREAKER_COOLDOWN": ("breaker_cooldown", float),
+            "LATENCY_SLO": ("latency_slo", float),
+            "LATENCY_SLO_COOLDOWN": ("slo_cooldown", float),
+        }
+        for name, (attr, cast) in numeric.items():
+            value = get_setting(name)
+            if value not in (None, ""):
+                try:
+                    setattr(config, attr, cast(value))
+                except (TypeError, ValueError):
+                    print(f"호출 정책 설정 무시: {name}={value!r}")
+        fallback_model = get_setting("FALLBACK_MODEL_NAME")
+        if fallback_model:
+            config.fallback_model = fallback_model
+        return config
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷 브레이커가 열려 있어 호출을 즉시 거부함"""
+
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(
+            f"API 호출이 연속으로 실패하여 잠시 중단되었습니다. "
+            f"{max(1, math.ceil(retry_in))}초 후 다시 시도해주세요."
+        )
+
+
+class DeadlineExceededError(TimeoutError):
+    """재시도를 포함한 전체 마감시간 초과"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """재시도할 가치가 있는 오류인지 판단 (429, 5xx, 타임아웃, 연결 오류)"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # openai 패키지를 직접 import하지 않고 예외 계층 이름으로 판별
+    return any(
+        cls.__name__ in ("APIConnectionError", "APITimeoutError")
+        for cls in type(exc).__mro__
+    )
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    if isinstance(exc, TimeoutError):
+        return True
+    return any(cls.__name__ == "APITimeoutError" for cls in type(exc).__mro__)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """응답의 Retry-After 헤더 (초)"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CallPolicy:
+    """완성 API 호출 정책 (엔드포인트 단위로 프로세스 전역 공유)"""
+
+    def __init__(self, config: CallPolicyConfig, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.config = config
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        # 서킷 브레이커 상태
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._probe_active = False  # 반개방 상태의 시험 호출 진행 중
+        self._probe_until = 0.0     # 시험 호출의 마감시간 (이때까지는 결과가 나옴)
+        # 지연 SLO 상태 (이 시각까지 대체 모델 사용)
+        self._fallback_until = 0.0
+        self.metrics = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "fallback_attempts": 0,
+            "slo_breaches": 0,
+            "rejected_open": 0,
+        }
+
+    # ----- 서킷 브레이커 -----
+    def _check_breaker(self, probe: bool) -> bool:
+        """차단 중이면 거부, 이 호출이 반개방 시험 호출을 맡았는지 반환"""
+        with self._lock:
+            now = self._clock()
+            if self._open_until and now < self._open_until:
+                self.metrics["rejected_open"] += 1
+                raise CircuitOpenError(self._open_until - now)
+            if not self._open_until or probe:
+                return probe
+            # 쿨다운이 지나면 반개방: 시험 호출 하나의 결과로 개폐 결정, 나머지는 계속 거부
+            if self._probe_active:
+                self.metrics["rejected_open"] += 1
+                raise CircuitOpenError(max(0.0, self._probe_until - now))
+            self._probe_active = True
+            self._probe_until = now + self.config.timeout
+            return True
+
+    def _end_probe(self) -> None:
+        with self._lock:
+            self._probe_active = False
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._open_until = 0.0
+
+    def _record_failure(self) -> None:
+        """재시도 가능한 실패만 기록 (잘못된 요청/인증 오류는 서버 상태와 무관하므로 제외)"""
+        with self._lock:
+            self.metrics["failures"] += 1
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.config.breaker_threshold:
+                self._open_until = self._clock() + self.config.breaker_cooldown
+
+    # ----- 대체 모델 -----
+    def _use_fallback(self) -> bool:
+        return bool(self.config.fallback_model) and self._clock() < self._fallback_until
+
+    def _breach_slo(self) -> None:
+        with self._lock:
+            self.metrics["slo_breaches"] += 1
+            if self.config.fallback_model:
+                self._fallback_until = self._clock() + self.config.slo_cooldown
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        delay = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, delay)  # full jitter
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.config.backoff_max))
+        return delay
+
+    def call(self, send: Callable[[str, float], object], model: str):
+        """send(model, timeout)을 정책에 따라 실행하고 결과 반환
+
+        - 전체 마감시간 안에서만 재시도
+        - 기본 모델이 SLO를 넘기면 이후 시도와 이후 호출은 대체 모델 사용
+        """
+        config = self.config
+        with self._lock:
+            self.metrics["calls"] += 1
+        deadline = self._clock() + config.timeout
+        last_error: Optional[BaseException] = None
+        probe = False
+
+        try:
+            for attempt in range(config.max_retries + 1):
+                probe = self._check_breaker(probe)
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    break
+
+                fallback = self._use_fallback()
+                attempt_model = config.fallback_model if fallback else model
+                attempt_timeout = remaining
+                # 기본 모델은 SLO까지만 기다리고 초과하면 대체 모델로 재시도
+                # (재시도가 남아 있을 때만, 마지막 시도는 마감시간까지 기다림)
+                slo_bound = bool(
+                    config.latency_slo and config.fallback_model and not fallback
+                    and attempt < config.max_retries
+                )
+                if slo_bound:
+                    attempt_timeout = min(remaining, config.latency_slo)
+
+                with self._lock:
+                    self.metrics["attempts"] += 1
+                    if attempt:
+                        self.metrics["retries"] += 1
+                    if fallback:
+                        self.metrics["fallback_attempts"] += 1
+
+                started = self._clock()
+                try:
+                    result = send(attempt_model, attempt_timeout)
+                except Exception as e:
+                    last_error = e
+                    timed_out = _is_timeout(e)
+                    if timed_out:
+                        with self._lock:
+                            self.metrics["timeouts"] += 1
+                    if not is_retryable(e):
+                        raise
+                    if timed_out and slo_bound:
+                        # SLO 상한으로 직접 끊은 시도는 서버 장애가 아니므로 브레이커에 넣지 않음
+                        self._breach_slo()
+                    else:
+                        self._record_failure()
+                    if attempt >= config.max_retries:
+                        raise
+                    delay = self._backoff(attempt, e)
+                    if self._clock() + delay >= deadline:
+                        break
+                    self._sleep(delay)
+                    continue
+
+                elapsed = self._clock() - started
+                if config.latency_slo and not fallback and elapsed > config.latency_slo:
+                    self._breach_slo()
+                self._record_success()
+                return result
+        finally:
+            if probe:
+                self._end_probe()
+
+        raise DeadlineExceededError(
+            f"응답 마감시간({config.timeout:.0f}초)을 초과했습니다."
+        ) from last_error
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.metrics)
+            now = self._clock()
+            stats["circuit_open"] = bool(self._open_until and now < self._open_until)
+            stats["consecutive_failures"] = self._consecutive_failures
+            stats["fallback_active"] = bool(self.config.fallback_model) and now < self._fallback_until
+        return stats
+
+
+_policies: Dict[str, CallPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def shared_policy(key: str, config: CallPolicyConfig) -> CallPolicy:
+    """엔드포인트(key)별로 하나의 정책 인스턴스를 공유 (브레이커 상태 공유)"""
+    with _policies_lock:
+        policy = _policies.get(key)
+        if policy is None:
+            policy = CallPolicy(config)
+            _policies[key] = policy
+        return policy
+
+
+def get_policy_stats() -> Dict[str, Dict]:
+    """엔드포인트별 호출 정책 지표"""
+    with _policies_lock:
+        return {key: policy.stats() for key, policy in _policies.items()}
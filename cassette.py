@@ -0,0 +1,183 @@
+"""
+챗봇 녹화/재생(cassette) 모듈
+완성 API 요청/응답 쌍을 로컬 JSONL 파일에 기록하고, 같은 요청에 대해 원래 지연 또는
+지연 없이 결정적으로 재생
+
+- record: 실제 API를 호출하고 요청/응답/지연을 기록
+- replay: 기록된 응답만 사용 (네트워크/API 키 불필요)
+"""
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+# 기록 키에서 제외하는 요청 인자 (호출 정책이 시도마다 바꾸는 값)
+_VOLATILE_KEYS = ("timeout",)
+
+
+class CassetteMissError(KeyError):
+    """재생 모드에서 기록되지 않은 요청을 받음"""
+
+    def __str__(self):
+        return f"카세트에 기록되지 않은 요청입니다 (key={self.args[0][:12]}...)"
+
+
+def cassette_key(request: Dict) -> str:
+    """요청 인자의 지문 (모델, 메시지, 샘플링 설정)"""
+    stable = {k: v for k, v in request.items() if k not in _VOLATILE_KEYS}
+    payload = json.dumps(stable, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _to_namespace(value):
+    """dict 응답을 SDK 응답처럼 속성으로 접근 가능한 객체로 변환"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def _to_dict(response) -> Dict:
+    """SDK 응답 객체를 JSON으로 저장 가능한 dict로 변환"""
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json", exclude_none=True)
+    if isinstance(response, SimpleNamespace):
+        return {k: _to_dict(v) for k, v in vars(response).items()}
+    if isinstance(response, list):
+        return [_to_dict(v) for v in response]
+    return response
+
+
+class Cassette:
+    """요청/응답 기록 파일 (JSONL, 한 줄에 한 쌍)"""
+
+    def __init__(self, path, latency: str = "original"):
+        self.path = Path(path)
+        self.latency = latency  # "original" 또는 "zero"
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"카세트 항목 건너뜀 (손상된 줄): {self.path}")
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def record(self, request: Dict, response, latency_s: float) -> None:
+        """요청/응답/지연 한 쌍을 파일 끝에 추가"""
+        body = _to_dict(response)
+        usage = body.get("usage") or {}
+        entry = {
+            "key": cassette_key(request),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "request": {k: v for k, v in request.items() if k not in _VOLATILE_KEYS},
+            "response": body,
+            "latency_s": round(latency_s, 4),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._entries.setdefault(entry["key"], []).append(entry)
+            self.recorded += 1
+
+    def replay(self, request: Dict):
+        """기록된 응답 반환 (같은 요청이 여러 번 기록되었으면 순서대로 순환)"""
+        key = cassette_key(request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMissError(key)
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            self.hits += 1
+        entry = entries[index % len(entries)]
+        if self.latency == "original":
+            time.sleep(entry.get("latency_s") or 0.0)
+        return _to_namespace(entry["response"])
+
+    def latency_profile(self) -> List[float]:
+        """기록된 실제 응답 지연 목록 (부하 테스트 재사용용)"""
+        return [e["latency_s"] for entries in self._entries.values() for e in entries
+                if e.get("latency_s") is not None]
+
+    def stats(self) -> Dict:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                "recorded": self.recorded}
+
+
+class _CassetteCompletions:
+    def __init__(self, owner: "CassetteClient"):
+        self._owner = owner
+
+    def create(self, **request):
+        owner = self._owner
+        if owner.mode == "replay":
+            return owner.cassette.replay(request)
+        started = time.perf_counter()
+        response = owner.inner.chat.completions.create(**request)
+        owner.cassette.record(request, response, time.perf_counter() - started)
+        return response
+
+
+class CassetteClient:
+    """OpenAI 클라이언트와 같은 chat.completions.create 인터페이스를 갖는 녹화/재생 래퍼"""
+
+    def __init__(self, inner, cassette: Cassette, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"지원하지 않는 카세트 모드: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("녹화 모드에는 실제 API 클라이언트가 필요합니다.")
+        self.inner = inner
+        self.cassette = cassette
+        self.mode = mode
+        self.chat = SimpleNamespace(completions=_CassetteCompletions(self))
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def open_cassette(path, latency: str = "original") -> Cassette:
+    """경로별로 하나의 카세트를 공유 (여러 세션이 같은 파일에 안전하게 기록)"""
+    key = str(Path(path).resolve())
+    with _cassettes_lock:
+        cassette = _cassettes.get(key)
+        if cassette is None:
+            cassette = Cassette(path, latency=latency)
+            _cassettes[key] = cassette
+        cassette.latency = latency
+        return cassette
+
+
+def load_latency_profile(path) -> Optional[List[float]]:
+    """카세트 파일에서 지연 분포만 읽기 (없으면 None)"""
+    profile = Cassette(path, latency="zero").latency_profile()
+    return profile or None
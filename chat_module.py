@@ -2,56 +2,323 @@
 팝스 챗봇 모듈
 API를 활용하여 팝스 관련 질문에 답변하는 기능 제공
 """
-import os
 import json
+import math
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional
-from dotenv import load_dotenv
 from openai import OpenAI
 
+from call_policy import CallPolicyConfig, shared_policy
+from cassette import CASSETTE_MODES, CassetteClient, open_cassette
+from fair_scheduler import DEFAULT_TENANT, SchedulerConfig, shared_scheduler
+from knowledge_base import format_guidance, retrieve_guidance, weak_result_terms
+from paps_criteria import CriteriaIndex, get_criteria_index
+from results_store import format_trend
+from settings import get_setting, load_env
+
 # Streamlit이 있는지 확인 (Streamlit Cloud 배포 시)
 try:
-    import streamlit as st
+    import streamlit  # noqa: F401 (설정 오류 안내 문구만 다름)
     HAS_STREAMLIT = True
 except ImportError:
     HAS_STREAMLIT = False
 
 # 환경변수 로드 (프로젝트 루트의 .env 파일) - 로컬 개발용
-root = Path(__file__).parent
-env_path = root / '.env'
-if env_path.exists():
-    load_dotenv(dotenv_path=env_path)
+load_env()
+
+# 상담 지침 (모든 요청에서 바이트 단위로 동일해야 제공자 측 프롬프트 캐시가 적중함)
+STATIC_INSTRUCTIONS = """당신은 학생건강체력평가(PAPS) 전문 상담사입니다. 
+학생들의 체력 측정 결과를 분석하고, 부족한 부분을 파악하며, 다음 등급으로 발전하기 위한 구체적인 개선 방안을 제시하는 것이 주요 역할입니다.
+
+주요 역할:
+1. 학생의 측정 결과를 분석하여 어떤 체력요인이 부족한지 파악
+2. 각 체력요인의 등급과 점수를 확인하고 개선이 필요한 부분 식별
+3. 다음 등급으로 발전하기 위해 필요한 기록 개선량 계산 및 제시
+4. 각 평가종목을 더 잘 측정할 수 있는 방법과 운동 방법 안내
+5. 전반적인 체력 향상을 위한 종합적인 조언 제공
+
+체력요인:
+- 심폐지구력: 심장과 폐의 지구력
+- 유연성: 관절과 근육의 유연성
+- 근력근지구력: 근육의 힘과 지구력
+- 순발력: 빠른 힘 발휘 능력
+- 비만: 체질량지수 기반 평가
+
+응답 시 주의사항:
+- 친절하고 격려하는 톤으로 답변
+- 구체적이고 실천 가능한 조언 제공
+- 학생의 현재 등급과 목표 등급을 명확히 비교
+- 운동 방법은 안전하고 효과적인 것만 제시
+- 전문 용어 사용 시 쉬운 설명 추가
+- 학생별 측정 결과는 사용자 메시지의 [학생 정보]/[현재 측정 결과] 항목을 참고
+- [참고 운동 지침]이 주어지면 그 내용을 우선 활용하여 조언
+"""
+
+
+@lru_cache(maxsize=8)
+def build_static_prefix(criteria_excerpts: tuple = ()) -> str:
+    """고정 시스템 프롬프트 생성 (프로세스당 한 번, 인자별로 캐시)
+
+    학생별 데이터는 절대 포함하지 않는다. 기준표 발췌처럼 모든 학생에게
+    공통인 내용만 criteria_excerpts로 덧붙일 수 있다.
+    """
+    prefix = STATIC_INSTRUCTIONS
+    for excerpt in criteria_excerpts:
+        prefix += "\n" + excerpt.rstrip("\n") + "\n"
+    return prefix
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 (UTF-8 바이트 기준, 한글 1자 ≈ 1토큰)"""
+    return math.ceil(len(text.encode("utf-8")) / 3)
+
+
+class _InflightCall:
+    """진행 중인 업스트림 호출 하나"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class _SingleFlight:
+    """동일한 요청이 동시에 들어오면 업스트림 호출 하나를 공유 (single-flight)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _InflightCall] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn):
+        """key가 같은 호출이 진행 중이면 그 결과를 기다려 공유, 아니면 fn 실행"""
+        with self._lock:
+            self.requests += 1
+            call = self._inflight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _InflightCall()
+                self._inflight[key] = call
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.requests - self.coalesced,
+                "coalescing_rate": (self.coalesced / self.requests) if self.requests else 0.0,
+                "inflight": len(self._inflight),
+            }
+
+
+# Streamlit 세션들은 한 프로세스의 스레드로 실행되므로 프로세스 전역으로 공유
+_single_flight = _SingleFlight()
+
+
+def request_fingerprint(**params) -> str:
+    """완성 요청 파라미터(모델, 메시지, 샘플링 설정 등)의 지문"""
+    payload = json.dumps(params, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_coalescing_stats() -> Dict:
+    """동시 동일 요청 병합 지표 (요청 수, 병합 수, 병합률)"""
+    return _single_flight.stats()
+
+
+# ---- 요청 복잡도 라우팅 ----
+# 응답 시간 대부분은 생성 길이이므로, 짧은 사실 확인 질문은 작은 모델과 짧은 출력 상한으로 보냄
+ROUTE_NAMES = ("short", "standard", "plan")
+
+# 계획/방법을 묻는 질문 (큰 모델, 긴 출력)
+_PLAN_TERMS = ("계획", "프로그램", "루틴", "주간", "주차", "방법", "어떻게", "향상", "늘리", "올리",
+               "개선", "운동법", "팁", "전략", "식단", "관리", "훈련", "연습")
+# 값 하나를 확인하는 질문 (작은 모델, 짧은 출력)
+_FACT_TERMS = ("등급", "점수", "몇", "기준", "뭐", "무엇", "무슨", "언제", "얼마", "의미", "뜻",
+               "맞나요", "맞아", "인가요", "인가", "이야", "예요", "에요")
+_FACT_MAX_CHARS = 60
+# 붙여넣은 분석지처럼 긴 메시지는 전체 분석이 필요
+_PASTED_SHEET_CHARS = 200
+
+
+class Route:
+    """라우팅 결과 하나 (모델, 출력 상한, 샘플링 온도)"""
+    __slots__ = ("name", "model", "max_tokens", "temperature", "reason")
+
+    def __init__(self, name: str, model: str, max_tokens: int, temperature: float, reason: str = ""):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.reason = reason
+
+
+def classify_request(user_message: str) -> tuple:
+    """질문을 (경로 이름, 이유)로 분류 (로컬 규칙, 호출 없음)"""
+    text = (user_message or "").strip()
+    compact = re.sub(r"\s+", "", text)
+    if len(text) > _PASTED_SHEET_CHARS or text.count("\n") >= 4:
+        return "plan", "분석지/긴 메시지"
+    plan_term = next((t for t in _PLAN_TERMS if t in compact), None)
+    if plan_term:
+        return "plan", f"계획/방법 ({plan_term})"
+    if len(compact) <= _FACT_MAX_CHARS:
+        fact_term = next((t for t in _FACT_TERMS if t in compact), None)
+        if fact_term:
+            return "short", f"사실 확인 ({fact_term})"
+    return "standard", "일반 상담"
+
+
+# ---- 학생군 평가기준 요약 ----
+# 기준 경계를 물어보는 질문에만 요약을 붙임 (모델이 기준을 추측하거나 되묻지 않도록)
+_CRITERIA_TERMS = ("기준", "등급", "몇", "목표", "다음", "올리", "올라", "점수", "기록", "컷",
+                   "넘", "이상", "이하", "차이", "모자", "부족")
+_COHORT_FIELDS = ("학교과정", "학년", "성별")
+# 붙여넣은 분석지의 "학교과정: 초등학교" 형식 줄
+_COHORT_LINE_RE = {
+    field: re.compile(rf"{field}\s*[:：]\s*([^\s|·,]+)") for field in _COHORT_FIELDS
+}
+
+
+def needs_criteria_excerpt(user_message: str) -> bool:
+    """기준 경계가 있어야 답할 수 있는 질문인지 (로컬 규칙)"""
+    compact = re.sub(r"\s+", "", user_message or "")
+    return any(term in compact for term in _CRITERIA_TERMS)
+
+
+def cohort_from_text(text: str) -> Optional[tuple]:
+    """분석지 텍스트에서 (학교과정, 학년, 성별) 추출 (하나라도 없으면 None)"""
+    values = []
+    for field in _COHORT_FIELDS:
+        match = _COHORT_LINE_RE[field].search(text or "")
+        if not match or match.group(1) == "미입력":
+            return None
+        values.append(match.group(1))
+    return tuple(values)
+
+
+def _excerpt_event(line: str) -> str:
+    """요약 줄 "- 종목(체력요인): ..."의 종목 이름 (종목 이름 안의 괄호는 유지, 예: (무릎대고)팔굽혀펴기)"""
+    head = line.split("): ", 1)[0]
+    start = head.rfind("(")
+    return head[2:start] if head.startswith("- ") and start > 2 else ""
+
+
+def filter_excerpt(excerpt: str, events: List[str], text: str = "") -> str:
+    """요약에서 측정한 종목(없으면 text에 언급된 종목) 줄만 남김 (해당 줄이 없으면 전체)"""
+    if not excerpt:
+        return excerpt
+    header, *lines = excerpt.rstrip("\n").split("\n")
+    compact = re.sub(r"[\s()]+", "", text)
+    kept = []
+    for line in lines:
+        event = _excerpt_event(line)
+        if (event in events) if events else (event and re.sub(r"[()]", "", event) in compact):
+            kept.append(line)
+    return "\n".join([header] + kept) + "\n" if kept else excerpt
+
+
+class _RouteStats:
+    """경로별 호출 수와 지연 (프로세스 전역)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {name: deque(maxlen=500) for name in ROUTE_NAMES}
+        self._counts: Dict[str, int] = {name: 0 for name in ROUTE_NAMES}
+        self._completion_tokens: Dict[str, int] = {name: 0 for name in ROUTE_NAMES}
+
+    def record(self, route: str, elapsed: float, completion_tokens: Optional[int]) -> None:
+        with self._lock:
+            self._counts[route] += 1
+            self._latencies[route].append(elapsed)
+            self._completion_tokens[route] += completion_tokens or 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            result = {}
+            for name in ROUTE_NAMES:
+                values = sorted(self._latencies[name])
+                count = self._counts[name]
+                result[name] = {
+                    "requests": count,
+                    "p50_ms": round(values[len(values) // 2] * 1000, 1) if values else 0.0,
+                    "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1) if values else 0.0,
+                    "avg_completion_tokens": round(self._completion_tokens[name] / count, 1) if count else 0.0,
+                }
+            return result
+
+
+_route_stats = _RouteStats()
+
+
+def get_routing_stats() -> Dict:
+    """경로별 요청 수, 지연 p50/p95, 평균 출력 토큰"""
+    return _route_stats.stats()
+
+
+# 엔드포인트별 공유 클라이언트 (세션마다 연결 풀/TLS 연결을 새로 만들지 않음)
+_clients: Dict[tuple, OpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(api_key: str, api_base_url: Optional[str] = None) -> OpenAI:
+    """프로세스 전역 OpenAI 클라이언트 (재시도는 호출 정책이 담당하므로 SDK 재시도는 끔)"""
+    key = (api_key, api_base_url or "")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client_kwargs = {"api_key": api_key, "max_retries": 0}
+            if api_base_url:
+                client_kwargs["base_url"] = api_base_url
+            client = OpenAI(**client_kwargs)
+            _clients[key] = client
+    return client
+
 
 class PAPSChatbot:
     """팝스 챗봇 클래스"""
     
     def __init__(self):
         """챗봇 초기화"""
-        # Streamlit Secrets 우선 사용 (Streamlit Cloud 배포 시)
-        if HAS_STREAMLIT:
-            try:
-                # Streamlit Secrets에서 가져오기
-                api_key = st.secrets.get("API_KEY", None)
-                api_base_url = st.secrets.get("API_BASE_URL", None)
-                model_name = st.secrets.get("MODEL_NAME", "gpt-4o-mini")
-            except (AttributeError, KeyError, FileNotFoundError):
-                # Secrets가 없으면 환경변수로 폴백
-                api_key = None
-                api_base_url = None
-                model_name = "gpt-4o-mini"
+        # Streamlit Secrets → 환경변수(.env 포함) 순서 (settings.get_setting)
+        api_key = get_setting("API_KEY")
+        api_base_url = get_setting("API_BASE_URL")
+        model_name = get_setting("MODEL_NAME", "") or "gpt-4o-mini"
         
-        # Streamlit Secrets가 없거나 Streamlit이 없는 경우 환경변수 사용
-        if not api_key:
-            # .env 파일 경로 명시적으로 지정하여 다시 로드
-            env_path = Path(__file__).parent / '.env'
-            if env_path.exists():
-                load_dotenv(dotenv_path=env_path, override=True)
-            
-            api_key = os.getenv("API_KEY")
-            if not api_base_url:
-                api_base_url = os.getenv("API_BASE_URL")
-            if model_name == "gpt-4o-mini":
-                model_name = os.getenv("MODEL_NAME", "gpt-4o-mini")
+        # 녹화/재생 모드 (off | record | replay)
+        cassette_mode = (get_setting("CASSETTE_MODE", "off") or "off").lower()
+        if cassette_mode not in CASSETTE_MODES:
+            raise ValueError(f"CASSETTE_MODE는 {', '.join(CASSETTE_MODES)} 중 하나여야 합니다.")
+        if cassette_mode == "replay" and not api_key:
+            api_key = "cassette-replay"  # 재생 모드는 실제 API를 호출하지 않음
         
         if not api_key:
             error_msg = "API_KEY가 설정되지 않았습니다. "
@@ -60,230 +327,336 @@ class PAPSChatbot:
             error_msg += "로컬 개발 시 .env 파일을 확인하세요."
             raise ValueError(error_msg)
         
-        # OpenAI 클라이언트 초기화
-        client_kwargs = {"api_key": api_key}
-        if api_base_url:
-            client_kwargs["base_url"] = api_base_url
-        
-        self.client = OpenAI(**client_kwargs)
+        # OpenAI 클라이언트 (같은 엔드포인트의 세션들이 연결 풀을 공유)
+        self.client = shared_client(api_key, api_base_url)
+        self.cassette = None
+        if cassette_mode != "off":
+            self.cassette = open_cassette(
+                get_setting("CASSETTE_PATH", str(Path(__file__).parent / "cassettes" / "chat.jsonl")),
+                latency=get_setting("CASSETTE_LATENCY", "original"),
+            )
+            self.client = CassetteClient(self.client, self.cassette, cassette_mode)
+        self.api_base_url = api_base_url
         self.model_name = model_name
+        # 마감시간/재시도/서킷 브레이커/대체 모델 정책 (엔드포인트별 공유)
+        self.call_policy = shared_policy(
+            api_base_url or "default", CallPolicyConfig.from_settings(get_setting)
+        )
+        # 학교/학급(테넌트) 간 공정 스케줄러 (프로세스 전역 공유)
+        self.scheduler = shared_scheduler(SchedulerConfig.from_settings(get_setting))
+        self.tenant = get_setting("TENANT", "") or DEFAULT_TENANT
         self.conversation_history = []
+        # 질문마다 프롬프트에 넣을 운동 지침 수 (0이면 검색 안 함)
+        self.retrieval_top_k = int(get_setting("RETRIEVAL_TOP_K", "3") or 0)
+        # 모든 학생에게 공통인 기준표 발췌 (고정 prefix에 포함됨)
+        self.static_prefix_sections: tuple = ()
+        # 평가기준 버전 (비어 있으면 학생 정보의 기준버전 → 오늘 적용되는 버전 순)
+        self.criteria_version = get_setting("CRITERIA_VERSION", "") or None
+        # 질문 복잡도 라우팅 (ROUTER=off면 모든 질문을 기존처럼 기본 모델/1000토큰으로 처리)
+        self.router_enabled = (get_setting("ROUTER", "on") or "on").lower() not in ("off", "0", "false")
+        self.routes = self._build_routes()
+        # 평가기준 요약 (CRITERIA_EXCERPT=off면 넣지 않음), 분석지에서 알아낸 학생군은 대화 동안 유지
+        self.criteria_excerpt_enabled = (
+            (get_setting("CRITERIA_EXCERPT", "on") or "on").lower() not in ("off", "0", "false")
+        )
+        self.cohort: Optional[tuple] = None
+        # 마지막 요청의 prefix 측정값
+        self.last_prompt_stats: Dict = {}
+        self.last_excerpt_tokens = 0
         
         # 프로젝트 루트 경로 설정
         self.root = Path(__file__).parent
     
-    def _load_paps_data(self) -> Dict:
-        """팝스 데이터 로드"""
+    def _build_routes(self) -> Dict[str, Route]:
+        """경로별 모델/출력 상한 (SMALL_MODEL_NAME이 없으면 짧은 질문도 기본 모델, 상한만 줄임)"""
+        def setting(name: str, default, cast):
+            value = get_setting(name)
+            try:
+                return cast(value) if value not in (None, "") else default
+            except (TypeError, ValueError):
+                print(f"라우팅 설정 무시: {name}={value!r}")
+                return default
+
+        small_model = get_setting("SMALL_MODEL_NAME", "") or self.model_name
+        return {
+            "short": Route("short", small_model, setting("SHORT_MAX_TOKENS", 300, int), 0.3),
+            "standard": Route("standard", self.model_name, setting("STANDARD_MAX_TOKENS", 600, int), 0.7),
+            "plan": Route("plan", self.model_name, setting("PLAN_MAX_TOKENS", 1000, int), 0.7),
+        }
+
+    def route(self, user_message: str) -> Route:
+        """질문에 사용할 경로 (라우팅을 끄면 기존과 같은 기본 모델/1000토큰)"""
+        if not self.router_enabled:
+            return Route("plan", self.model_name, 1000, 0.7, "라우팅 꺼짐")
+        name, reason = classify_request(user_message)
+        base = self.routes[name]
+        return Route(name, base.model, base.max_tokens, base.temperature, reason)
+
+    def _criteria_index(self, user_info: Optional[Dict] = None) -> Optional[CriteriaIndex]:
+        """학생에게 적용할 평가기준 인덱스 (버전별 LRU 캐시)"""
+        version = (user_info or {}).get('기준버전') or self.criteria_version
         try:
-            paps_data_path = self.root / 'paps_data.js'
-            with open(paps_data_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # const PAPS_DATA = ... 부분에서 JSON 추출
-                json_start = content.find('{')
-                json_end = content.rfind('}') + 1
-                json_str = content[json_start:json_end]
-                return json.loads(json_str)
+            return get_criteria_index(version)
         except Exception as e:
-            print(f"팝스 데이터 로드 실패: {e}")
-            return {}
+            print(f"팝스 평가기준 로드 실패: {e}")
+            return None
     
-    def _create_system_prompt(
+    def _create_system_prompt(self) -> str:
+        """시스템 프롬프트 생성 (학생 데이터가 없는 고정 prefix)"""
+        return build_static_prefix(self.static_prefix_sections)
+
+    def _criteria_excerpt(
         self,
-        paps_data: Dict,
+        user_message: str,
+        criteria: Optional[CriteriaIndex],
         user_results: Optional[Dict] = None,
-        total_summary: Optional[Dict] = None
+        user_info: Optional[Dict] = None
     ) -> str:
-        """시스템 프롬프트 생성"""
-        system_prompt = """당신은 학생건강체력평가(PAPS) 전문 상담사입니다. 
-학생들의 체력 측정 결과를 분석하고, 부족한 부분을 파악하며, 다음 등급으로 발전하기 위한 구체적인 개선 방안을 제시하는 것이 주요 역할입니다.
+        """필요한 질문일 때만 학생군 평가기준 요약 (학생 정보 → 붙여넣은 분석지 → 이전 분석지 순)
 
-주요 역할:
-1. 학생의 측정 결과를 분석하여 어떤 체력요인이 부족한지 파악
-2. 각 체력요인의 등급과 점수를 확인하고 개선이 필요한 부분 식별
-3. 다음 등급으로 발전하기 위해 필요한 기록 개선량 계산 및 제시
-4. 각 평가종목을 더 잘 측정할 수 있는 방법과 운동 방법 안내
-5. 전반적인 체력 향상을 위한 종합적인 조언 제공
+        이전 분석지의 학생군은 학생 정보를 넘기지 않은 대화(분석지 붙여넣기)에서만 사용
+        (학생 정보가 불완전한 학생에게 다른 학생의 기준이 들어가지 않도록)
+        """
+        cohort = None
+        if user_info and all(user_info.get(field) for field in _COHORT_FIELDS):
+            cohort = tuple(user_info[field] for field in _COHORT_FIELDS)
+        else:
+            cohort = cohort_from_text(user_message)
+        if cohort:
+            self.cohort = cohort
+        elif user_info is None:
+            cohort = self.cohort
+        if (
+            not self.criteria_excerpt_enabled or criteria is None or cohort is None
+            or not needs_criteria_excerpt(user_message)
+        ):
+            return ""
+        events = [r.get('평가종목') for r in (user_results or {}).values() if r.get('평가종목')]
+        return filter_excerpt(criteria.cohort_excerpt(*cohort), events, user_message)
 
-체력요인:
-- 심폐지구력: 심장과 폐의 지구력
-- 유연성: 관절과 근육의 유연성
-- 근력근지구력: 근육의 힘과 지구력
-- 순발력: 빠른 힘 발휘 능력
-- 비만: 체질량지수 기반 평가
-
-응답 시 주의사항:
-- 친절하고 격려하는 톤으로 답변
-- 구체적이고 실천 가능한 조언 제공
-- 학생의 현재 등급과 목표 등급을 명확히 비교
-- 운동 방법은 안전하고 효과적인 것만 제시
-- 전문 용어 사용 시 쉬운 설명 추가
-"""
+    def _create_context_message(
+        self,
+        user_message: str,
+        criteria: Optional[CriteriaIndex],
+        user_results: Optional[Dict] = None,
+        user_info: Optional[Dict] = None,
+        total_summary: Optional[Dict] = None
+    ) -> str:
+        """학생별 데이터를 담은 사용자 메시지 생성 (고정 prefix 뒤에 위치)"""
+        context_message = user_message
+        
+        # 사용자 정보가 있으면 컨텍스트에 추가
+        if user_info:
+            context_message += f"\n\n[학생 정보]\n"
+            context_message += f"- 학교과정: {user_info.get('학교과정', '')}\n"
+            context_message += f"- 학년: {user_info.get('학년', '')}\n"
+            context_message += f"- 성별: {user_info.get('성별', '')}\n"
         
+        # 측정 결과가 있으면 컨텍스트에 추가
         if user_results:
-            system_prompt += f"\n\n현재 학생의 측정 결과:\n"
+            context_message += f"\n[현재 측정 결과]\n"
             for factor, result in user_results.items():
                 if result.get('점수', 0) > 0:
-                    detail_parts = [
-                        f"- {factor}: 점수 {result.get('점수', 0)}점, 등급 {result.get('등급', '-')}"
-                    ]
+                    detail = f"- {factor}: 점수 {result.get('점수', 0)}점, 등급 {result.get('등급', '-')}"
                     record = result.get('기록')
                     event = result.get('평가종목')
-                    extra = []
+                    extras = []
                     if event:
-                        extra.append(f"평가종목 {event}")
+                        extras.append(f"평가종목 {event}")
                     if record is not None:
-                        extra.append(f"기록 {record}")
-                    if extra:
-                        detail_parts.append(f"({' / '.join(extra)})")
-                    system_prompt += " ".join(detail_parts) + "\n"
+                        extras.append(f"기록 {record}")
+                    if extras:
+                        detail += f" ({', '.join(extras)})"
+                    context_message += detail + "\n"
+            
+            # 다음 등급 정보 추가
+            if user_info and criteria is not None:
+                for factor, result in user_results.items():
+                    current_grade = result.get('등급', '')
+                    current_record = result.get('기록')
+                    test_item = result.get('평가종목', '')
+                    if (
+                        result.get('점수', 0) > 0 and
+                        current_grade and
+                        current_grade != '-' and
+                        current_record is not None and
+                        test_item
+                    ):
+                        next_grade_info = self._get_next_grade_info(
+                            criteria, factor, current_grade,
+                            current_record,
+                            user_info.get('학교과정', ''),
+                            user_info.get('학년', ''),
+                            user_info.get('성별', ''),
+                            test_item
+                        )
+                        if next_grade_info:
+                            context_message += f"\n{factor}의 다음 등급({next_grade_info['next_grade']}등급)을 위해서는 "
+                            context_message += (
+                                f"기록을 {round(next_grade_info['improvement_needed'], 2):g}만큼 개선해야 합니다 "
+                                f"(목표 기록 {next_grade_info['target_record']:g}).\n"
+                            )
 
         if total_summary:
-            system_prompt += (
-                f"\n전체 점수는 {total_summary.get('총점', 0)}점이며 "
-                f"{total_summary.get('등급', '-')} 등급입니다.\n"
+            context_message += (
+                f"\n[전체 결과]\n총점: {total_summary.get('총점', 0)}점, "
+                f"등급: {total_summary.get('등급', '-')}\n"
             )
         
-        return system_prompt
+        return context_message
+
+    def _record_prompt_stats(self, messages: List[Dict], response=None) -> None:
+        """캐시 가능한 prefix 길이 측정 (전송 시점)"""
+        static_prefix = messages[0]["content"]
+        stable_prefix = "".join(m["content"] for m in messages[:-1])
+        stats = {
+            "static_prefix_chars": len(static_prefix),
+            "static_prefix_tokens_est": estimate_tokens(static_prefix),
+            "stable_prefix_tokens_est": estimate_tokens(stable_prefix),
+            "volatile_tokens_est": estimate_tokens(messages[-1]["content"]),
+            "criteria_excerpt_tokens_est": self.last_excerpt_tokens,
+            "cached_tokens": None,
+        }
+        usage = getattr(response, "usage", None) if response is not None else None
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None:
+            stats["cached_tokens"] = getattr(details, "cached_tokens", None)
+        if usage is not None:
+            stats["prompt_tokens"] = getattr(usage, "prompt_tokens", None)
+            stats["completion_tokens"] = getattr(usage, "completion_tokens", None)
+        self.last_prompt_stats = stats
     
-    def _get_next_grade_info(self, paps_data: Dict, factor: str, current_grade: str, 
+    def _get_next_grade_info(self, criteria: CriteriaIndex, factor: str, current_grade: str, 
                              current_record: float, school_level: str, grade: str, gender: str, 
                              test_item: str) -> Optional[Dict]:
-        """다음 등급으로 발전하기 위한 정보 계산"""
+        """다음 등급으로 발전하기 위한 정보 계산 (등급은 기록으로 다시 조회, 비만처럼 숫자 등급이 아니면 None)"""
         try:
-            # 현재 등급의 숫자값
-            current_grade_num = int(current_grade.replace('등급', '').strip())
-            if current_grade_num >= 1:
-                return None  # 이미 최고 등급
-            
-            next_grade_num = current_grade_num - 1
-            
-            # 다음 등급의 기준 찾기
-            next_grade_criteria = None
-            for item in paps_data.get('평가기준', []):
-                if (item['체력요인'].strip() == factor and
-                    item['평가종목'].strip() == test_item and
-                    item['학년'].strip() == grade and
-                    item['성별'].strip() == gender and
-                    item['학교과정'].strip() == school_level and
-                    item['등급'].strip() == str(next_grade_num)):
-                    
-                    # 기록 범위 파싱
-                    record_range = item['기록'].split('~')
-                    if len(record_range) == 2:
-                        min_record = float(record_range[0].strip())
-                        max_record = float(record_range[1].strip())
-                        
-                        # 기록이 높을수록 좋은 종목인지 판단 (비만은 낮을수록 좋음)
-                        if factor == '비만':
-                            # 비만은 낮을수록 좋으므로 현재 기록보다 낮아야 함
-                            target_record = min_record
-                            improvement_needed = current_record - target_record
-                        else:
-                            # 대부분의 종목은 높을수록 좋음
-                            target_record = max_record
-                            improvement_needed = target_record - current_record
-                        
-                        return {
-                            'next_grade': next_grade_num,
-                            'target_record': target_record,
-                            'improvement_needed': improvement_needed,
-                            'current_record': current_record
-                        }
-            
-            return None
-        except Exception as e:
+            return criteria.next_grade(school_level, grade, gender, factor, test_item, float(current_record))
+        except (TypeError, ValueError) as e:
             print(f"다음 등급 정보 계산 실패: {e}")
             return None
     
+    def _complete(self, messages: List[Dict], tenant: Optional[str] = None, **params):
+        """완성 API 호출 (동일한 요청이 진행 중이면 결과를 공유)
+
+        실제 호출은 공정 스케줄러에서 tenant 차례를 기다린 뒤 호출 정책을 거치며,
+        정책이 시도마다 모델(기본/대체)과 남은 마감시간을 정한다.
+        병합된 요청은 업스트림 호출을 만들지 않으므로 대표 요청만 차례를 기다린다.
+        """
+        model = params.pop("model", None) or self.model_name
+        request = {"model": model, "messages": messages}
+        request.update(params)
+        key = request_fingerprint(base_url=self.api_base_url, **request)
+
+        def send(model: str, timeout: float):
+            return self.client.chat.completions.create(
+                **{**request, "model": model}, timeout=timeout
+            )
+
+        return _single_flight.do(
+            key, lambda: self.scheduler.run(
+                tenant or self.tenant, lambda: self.call_policy.call(send, model)
+            )
+        )
+
+    def build_messages(
+        self,
+        user_message: str,
+        user_results: Optional[Dict] = None,
+        user_info: Optional[Dict] = None,
+        total_summary: Optional[Dict] = None,
+        history: Optional[List[Dict]] = None,
+        trend: Optional[List[Dict]] = None,
+        standing: Optional[Dict] = None
+    ) -> List[Dict]:
+        """전송할 메시지 구성: 고정 prefix → 대화 기록 → 학생별 데이터 순서"""
+        criteria = self._criteria_index(user_info)
+        messages = [
+            {"role": "system", "content": self._create_system_prompt()}
+        ]
+        
+        # 대화 기록 추가
+        messages.extend(history or [])
+        
+        # 사용자 메시지 추가 (학생별 데이터는 항상 마지막에 위치)
+        context_message = self._create_context_message(
+            user_message, criteria, user_results, user_info, total_summary
+        )
+        
+        # 학생군 평가기준 요약 (기준을 묻는 질문일 때만, 토큰 비용은 last_prompt_stats에 기록)
+        excerpt = self._criteria_excerpt(user_message, criteria, user_results, user_info)
+        self.last_excerpt_tokens = estimate_tokens(excerpt) if excerpt else 0
+        if excerpt:
+            context_message = context_message.rstrip("\n") + "\n\n" + excerpt
+
+        # 이전 측정 회차 추이 (결과 저장소에서 조회한 경우)
+        trend_block = format_trend(trend or [])
+        if trend_block:
+            context_message = context_message.rstrip("\n") + "\n\n" + trend_block
+
+        # 학급/학년 내 위치 (집단 분석 결과가 있는 경우)
+        if standing:
+            from cohort_analytics import format_standing  # numpy는 필요할 때만
+            standing_block = format_standing(standing)
+        else:
+            standing_block = ""
+        if standing_block:
+            context_message = context_message.rstrip("\n") + "\n\n" + standing_block
+
+        # 질문과 관련된 운동 지침만 검색하여 추가
+        guidance = format_guidance(retrieve_guidance(
+            user_message, k=self.retrieval_top_k, extra_terms=weak_result_terms(user_results)
+        ))
+        if guidance:
+            context_message = context_message.rstrip("\n") + "\n\n" + guidance
+        messages.append({"role": "user", "content": context_message})
+        return messages
+
+    def complete(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000,
+                 tenant: Optional[str] = None, model: Optional[str] = None) -> str:
+        """대화 기록을 건드리지 않는 단발성 완성 (오류는 그대로 발생, model 생략 시 기본 모델)"""
+        response = self._complete(
+            messages,
+            tenant=tenant,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        self._record_prompt_stats(messages, response)
+        return response.choices[0].message.content
+
     def get_response(
         self,
         user_message: str,
         user_results: Optional[Dict] = None,
         user_info: Optional[Dict] = None,
-        total_summary: Optional[Dict] = None
+        total_summary: Optional[Dict] = None,
+        trend: Optional[List[Dict]] = None,
+        standing: Optional[Dict] = None,
+        tenant: Optional[str] = None
     ) -> str:
-        """사용자 메시지에 대한 응답 생성"""
+        """사용자 메시지에 대한 응답 생성
+
+        trend: 결과 저장소의 이전 측정 추이, standing: 집단 분석의 학급/학년 내 위치
+        tenant: 공정 스케줄러의 학교/학급 (없으면 TENANT 설정 → default)
+        """
         try:
-            paps_data = self._load_paps_data()
-            system_prompt = self._create_system_prompt(paps_data, user_results, total_summary)
-            
-            # 컨텍스트 메시지 구성
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # 대화 기록 추가
-            messages.extend(self.conversation_history)
-            
-            # 사용자 메시지 추가
-            context_message = user_message
-            
-            # 사용자 정보가 있으면 컨텍스트에 추가
-            if user_info:
-                context_message += f"\n\n[학생 정보]\n"
-                context_message += f"- 학교과정: {user_info.get('학교과정', '')}\n"
-                context_message += f"- 학년: {user_info.get('학년', '')}\n"
-                context_message += f"- 성별: {user_info.get('성별', '')}\n"
-            
-            # 측정 결과가 있으면 컨텍스트에 추가
-            if user_results:
-                context_message += f"\n[현재 측정 결과]\n"
-                for factor, result in user_results.items():
-                    if result.get('점수', 0) > 0:
-                        detail = f"- {factor}: 점수 {result.get('점수', 0)}점, 등급 {result.get('등급', '-')}"
-                        record = result.get('기록')
-                        event = result.get('평가종목')
-                        extras = []
-                        if event:
-                            extras.append(f"평가종목 {event}")
-                        if record is not None:
-                            extras.append(f"기록 {record}")
-                        if extras:
-                            detail += f" ({', '.join(extras)})"
-                        context_message += detail + "\n"
-                
-                # 다음 등급 정보 추가
-                if user_info:
-                    for factor, result in user_results.items():
-                        current_grade = result.get('등급', '')
-                        current_record = result.get('기록')
-                        test_item = result.get('평가종목', '')
-                        if (
-                            result.get('점수', 0) > 0 and
-                            current_grade and
-                            current_grade != '-' and
-                            current_record is not None and
-                            test_item
-                        ):
-                            next_grade_info = self._get_next_grade_info(
-                                paps_data, factor, current_grade,
-                                current_record,
-                                user_info.get('학교과정', ''),
-                                user_info.get('학년', ''),
-                                user_info.get('성별', ''),
-                                test_item
-                            )
-                            if next_grade_info:
-                                context_message += f"\n{factor}의 다음 등급({next_grade_info['next_grade']}등급)을 위해서는 "
-                                context_message += f"기록을 {next_grade_info['improvement_needed']:.1f}만큼 개선해야 합니다.\n"
-
-            if total_summary:
-                context_message += (
-                    f"\n[전체 결과]\n총점: {total_summary.get('총점', 0)}점, "
-                    f"등급: {total_summary.get('등급', '-')}\n"
-                )
-            
-            messages.append({"role": "user", "content": context_message})
-            
-            # API 호출
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
+            messages = self.build_messages(
+                user_message, user_results, user_info, total_summary,
+                history=self.conversation_history, trend=trend, standing=standing
             )
             
-            assistant_message = response.choices[0].message.content
+            # API 호출 (질문 복잡도에 따라 모델과 출력 상한 선택)
+            route = self.route(user_message)
+            started = time.perf_counter()
+            assistant_message = self.complete(
+                messages, temperature=route.temperature, max_tokens=route.max_tokens,
+                tenant=tenant, model=route.model
+            )
+            elapsed = time.perf_counter() - started
+            completion_tokens = self.last_prompt_stats.get("completion_tokens")
+            _route_stats.record(route.name, elapsed, completion_tokens)
+            self.last_prompt_stats["route"] = route.name
             
             # 대화 기록 업데이트 (최근 10개만 유지)
             self.conversation_history.append({"role": "user", "content": user_message})
@@ -299,4 +672,5 @@ class PAPSChatbot:
     def reset_conversation(self):
         """대화 기록 초기화"""
         self.conversation_history = []
+        self.cohort = None
 
@@ -0,0 +1,284 @@
+"""
+집단(학급/학년/지역) 내 위치 분석
+점수는 정수(체력요인 0~20점, 총점 0~100점)이므로 집단별 점수 히스토그램만 누적해 두면
+분포·백분위를 원본 결과를 다시 읽지 않고 계산할 수 있음
+
+- 집단: 학급(학교, 학급), 학년(학교, 학교과정, 학년), 지역(학교과정, 학년, 성별)
+- 새 결과는 히스토그램에 더하기만 하면 됨 (증분 갱신)
+- 백분위 조회는 누적 합 배열 한 번 인덱싱 (집단별 누적 합은 갱신 시에만 다시 계산)
+
+사용 예:
+    python cohort_analytics.py build --db paps_results.db --out paps_analytics.npz [--date 2025-04-10]
+    python cohort_analytics.py show --snapshot paps_analytics.npz --school 한빛중 --class 3-2
+"""
+import argparse
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from paps_criteria import FACTORS
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).parent / 'paps_analytics.npz'
+
+# 히스토그램 행: 체력요인 5개 + 총점
+TOTAL = '총점'
+ROWS = FACTORS + [TOTAL]
+BINS = 101  # 0~100점 (체력요인은 0~20만 사용)
+
+LEVEL_NAMES = {'class': '학급', 'grade': '학년', 'district': '지역 같은 학년·성별'}
+
+CohortKey = Tuple[str, ...]
+
+
+def cohort_keys(school: str, class_name: str, user_info: Dict) -> Dict[str, CohortKey]:
+    """학생이 속한 집단별 키"""
+    level = str(user_info.get('학교과정', '')).strip()
+    grade = str(user_info.get('학년', '')).strip()
+    gender = str(user_info.get('성별', '')).strip()
+    return {
+        'class': ('class', school, class_name),
+        'grade': ('grade', school, level, grade),
+        'district': ('district', level, grade, gender),
+    }
+
+
+def _score_matrix(students: List[Dict]) -> np.ndarray:
+    """학생 × (체력요인 5 + 총점) 점수 행렬 (미측정은 -1)"""
+    scores = np.full((len(students), len(ROWS)), -1, dtype=np.int64)
+    for i, student in enumerate(students):
+        results = student.get('user_results') or {}
+        for j, factor in enumerate(FACTORS):
+            result = results.get(factor)
+            if result and result.get('등급') not in (None, '', '-'):
+                scores[i, j] = int(result.get('점수') or 0)
+        summary = student.get('total_summary') or {}
+        scores[i, -1] = int(summary.get('총점') or 0)
+    return np.clip(scores, -1, BINS - 1)
+
+
+def _histograms(group_ids: np.ndarray, scores: np.ndarray, groups: int) -> np.ndarray:
+    """그룹별 히스토그램 (groups × 행 × BINS), 점수 -1은 제외"""
+    hist = np.zeros((groups, len(ROWS), BINS), dtype=np.int64)
+    for j in range(len(ROWS)):
+        valid = scores[:, j] >= 0
+        flat = group_ids[valid] * BINS + scores[valid, j]
+        hist[:, j, :] = np.bincount(flat, minlength=groups * BINS).reshape(groups, BINS)
+    return hist
+
+
+class CohortAnalytics:
+    """집단별 점수 히스토그램과 백분위 조회"""
+
+    def __init__(self):
+        self._hist: Dict[CohortKey, np.ndarray] = {}
+        self._cumulative: Dict[CohortKey, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._hist)
+
+    def keys(self) -> List[CohortKey]:
+        return list(self._hist)
+
+    # ---- 갱신 ----
+
+    def _merge(self, key: CohortKey, hist: np.ndarray) -> None:
+        if key in self._hist:
+            self._hist[key] += hist
+        else:
+            self._hist[key] = hist.copy()
+        self._cumulative.pop(key, None)
+
+    def add_scores(self, keys: List[CohortKey], scores: np.ndarray) -> None:
+        """행마다 집단 키가 있는 점수 행렬을 한 번에 누적"""
+        if not keys:
+            return
+        unique, group_ids = np.unique(np.array(['\x1f'.join(k) for k in keys]), return_inverse=True)
+        lookup = {'\x1f'.join(k): k for k in keys}
+        hist = _histograms(group_ids.ravel(), scores, len(unique))
+        for i, joined in enumerate(unique):
+            self._merge(lookup[joined], hist[i])
+
+    def add_students(self, students: Iterable[Dict], school: str, class_name: str) -> None:
+        """채점된 학생 레코드를 학급/학년/지역 집단에 누적"""
+        students = list(students)
+        if not students:
+            return
+        scores = _score_matrix(students)
+        for level in ('class', 'grade', 'district'):
+            keys = [cohort_keys(school, class_name, s.get('user_info') or {})[level] for s in students]
+            self.add_scores(keys, scores)
+
+    @classmethod
+    def from_store(cls, store, measured_on: Optional[str] = None) -> "CohortAnalytics":
+        """결과 저장소 전체(또는 한 회차)로 히스토그램 생성 (학생당 최신 회차 1건)"""
+        rows = store.cohort_rows(measured_on)
+        analytics = cls()
+        if not rows:
+            return analytics
+        members: Dict[int, int] = {}
+        info = []
+        for r in rows:
+            if r['id'] not in members:
+                members[r['id']] = len(info)
+                info.append(r)
+        scores = np.full((len(info), len(ROWS)), -1, dtype=np.int64)
+        scores[:, -1] = [r['total_score'] for r in info]
+        column = {factor: j for j, factor in enumerate(FACTORS)}
+        for r in rows:
+            if r['factor'] in column and r['result_grade'] != '-':
+                scores[members[r['id']], column[r['factor']]] = r['score']
+        scores = np.clip(scores, -1, BINS - 1)
+        for level in ('class', 'grade', 'district'):
+            keys = [
+                cohort_keys(r['school'], r['class_name'],
+                            {'학교과정': r['school_level'], '학년': r['grade'], '성별': r['gender']})[level]
+                for r in info
+            ]
+            analytics.add_scores(keys, scores)
+        return analytics
+
+    # ---- 조회 ----
+
+    def _cumulative_for(self, key: CohortKey) -> Optional[np.ndarray]:
+        cumulative = self._cumulative.get(key)
+        if cumulative is None:
+            hist = self._hist.get(key)
+            if hist is None:
+                return None
+            cumulative = np.concatenate(
+                [np.zeros((len(ROWS), 1), dtype=np.int64), np.cumsum(hist, axis=1)], axis=1
+            )
+            self._cumulative[key] = cumulative
+        return cumulative
+
+    def percentile(self, key: CohortKey, score: int, factor: str = TOTAL) -> Optional[float]:
+        """집단 내 백분위 (0~100, 같은 점수는 절반만 아래로 셈), 자료 없으면 None"""
+        cumulative = self._cumulative_for(key)
+        if cumulative is None:
+            return None
+        row = cumulative[ROWS.index(factor)]
+        n = row[-1]
+        if n == 0:
+            return None
+        s = min(max(int(score), 0), BINS - 1)
+        below = row[s]
+        equal = row[s + 1] - row[s]
+        return float((below + 0.5 * equal) / n * 100)
+
+    def distribution(self, key: CohortKey, factor: str = TOTAL) -> Optional[Dict]:
+        """인원, 평균, 표준편차, 사분위수, 히스토그램"""
+        hist = self._hist.get(key)
+        if hist is None:
+            return None
+        counts = hist[ROWS.index(factor)]
+        n = int(counts.sum())
+        if n == 0:
+            return None
+        values = np.arange(BINS)
+        mean = float((counts * values).sum() / n)
+        std = float(np.sqrt((counts * (values - mean) ** 2).sum() / n))
+        cumulative = np.cumsum(counts)
+        quartiles = {f"p{q}": int(np.searchsorted(cumulative, n * q / 100)) for q in (25, 50, 75)}
+        top = 21 if factor != TOTAL else BINS
+        return {'n': n, 'mean': mean, 'std': std, **quartiles, 'histogram': counts[:top].tolist()}
+
+    def standing(self, student: Dict, school: str = '', class_name: str = '') -> Dict[str, Dict]:
+        """학생의 집단별 위치 {집단: {'n', 총점/체력요인 백분위}}"""
+        result = {}
+        keys = cohort_keys(school, class_name, student.get('user_info') or {})
+        scores = _score_matrix([student])[0]
+        for level, key in keys.items():
+            if key not in self._hist:
+                continue
+            entry = {'n': int(self._hist[key][-1].sum())}
+            for j, row in enumerate(ROWS):
+                if scores[j] >= 0:
+                    entry[row] = self.percentile(key, int(scores[j]), row)
+            result[level] = entry
+        return result
+
+    def calculator_table(self) -> Dict[str, List[int]]:
+        """계산기용 지역 집단 총점 누적 인원표 {'학교과정|학년|성별': [0점 미만, 1점 미만, ..., 전체]}"""
+        table = {}
+        for key in self._hist:
+            if key[0] == 'district':
+                table['|'.join(key[1:])] = self._cumulative_for(key)[-1].tolist()
+        return table
+
+    # ---- 저장 ----
+
+    def save(self, path=DEFAULT_SNAPSHOT_PATH) -> None:
+        keys = list(self._hist)
+        stacked = (np.stack([self._hist[k] for k in keys]) if keys
+                   else np.zeros((0, len(ROWS), BINS), dtype=np.int64))
+        np.savez_compressed(path, keys=np.array(json.dumps(keys, ensure_ascii=False)), hist=stacked)
+
+    @classmethod
+    def load(cls, path=DEFAULT_SNAPSHOT_PATH) -> "CohortAnalytics":
+        analytics = cls()
+        with np.load(path) as data:
+            keys = json.loads(str(data['keys']))
+            for key, hist in zip(keys, data['hist']):
+                analytics._hist[tuple(key)] = hist.astype(np.int64)
+        return analytics
+
+
+def format_standing(standing: Dict[str, Dict]) -> str:
+    """챗봇 컨텍스트용 집단 내 위치 블록"""
+    if not standing:
+        return ""
+    lines = ["[집단 내 위치] (백분위가 높을수록 상위)"]
+    for level, entry in standing.items():
+        parts = [f"{name} {entry[name]:.0f}" for name in ROWS if entry.get(name) is not None]
+        lines.append(f"- {LEVEL_NAMES.get(level, level)}({entry['n']}명): " + ", ".join(parts))
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=2)
+def _calculator_script(path: str, mtime: float) -> str:
+    table = CohortAnalytics.load(path).calculator_table()
+    return f"<script>window.PAPS_COHORT_PERCENTILES = {json.dumps(table, ensure_ascii=False)};</script>"
+
+
+def calculator_percentiles_html(path=DEFAULT_SNAPSHOT_PATH) -> str:
+    """계산기에 넣을 지역 집단 총점 누적표 스크립트 (스냅샷이 없으면 빈 문자열)"""
+    path = Path(path)
+    if not path.exists():
+        return ""
+    return _calculator_script(str(path), path.stat().st_mtime)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="집단 내 위치 분석")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="결과 저장소로 히스토그램 스냅샷 생성")
+    build.add_argument("--db", default=None, help="결과 저장소 DB 경로")
+    build.add_argument("--out", default=str(DEFAULT_SNAPSHOT_PATH))
+    build.add_argument("--date", default=None, help="특정 회차만 (기본: 학생별 최신 회차)")
+    show = sub.add_parser("show", help="학급 분포 출력")
+    show.add_argument("--snapshot", default=str(DEFAULT_SNAPSHOT_PATH))
+    show.add_argument("--school", required=True)
+    show.add_argument("--class", dest="class_name", required=True)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from results_store import DEFAULT_DB_PATH, ResultsStore
+        with ResultsStore(args.db or DEFAULT_DB_PATH) as store:
+            analytics = CohortAnalytics.from_store(store, args.date)
+        analytics.save(args.out)
+        print(f"✅ {len(analytics)}개 집단 히스토그램 저장: {args.out}")
+    else:
+        analytics = CohortAnalytics.load(args.snapshot)
+        key = ('class', args.school, args.class_name)
+        for row in ROWS:
+            dist = analytics.distribution(key, row)
+            if dist:
+                print(f"{row}: {dist['n']}명, 평균 {dist['mean']:.1f} (표준편차 {dist['std']:.1f}), "
+                      f"중앙값 {dist['p50']}, 사분위 {dist['p25']}~{dist['p75']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,290 @@
-import pandas as pd
+"""
+평가기준 빌드 스크립트
+paps_criteria.xlsx → paps_data.js 변환
+
+- 원본 해시가 이전 빌드와 같으면 아무 작업도 하지 않음 (--force로 강제)
+- 열 단위(벡터화) 변환
+- 학생군/종목별 기록 구간이 정렬·비중첩·무간격인지 검증 (정렬 기반 O(n log n))
+- 검증에 실패하면 기존 산출물을 그대로 두고 종료 코드 1로 끝남
+- 검토를 거친 알려진 데이터 문제는 criteria_exceptions.json에 (학생군, 종목, 기록 구간, 문제 종류)로
+  등록하면 경고로만 출력 (더 이상 해당하지 않는 항목도 경고)
+- 산출물은 임시 파일에 쓴 뒤 원자적으로 교체
+- --version을 주면 학년도별 기준으로 static/criteria/paps_data_<버전>.js에 빌드하고
+  criteria_versions.json에 등록 (기존 버전 파일은 그대로 유지)
+
+사용 예:
+    python convert_excel.py [--source paps_criteria.xlsx] [--output paps_data.js] [--force]
+    python convert_excel.py --source 2025_기준.xlsx --version 2025 --effective-from 2025-03-01
+(엑셀 읽기에는 openpyxl이 필요합니다)
+"""
+import argparse
+import hashlib
 import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent
+DEFAULT_SOURCE = ROOT / 'paps_criteria.xlsx'
+DEFAULT_OUTPUT = ROOT / 'paps_data.js'
+VERSIONS_DIR = ROOT / 'static' / 'criteria'  # 계산기가 정적 파일로 내려받음
+VERSIONS_PATH = ROOT / 'criteria_versions.json'
+EXCEPTIONS_PATH = ROOT / 'criteria_exceptions.json'
+
+KEY_COLUMNS = ['학교과정', '학년', '성별', '체력요인', '평가종목']
+SOURCE_COLUMNS = KEY_COLUMNS + ['기록 구간', '등급', '점수']
+OUTPUT_FIELDS = ['체력요인', '평가종목', '학년', '성별', '학교과정', '기록', '등급', '점수']
+
+# 부동소수 비교 허용 오차
+_EPS = 1e-9
+
+
+class CriteriaValidationError(ValueError):
+    """평가기준 시트 검증 실패 (problems에 행 단위 문제 목록)"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__(f"평가기준 검증 실패: {len(problems)}건")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path(output: Path) -> Path:
+    return output.with_name(output.stem + '.manifest.json')
+
+
+def is_up_to_date(source_hash: str, output: Path) -> bool:
+    """원본 해시와 산출물 해시가 모두 이전 빌드와 같은지 확인"""
+    manifest_file = manifest_path(output)
+    if not output.exists() or not manifest_file.exists():
+        return False
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return False
+    return (manifest.get('source_sha256') == source_hash and
+            manifest.get('output_sha256') == file_sha256(output))
+
+
+def read_source(source: Path) -> pd.DataFrame:
+    try:
+        import python_calamine  # noqa: F401  (설치되어 있으면 더 빠른 엔진 사용)
+        engine = 'calamine'
+    except ImportError:
+        engine = None
+    df = pd.read_excel(source, engine=engine, dtype={'학년': str, '등급': str})
+    missing = [c for c in SOURCE_COLUMNS if c not in df.columns]
+    if missing:
+        raise CriteriaValidationError([f"필수 열이 없습니다: {', '.join(missing)}"])
+    return df[SOURCE_COLUMNS]
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """열 단위 정규화: 문자열 공백 제거, 기록 구간 → 최소/최대 숫자 열"""
+    out = pd.DataFrame({col: df[col].astype(str).str.strip() for col in KEY_COLUMNS})
+    out['기록'] = df['기록 구간'].astype(str).str.strip()
+    out['등급'] = df['등급'].astype(str).str.strip()
+    out['점수'] = pd.to_numeric(df['점수'], errors='coerce')
+    bounds = out['기록'].str.split('~', n=1, expand=True).reindex(columns=[0, 1])
+    low_text = bounds[0].str.strip()
+    high_text = bounds[1].str.strip()
+    out['min'] = pd.to_numeric(low_text, errors='coerce')
+    out['max'] = pd.to_numeric(high_text, errors='coerce')
+    # 기록 측정 단위 (소수 자릿수): "9.31" → 2, "94.0" → 0
+    out['decimals'] = np.maximum(_decimals(low_text), _decimals(high_text))
+    return out
+
+
+def _decimals(text: pd.Series) -> pd.Series:
+    fraction = text.fillna('').str.split('.', n=1).str[1].fillna('').str.rstrip('0')
+    return fraction.str.len()
+
+
+def _row_label(df: pd.DataFrame, idx) -> str:
+    row = df.loc[idx]
+    return (f"{idx + 2}행 {row['학교과정']} {row['학년']} {row['성별']} "
+            f"{row['체력요인']}/{row['평가종목']} '{row['기록']}'")
+
 
-# 엑셀 파일 읽기
-df = pd.read_excel('paps_criteria.xlsx')
-
-# JSON 형식으로 변환
-data = {
-    "체력요인": df['체력요인'].unique().tolist(),
-    "평가기준": []
-}
-
-# 각 기준을 JSON 객체로 변환
-for _, row in df.iterrows():
-    criteria = {
-        "체력요인": row['체력요인'],
-        "평가종목": row['평가종목'],
-        "학년": str(row['학년']),
-        "성별": row['성별'],
-        "학교과정": row['학교과정'],
-        "기록": row['기록 구간'],
-        "등급": str(row['등급']),
-        "점수": int(row['점수'])
+def _check(df: pd.DataFrame) -> List[Tuple[int, str, str]]:
+    """정규화된 기준표 검증, (행, 문제 종류, 설명) 목록"""
+    problems = []
+    for idx in df.index[(df[KEY_COLUMNS] == '').any(axis=1) | df[KEY_COLUMNS].isin(['nan']).any(axis=1)]:
+        problems.append((idx, '빈 값', "학생군/종목 값이 비어 있음"))
+    for idx in df.index[df['min'].isna() | df['max'].isna()]:
+        problems.append((idx, '형식', "기록 구간 형식 오류 ('최소 ~ 최대' 필요)"))
+    for idx in df.index[df['점수'].isna() | (df['점수'] % 1 != 0)]:
+        problems.append((idx, '점수', "점수가 정수가 아님"))
+    for idx in df.index[df['min'] > df['max'] + _EPS]:
+        problems.append((idx, '역전', "최소값이 최대값보다 큼"))
+    if problems:
+        return problems
+
+    # 학생군/종목별로 최소값 정렬 후 인접 구간 비교 (O(n log n))
+    ordered = df.sort_values(KEY_COLUMNS + ['min', 'max'], kind='mergesort')
+    groups = ordered.groupby(KEY_COLUMNS, sort=False)
+    prev_max = groups['max'].shift()
+    # 같은 학생군/종목 안에서 가장 세밀한 측정 단위를 허용 간격으로 사용
+    step = 10.0 ** -groups['decimals'].transform('max')
+    distance = ordered['min'] - prev_max
+    has_prev = prev_max.notna()
+    for idx in ordered.index[has_prev & (distance <= _EPS)]:
+        problems.append((idx, '겹침', f"이전 구간(~{prev_max[idx]:g})과 겹침"))
+    for idx in ordered.index[has_prev & (distance > step + _EPS)]:
+        problems.append((idx, '빈 구간', f"이전 구간(~{prev_max[idx]:g})과의 사이에 빈 구간"))
+    return problems
+
+
+def load_exceptions(path: Path = EXCEPTIONS_PATH) -> List[Dict]:
+    """검토된 알려진 데이터 문제 목록 (파일이 없으면 빈 목록)"""
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding='utf-8')).get('exceptions', [])
+
+
+def _exception_key(values: Dict, kind: str) -> Tuple[str, ...]:
+    return tuple(str(values.get(c, '')).strip() for c in KEY_COLUMNS + ['기록']) + (kind,)
+
+
+def validate(df: pd.DataFrame, exceptions: Optional[List[Dict]] = None) -> Tuple[List[str], List[str]]:
+    """정규화된 기준표 검증 → (문제 목록, 경고 목록), 엑셀 행 번호 기준
+
+    exceptions에 등록된 문제는 경고로 옮기고, 기준표에 더 이상 없는 등록 항목도 경고로 알림
+    """
+    known = {_exception_key(e, e.get('문제', '')): e for e in exceptions or []}
+    problems, warnings = [], []
+    matched = set()
+    for idx, kind, message in _check(df):
+        key = _exception_key(df.loc[idx], kind)
+        if key in known:
+            matched.add(key)
+            warnings.append(f"{_row_label(df, idx)}: {message} (알려진 문제: {known[key].get('사유', '')})")
+        else:
+            problems.append(f"{_row_label(df, idx)}: {message}")
+    for key in known.keys() - matched:
+        warnings.append(f"{' '.join(key[:5])} '{key[5]}' {key[6]}: 등록된 예외에 해당하는 문제가 없음 (목록에서 삭제)")
+    return problems, warnings
+
+
+def to_paps_data(df: pd.DataFrame) -> Dict:
+    """계산기가 사용하는 PAPS_DATA 구조 (원본 행 순서 유지)"""
+    records = df.assign(점수=df['점수'].astype(int))[OUTPUT_FIELDS].to_dict('records')
+    return {
+        "체력요인": df['체력요인'].unique().tolist(),
+        "평가기준": records,
+    }
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def build(source: Path = DEFAULT_SOURCE, output: Path = DEFAULT_OUTPUT, force: bool = False,
+          exceptions: Optional[List[Dict]] = None) -> Dict:
+    """기준표 빌드. 결과 요약 반환, 검증 실패 시 CriteriaValidationError
+
+    exceptions: 알려진 데이터 문제 (기본: criteria_exceptions.json)
+    """
+    started = time.perf_counter()
+    source_hash = file_sha256(source)
+    if not force and is_up_to_date(source_hash, output):
+        return {"status": "up-to-date", "elapsed_s": time.perf_counter() - started}
+
+    df = normalize(read_source(source))
+    problems, warnings = validate(df, load_exceptions() if exceptions is None else exceptions)
+    if problems:
+        raise CriteriaValidationError(problems)
+
+    data = to_paps_data(df)
+    text = 'const PAPS_DATA = ' + json.dumps(data, ensure_ascii=False, indent=2) + ';'
+    _write_atomic(output, text)
+    manifest = {
+        "source": source.name,
+        "source_sha256": source_hash,
+        "output_sha256": hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        "rows": len(data["평가기준"]),
+        "cohort_events": int(df.groupby(KEY_COLUMNS).ngroups),
+        "built_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
     }
-    data["평가기준"].append(criteria)
+    _write_atomic(manifest_path(output), json.dumps(manifest, ensure_ascii=False, indent=2))
+    return {"status": "built", "rows": manifest["rows"], "warnings": warnings,
+            "elapsed_s": time.perf_counter() - started}
+
+
+def register_version(version: str, output: Path, effective_from: str, label: str = "") -> None:
+    """criteria_versions.json에 버전 추가/갱신 (같은 버전은 덮어씀)"""
+    registry = {"versions": []}
+    if VERSIONS_PATH.exists():
+        registry = json.loads(VERSIONS_PATH.read_text(encoding='utf-8'))
+    entries = [v for v in registry["versions"] if v["version"] != version]
+    entries.append({
+        "version": version,
+        "label": label or f"{version}학년도 평가기준",
+        "effective_from": effective_from,
+        "path": output.resolve().relative_to(ROOT.resolve()).as_posix(),
+    })
+    entries.sort(key=lambda v: v.get("effective_from") or "")
+    registry["versions"] = entries
+    _write_atomic(VERSIONS_PATH, json.dumps(registry, ensure_ascii=False, indent=2) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="평가기준 엑셀 → paps_data.js 빌드")
+    parser.add_argument('--source', type=Path, default=DEFAULT_SOURCE)
+    parser.add_argument('--output', type=Path, default=None,
+                        help="산출물 경로 (기본: paps_data.js, --version 지정 시 static/criteria/paps_data_<버전>.js)")
+    parser.add_argument('--force', action='store_true', help="원본이 바뀌지 않았어도 다시 빌드")
+    parser.add_argument('--version', help="학년도별 기준 버전 이름 (예: 2025)")
+    parser.add_argument('--effective-from', help="버전 적용 시작일 YYYY-MM-DD (기본: 해당 학년도 3월 1일)")
+    parser.add_argument('--label', default="", help="계산기에 표시할 버전 이름")
+    args = parser.parse_args()
+
+    if args.output is None:
+        if args.version:
+            VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+            args.output = VERSIONS_DIR / f'paps_data_{args.version}.js'
+        else:
+            args.output = DEFAULT_OUTPUT
+    effective_from = args.effective_from
+    if args.version and not effective_from:
+        if not args.version.isdigit():
+            parser.error("--version이 연도가 아니면 --effective-from이 필요합니다")
+        effective_from = f"{args.version}-03-01"
+
+    try:
+        result = build(args.source, args.output, force=args.force)
+    except CriteriaValidationError as e:
+        print(f"❌ {e} - {args.output.name}은(는) 변경되지 않았습니다.")
+        for problem in e.problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+
+    if result["status"] == "up-to-date":
+        print(f"✅ 변경 없음 ({result['elapsed_s'] * 1000:.0f}ms)")
+    else:
+        print(f"✅ {result['rows']}개 기준 빌드 완료 ({result['elapsed_s'] * 1000:.0f}ms)")
+        for warning in result['warnings']:
+            print(f"  ⚠️ {warning}")
+    if args.version:
+        register_version(args.version, args.output, effective_from, args.label)
+        print(f"✅ {args.version} 버전 등록 ({effective_from}부터 적용)")
+
 
-# JSON 파일로 저장
-with open('paps_data.js', 'w', encoding='utf-8') as f:
-    f.write('const PAPS_DATA = ' + json.dumps(data, ensure_ascii=False, indent=2) + ';')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,413 @@
+"""
+평가기준 경계값 전수 점검 + 채점 경로별 처리량 측정
+모든 학생군/평가종목의 기록 구간마다 경계값(시작/끝), 중간값, 구간 사이 값(예: "94.0 ~ 99.0"과
+"100.0 ~ 150.0" 사이의 99.5), 전체 범위 밖 값을 만들어 채점 경로들이 같은 결과를 내는지 확인
+
+채점 경로 (기준: 계산기 app.js calculateResult와 같은 규칙을 옮긴 js_find)
+- js_find: 종목별 구간을 데이터 순서대로 두고 기록 >= min && 기록 <= max인 첫 구간 (app.js와 동일)
+- criteria_index: CriteriaIndex.score (이분 탐색, 챗봇/일괄 보고서/결과 저장소가 사용)
+- vector: grid_scoring.VectorScorer.score_records (np.searchsorted, 학급 표 입력이 사용)
+- node: Node.js로 app.js의 calculateResult를 그대로 실행 (입력 요소와 화면 갱신 함수만 대체, node가 있을 때만)
+- next_grade: 숫자 등급 2~5 기록의 다음 등급 목표 기록 (챗봇 _get_next_grade_info가 사용하는
+  CriteriaIndex.next_grade), 목표 기록을 계산기 규칙(js_find)으로 다시 채점하면 한 단계 위 등급이어야 함
+
+구간이 겹치는 종목은 데이터 순서의 첫 구간(js_find)과 시작값 기준 마지막 구간(이분 탐색)이
+달라질 수 있으므로 불일치 예시에 겹침 여부를 함께 표시
+
+사용 예:
+    python criteria_sweep.py
+    python criteria_sweep.py --version 2025 --node /usr/bin/node
+    python criteria_sweep.py --json sweep.json --min-time 1
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from paps_criteria import (
+    PAPS_DATA_PATH, CriteriaIndex, CriteriaKey, criteria_path, load_paps_data, make_key,
+)
+
+try:
+    import numpy as np
+    from grid_scoring import VectorScorer
+except ImportError:
+    np = None
+    VectorScorer = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_JS_PATH = os.path.join(ROOT, 'app.js')
+
+# (점수, 등급) - 계산기 결과 형식
+Result = Tuple[int, str]
+NO_MATCH: Result = (0, '-')
+
+
+def _js_float(text: str) -> float:
+    """parseFloat: 앞부분의 숫자만 읽고, 없으면 NaN"""
+    match = re.match(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?', text)
+    return float(match.group(0)) if match else float('nan')
+
+
+def _js_int(value) -> int:
+    """parseInt(값) || 0"""
+    match = re.match(r'\s*[+-]?\d+', str(value))
+    return int(match.group(0)) if match else 0
+
+
+def js_ranges(criteria: List[Dict]) -> Dict[CriteriaKey, List[Tuple[float, float, Result]]]:
+    """app.js buildCriteriaIndex와 같은 종목별 구간 목록 (데이터 순서 유지)"""
+    index: Dict[CriteriaKey, List[Tuple[float, float, Result]]] = {}
+    for item in criteria:
+        if not item.get('기록'):
+            continue
+        key = make_key(*(item.get(f) or '' for f in ('학교과정', '학년', '성별', '체력요인', '평가종목')))
+        parts = str(item['기록']).split('~')
+        low = _js_float(parts[0])
+        high = _js_float(parts[1]) if len(parts) > 1 else float('nan')
+        grade = item.get('등급')
+        index.setdefault(key, []).append(
+            (low, high, (_js_int(item.get('점수')), str(grade) if grade not in (None, '') else '-'))
+        )
+    return index
+
+
+def js_find(ranges: List[Tuple[float, float, Result]], record: float) -> Result:
+    """app.js calculateResult: 데이터 순서의 첫 일치 구간"""
+    for low, high, result in ranges:
+        if low <= record <= high:
+            return result
+    return NO_MATCH
+
+
+def build_probes(ranges: List[Tuple[float, float, Result]]) -> List[float]:
+    """구간 경계/중간값, 구간 사이 값, 전체 범위 밖 값"""
+    spans = sorted((low, high) for low, high, _ in ranges if low == low and high == high)
+    if not spans:
+        return []
+    probes = {spans[0][0] - 1, spans[-1][1] + 1}
+    for low, high in spans:
+        probes.update((low, high, (low + high) / 2))
+    for (_, prev_high), (next_low, _) in zip(spans, spans[1:]):
+        if next_low > prev_high:
+            probes.add((prev_high + next_low) / 2)
+    return sorted(probes)
+
+
+def _overlapping(ranges: List[Tuple[float, float, Result]], record: float) -> bool:
+    return sum(1 for low, high, _ in ranges if low <= record <= high) > 1
+
+
+class Sweep:
+    """경계값 목록과 기준 결과"""
+
+    def __init__(self, criteria: List[Dict]):
+        self.ranges = js_ranges(criteria)
+        self.index = CriteriaIndex(criteria)
+        self.probes: Dict[CriteriaKey, List[float]] = {
+            key: build_probes(ranges) for key, ranges in self.ranges.items()
+        }
+        self.expected: Dict[CriteriaKey, List[Result]] = {
+            key: [js_find(self.ranges[key], x) for x in probes] for key, probes in self.probes.items()
+        }
+
+    @property
+    def total(self) -> int:
+        return sum(len(p) for p in self.probes.values())
+
+    def data_findings(self) -> Dict:
+        """구간 사이 값(0점 처리)과 두 구간 이상에 걸친 값"""
+        gaps = overlaps = 0
+        gap_examples: List[str] = []
+        for key, probes in self.probes.items():
+            ranges = self.ranges[key]
+            lowest = min(low for low, _, _ in ranges)
+            highest = max(high for _, high, _ in ranges)
+            for x, result in zip(probes, self.expected[key]):
+                if result == NO_MATCH and lowest < x < highest:
+                    gaps += 1
+                    if len(gap_examples) < 5:
+                        gap_examples.append(f"{'/'.join(key)} {x:g}")
+                if _overlapping(ranges, x):
+                    overlaps += 1
+        return {'gap_probes': gaps, 'gap_examples': gap_examples, 'overlap_probes': overlaps}
+
+    # ---- 채점 경로 ----
+
+    def run_js_find(self) -> Dict[CriteriaKey, List[Result]]:
+        return {key: [js_find(self.ranges[key], x) for x in probes] for key, probes in self.probes.items()}
+
+    def run_criteria_index(self) -> Dict[CriteriaKey, List[Result]]:
+        out = {}
+        score = self.index.score
+        for key, probes in self.probes.items():
+            results = []
+            for x in probes:
+                r = score(*key, x)
+                results.append((r['점수'], r['등급']))
+            out[key] = results
+        return out
+
+    def vector_runner(self) -> Optional[Callable[[], Dict[CriteriaKey, List[Result]]]]:
+        if VectorScorer is None:
+            return None
+        scorer = VectorScorer(self.index)
+        arrays = {key: np.array(probes, dtype=np.float64) for key, probes in self.probes.items()}
+        for key in arrays:
+            scorer.score_records(key, arrays[key][:1])  # 배열 캐시 채우기
+
+        def run() -> Dict[CriteriaKey, List[Result]]:
+            out = {}
+            for key, records in arrays.items():
+                scores, grades = scorer.score_records(key, records)
+                out[key] = list(zip(scores.tolist(), grades.tolist()))
+            return out
+        return run
+
+
+def compare(sweep: Sweep, got: Dict[CriteriaKey, List[Result]], limit: int = 5) -> Dict:
+    """기준(js_find)과 다른 결과 수와 예시"""
+    mismatches = 0
+    examples = []
+    for key, expected in sweep.expected.items():
+        for x, want, have in zip(sweep.probes[key], expected, got.get(key, [])):
+            if tuple(have) != want:
+                mismatches += 1
+                if len(examples) < limit:
+                    overlap = " (구간 겹침)" if _overlapping(sweep.ranges[key], x) else ""
+                    examples.append(f"{'/'.join(key)} 기록 {x:g}: 기준 {want}, 결과 {tuple(have)}{overlap}")
+    return {'mismatches': mismatches, 'examples': examples}
+
+
+def measure(run: Callable[[], object], lookups: int, min_time: float) -> float:
+    """min_time 이상 반복 실행한 초당 조회 수"""
+    repeats = 0
+    started = time.perf_counter()
+    while True:
+        run()
+        repeats += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return lookups * repeats / elapsed
+
+
+# ---- 다음 등급 ----
+
+def _next_grade_problem(ranges: List[Tuple[float, float, Result]], record: float, grade: str,
+                        info: Optional[Dict]) -> Optional[str]:
+    """next_grade 결과를 계산기 규칙으로 확인 (문제가 없으면 None)"""
+    target_grade = str(int(grade) - 1) if grade.isdigit() and int(grade) > 1 else None
+    if target_grade is None or not any(g.strip() == target_grade for _, _, (_, g) in ranges):
+        return None if info is None else f"다음 등급이 없어야 하는데 {info}"
+    if info is None:
+        return f"{target_grade}등급 목표가 없음"
+    if str(info['next_grade']) != target_grade:
+        return f"다음 등급 {info['next_grade']} (기대 {target_grade})"
+    rescored = js_find(ranges, info['target_record'])[1]
+    if rescored != target_grade:
+        return f"목표 기록 {info['target_record']:g}의 등급이 {rescored}"
+    if abs(abs(info['target_record'] - record) - info['improvement_needed']) > 1e-9:
+        return f"개선량 {info['improvement_needed']:g}이 목표와 기록의 차이와 다름"
+    return None
+
+
+def check_next_grade(sweep: Sweep, limit: int = 5) -> Dict:
+    """CriteriaIndex.next_grade가 한 단계 위 등급 목표를 내고, 목표 기록이 실제로 그 등급인지"""
+    checked = mismatches = 0
+    examples = []
+    for key, probes in sweep.probes.items():
+        ranges = sweep.ranges[key]
+        for x, (_, grade) in zip(probes, sweep.expected[key]):
+            checked += 1
+            problem = _next_grade_problem(ranges, x, grade, sweep.index.next_grade(*key, x))
+            if problem:
+                mismatches += 1
+                if len(examples) < limit:
+                    examples.append(f"{'/'.join(key)} 기록 {x:g} ({grade}): {problem}")
+    return {'checked': checked, 'mismatches': mismatches, 'examples': examples}
+
+
+# ---- Node.js로 app.js 실행 ----
+
+# app.js calculateResult가 읽는 입력 요소와 호출하는 화면 갱신 함수만 대체
+_NODE_DOM = """
+const fields = { 학교과정: { value: '' }, 학년: { value: '' }, 성별: { value: '' } };
+const inputs = { 평가종목: { value: '' }, 기록: { value: '' } };
+const document = {
+    getElementById: id => fields[id] || null,
+    querySelector: selector => inputs[selector.slice(1, selector.indexOf('['))] || null,
+};
+const window = {};
+console.log = console.warn = () => {};
+let currentResults = {};
+function updateResultDisplay() {}
+function updateChart() {}
+function updateTotalResult() {}
+"""
+
+_NODE_DRIVER = """
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const run = () => input.probes.map(([key, x]) => {
+    const factor = key[3];
+    [fields.학교과정.value, fields.학년.value, fields.성별.value] = key;
+    inputs.평가종목.value = key[4];
+    inputs.기록.value = String(x);
+    calculateResult(factor);
+    const result = currentResults[factor];
+    return [result.점수, result.등급];
+});
+const results = run();
+let repeats = 0;
+const started = process.hrtime();
+let elapsed = 0;
+while (elapsed < input.min_time) {
+    run();
+    repeats += 1;
+    const [s, ns] = process.hrtime(started);
+    elapsed = s + ns / 1e9;
+}
+process.stdout.write(JSON.stringify({results, per_sec: input.probes.length * repeats / elapsed}));
+"""
+
+
+# calculateResult가 호출하는 app.js 함수와 전역 (DOM 대체는 _NODE_DOM)
+_APP_JS_GLOBALS = ('CRITERIA_CACHE_SIZE', 'criteriaCache', 'fetchedCriteria', 'pendingCriteria')
+_APP_JS_FUNCTIONS = (
+    'criteriaKey', 'selectedCriteriaVersion', 'loadCriteriaData', 'isCriteriaAvailable',
+    'fetchCriteriaVersion', 'buildCriteriaIndex', 'getCriteriaIndex', 'isInRange', 'calculateResult',
+)
+
+
+def _js_global(source: str, name: str) -> str:
+    """app.js에서 한 줄짜리 최상위 const/let 선언 하나를 그대로 추출"""
+    match = re.search(rf'^(?:const|let) {name} = .*;', source, re.M)
+    if not match:
+        raise ValueError(f"app.js에서 {name} 선언을 찾을 수 없습니다")
+    return match.group(0)
+
+
+def _js_function(source: str, name: str) -> str:
+    """app.js에서 최상위 함수 선언 하나를 그대로 추출"""
+    match = re.search(rf'^function {name}\(.*?^}}', source, re.S | re.M)
+    if not match:
+        raise ValueError(f"app.js에서 {name} 함수를 찾을 수 없습니다")
+    return match.group(0)
+
+
+def run_node(node: str, data_path, sweep: Sweep, min_time: float) -> Tuple[Dict[CriteriaKey, List[Result]], float]:
+    """app.js의 calculateResult를 Node.js로 실행한 결과와 초당 조회 수"""
+    with open(APP_JS_PATH, 'r', encoding='utf-8') as f:
+        app_js = f.read()
+    with open(data_path, 'r', encoding='utf-8') as f:
+        data_js = f.read()
+    if 'PAPS_DATA' not in data_js:  # 버전별 기준 파일은 JSON
+        data_js = f"const PAPS_DATA = {data_js};"
+    script = "\n".join([
+        data_js,
+        _NODE_DOM,
+        *(_js_global(app_js, name) for name in _APP_JS_GLOBALS),
+        *(_js_function(app_js, name) for name in _APP_JS_FUNCTIONS),
+        _NODE_DRIVER,
+    ])
+    keys = list(sweep.probes)
+    probes = [[list(key), x] for key in keys for x in sweep.probes[key]]
+    with tempfile.NamedTemporaryFile('w', suffix='.js', encoding='utf-8', delete=False) as f:
+        f.write(script)
+        script_path = f.name
+    try:
+        completed = subprocess.run(
+            [node, script_path], input=json.dumps({'probes': probes, 'min_time': min_time}),
+            capture_output=True, text=True, encoding='utf-8', check=True,
+        )
+    finally:
+        os.unlink(script_path)
+    output = json.loads(completed.stdout)
+    flat = iter(output['results'])
+    results = {key: [tuple(next(flat)) for _ in sweep.probes[key]] for key in keys}
+    return results, output['per_sec']
+
+
+def find_node(explicit: Optional[str]) -> Optional[str]:
+    return explicit or os.environ.get('NODE') or shutil.which('node')
+
+
+def run_sweep(data_path, node: Optional[str] = None, min_time: float = 0.3) -> Dict:
+    """전수 점검 실행 후 경로별 불일치/처리량 보고서"""
+    data = load_paps_data(data_path)
+    sweep = Sweep(data.get('평가기준', []))
+    paths: Dict[str, Dict] = {}
+
+    runners = {'js_find': sweep.run_js_find, 'criteria_index': sweep.run_criteria_index}
+    vector = sweep.vector_runner()
+    if vector is not None:
+        runners['vector'] = vector
+    for name, run in runners.items():
+        paths[name] = compare(sweep, run())
+        paths[name]['lookups_per_sec'] = measure(run, sweep.total, min_time)
+
+    if node:
+        try:
+            results, per_sec = run_node(node, data_path, sweep, min_time)
+            paths['node'] = compare(sweep, results)
+            paths['node']['lookups_per_sec'] = per_sec
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            print(f"Node.js 실행 실패: {getattr(e, 'stderr', None) or e}")
+
+    return {
+        'data': str(data_path),
+        'keys': len(sweep.probes),
+        'probes': sweep.total,
+        'findings': sweep.data_findings(),
+        'paths': paths,
+        'next_grade': check_next_grade(sweep),
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"=== 평가기준 경계값 점검: {report['data']} ===")
+    print(f"학생군/종목 {report['keys']}개, 점검 기록 {report['probes']}개")
+    findings = report['findings']
+    print(f"구간 사이 값(0점 처리) {findings['gap_probes']}개, 구간 겹침 {findings['overlap_probes']}개")
+    for example in findings['gap_examples']:
+        print(f"  - {example}")
+    for name, path in report['paths'].items():
+        print(f"[{name}] 불일치 {path['mismatches']}개, {path['lookups_per_sec']:,.0f} 조회/초")
+        for example in path['examples']:
+            print(f"  - {example}")
+    next_grade = report['next_grade']
+    print(f"[next_grade] {next_grade['checked']}개 중 불일치 {next_grade['mismatches']}개")
+    for example in next_grade['examples']:
+        print(f"  - {example}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="평가기준 경계값 전수 점검 및 채점 경로별 처리량 측정")
+    parser.add_argument('--version', help="평가기준 버전 (기본: 내장 paps_data.js)")
+    parser.add_argument('--node', help="Node.js 실행 파일 (기본: NODE 환경변수 또는 PATH의 node)")
+    parser.add_argument('--no-node', action='store_true', help="app.js를 Node.js로 실행하지 않음")
+    parser.add_argument('--min-time', type=float, default=0.3, help="경로별 처리량 측정 최소 시간(초)")
+    parser.add_argument('--json', help="보고서를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    data_path = criteria_path(args.version) if args.version else PAPS_DATA_PATH
+    node = None if args.no_node else find_node(args.node)
+    if node is None and not args.no_node:
+        print("node를 찾을 수 없어 app.js 직접 실행은 건너뜁니다 (--node로 지정)")
+    report = run_sweep(data_path, node=node, min_time=args.min_time)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"보고서 저장: {args.json}")
+
+    failed = report['next_grade']['mismatches'] + sum(p['mismatches'] for p in report['paths'].values())
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
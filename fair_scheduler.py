@@ -0,0 +1,308 @@
+"""
+학교/학급(테넌트) 간 공정한 LLM 호출 스케줄러
+하나의 배포가 같은 API 키로 여러 학교를 서비스할 때 한 학급이 몰아서 호출해도
+다른 학급의 대기 시간이 예측 가능하도록 완성 호출 앞에서 순서를 정함
+
+- 테넌트별 토큰 버킷 (TENANT_RATE_PER_MINUTE를 설정했을 때만): 분당 요청 수(+버스트)를 넘으면
+  토큰이 찰 때까지 대기열에서 보류
+- 가중 공정 대기열(WFQ): 동시 호출 슬롯이 비면 가상 종료 시각이 가장 빠른 요청부터 실행
+  (테넌트 가중치가 클수록 같은 시간에 더 많은 몫)
+- 테넌트별 대기열 길이, 대기 시간(p50/p95/max), 토큰 부족으로 보류된 횟수 지표
+- 테넌트 이름은 요청 주소에서 오므로 오래 쉰 테넌트는 정리하고 개수에 상한을 둠
+  (TENANTS로 허용 목록을 주면 목록에 없는 이름은 default로 계산)
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+DEFAULT_TENANT = "default"
+OVERFLOW_TENANT = "overflow"  # 테넌트 수 상한을 넘은 새 이름들이 함께 쓰는 몫
+
+
+@dataclass
+class SchedulerConfig:
+    """스케줄러 설정 (단위: 초, 분당 요청 수)"""
+    max_concurrent: int = 8             # 프로세스 전체 동시 완성 호출 수
+    tenant_rate: Optional[float] = None  # 테넌트별 분당 요청 수 (None이면 제한 없이 공정 순서만)
+    tenant_burst: int = 10              # 테넌트별 버킷 크기 (몰아서 보낼 수 있는 요청 수)
+    max_wait: float = 60.0              # 대기열에서 기다릴 수 있는 최대 시간
+    tenant_idle: float = 600.0          # 대기 요청 없이 이 시간이 지난 테넌트는 정리
+    max_tenants: int = 500              # 동시에 추적하는 테넌트 수 상한
+    weights: Dict[str, float] = field(default_factory=dict)  # 테넌트별 가중치 (기본 1)
+    allowed: Optional[Set[str]] = None  # 허용 테넌트 (None이면 모든 이름 허용)
+
+    @classmethod
+    def from_settings(cls, get_setting: Callable[[str], Optional[str]]) -> "SchedulerConfig":
+        """Secrets/환경변수 조회 함수로부터 설정 생성 (없는 값은 기본값 사용)"""
+        config = cls()
+        numeric = {
+            "SCHEDULER_MAX_CONCURRENT": ("max_concurrent", int),
+            "TENANT_RATE_PER_MINUTE": ("tenant_rate", float),
+            "TENANT_BURST": ("tenant_burst", int),
+            "SCHEDULER_MAX_WAIT": ("max_wait", float),
+            "TENANT_IDLE_SECONDS": ("tenant_idle", float),
+            "MAX_TENANTS": ("max_tenants", int),
+        }
+        for name, (attr, cast) in numeric.items():
+            value = get_setting(name)
+            if value not in (None, ""):
+                try:
+                    setattr(config, attr, cast(value))
+                except (TypeError, ValueError):
+                    print(f"스케줄러 설정 무시: {name}={value!r}")
+        # TENANT_WEIGHTS="한빛중/3-2=2,한빛중/3-3=0.5"
+        for item in (get_setting("TENANT_WEIGHTS") or "").split(","):
+            tenant, sep, weight = item.rpartition("=")
+            if not sep or not tenant.strip():
+                continue
+            try:
+                config.weights[tenant.strip()] = max(0.01, float(weight))
+            except ValueError:
+                print(f"스케줄러 설정 무시: TENANT_WEIGHTS 항목 {item!r}")
+        # TENANTS="한빛중/3-2,한빛중/3-3"
+        allowed = {name.strip() for name in (get_setting("TENANTS") or "").split(",") if name.strip()}
+        if allowed:
+            config.allowed = allowed | set(config.weights)
+        return config
+
+
+def tenant_key(school: Optional[str] = None, class_name: Optional[str] = None) -> str:
+    """테넌트 이름 (학교/학급, 둘 다 없으면 default)"""
+    parts = [str(p).strip() for p in (school, class_name) if p and str(p).strip()]
+    return "/".join(parts) or DEFAULT_TENANT
+
+
+class QueueTimeoutError(TimeoutError):
+    """대기열에서 max_wait 안에 차례가 오지 않음"""
+
+
+class _Ticket:
+    """대기 중인 요청 하나"""
+    __slots__ = ("tenant", "finish", "seq", "enqueued", "granted")
+
+    def __init__(self, tenant: "_Tenant", finish: float, seq: int, enqueued: float):
+        self.tenant = tenant
+        self.finish = finish
+        self.seq = seq
+        self.enqueued = enqueued
+        self.granted = False
+
+
+class _Tenant:
+    """테넌트 하나의 버킷, 대기열, 지표"""
+    __slots__ = ("name", "weight", "tokens", "updated", "last_seen", "last_finish", "queue",
+                 "submitted", "dispatched", "rejected", "throttled", "max_depth", "waits")
+
+    def __init__(self, name: str, weight: float, burst: int, now: float):
+        self.name = name
+        self.weight = weight
+        self.tokens = float(burst)
+        self.updated = now
+        self.last_seen = now
+        self.last_finish = 0.0
+        self.queue: Deque[_Ticket] = deque()
+        self.submitted = 0
+        self.dispatched = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.max_depth = 0
+        self.waits: Deque[float] = deque(maxlen=100)  # 최근 대기 시간 (초)
+
+    def refill(self, now: float, rate: float, burst: int) -> None:
+        self.tokens = min(float(burst), self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+class FairScheduler:
+    """가중 공정 대기열 + 테넌트별 토큰 버킷 (프로세스 전역 공유)
+
+    테넌트 안에서는 도착 순서, 테넌트 사이에서는 가상 종료 시각 순서로 실행한다.
+    가상 시각은 요청 하나당 1/가중치씩 증가하므로, 오래 쉬던 테넌트는 현재 가상 시각에서
+    다시 시작해 밀린 몫을 한꺼번에 쓰지 못한다 (몰아 쓰기는 버킷 크기로만 허용).
+    """
+
+    def __init__(self, config: SchedulerConfig, clock: Callable[[], float] = time.monotonic):
+        self.config = config
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._tenants: Dict[str, _Tenant] = {}
+        self._virtual_time = 0.0
+        self._seq = 0
+        self._active = 0
+        self._pruned_at = clock()
+
+    @property
+    def _rate(self) -> Optional[float]:
+        rate = self.config.tenant_rate
+        return rate / 60.0 if rate else None
+
+    def _prune(self, now: float) -> None:
+        """대기 요청 없이 오래 쉰 테넌트 정리 (다시 오면 새 버킷/현재 가상 시각에서 시작)"""
+        if now - self._pruned_at < min(60.0, self.config.tenant_idle):
+            return
+        self._pruned_at = now
+        idle = [name for name, t in self._tenants.items()
+                if not t.queue and now - t.last_seen >= self.config.tenant_idle]
+        for name in idle:
+            del self._tenants[name]
+
+    def _tenant(self, name: str, now: float) -> _Tenant:
+        allowed = self.config.allowed
+        if allowed is not None and name not in allowed:
+            name = DEFAULT_TENANT
+        tenant = self._tenants.get(name)
+        if tenant is None:
+            self._prune(now)
+            if len(self._tenants) >= self.config.max_tenants and name != OVERFLOW_TENANT:
+                return self._tenant(OVERFLOW_TENANT, now)
+            weight = self.config.weights.get(name, 1.0)
+            tenant = _Tenant(name, weight, self.config.tenant_burst, now)
+            self._tenants[name] = tenant
+        tenant.last_seen = now
+        return tenant
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """빈 슬롯에 실행할 요청을 배정하고, 토큰 부족으로 남은 요청이 있으면 다음 충전까지 시간 반환"""
+        next_refill = None
+        rate = self._rate
+        while self._active < self.config.max_concurrent:
+            best: Optional[_Ticket] = None
+            for tenant in self._tenants.values():
+                if not tenant.queue:
+                    continue
+                if rate is not None:
+                    tenant.refill(now, rate, self.config.tenant_burst)
+                    if tenant.tokens < 1:
+                        wait = (1 - tenant.tokens) / rate
+                        if next_refill is None or wait < next_refill:
+                            next_refill = wait
+                        continue
+                head = tenant.queue[0]
+                if best is None or (head.finish, head.seq) < (best.finish, best.seq):
+                    best = head
+            if best is None:
+                break
+            tenant = best.tenant
+            tenant.queue.popleft()
+            if rate is not None:
+                tenant.tokens -= 1
+            tenant.dispatched += 1
+            tenant.waits.append(now - best.enqueued)
+            self._virtual_time = max(self._virtual_time, best.finish - 1.0 / tenant.weight)
+            best.granted = True
+            self._active += 1
+        return next_refill
+
+    def _acquire(self, tenant_name: str) -> None:
+        with self._cond:
+            now = self._clock()
+            tenant = self._tenant(tenant_name, now)
+            start = max(self._virtual_time, tenant.last_finish)
+            tenant.last_finish = start + 1.0 / tenant.weight
+            self._seq += 1
+            ticket = _Ticket(tenant, tenant.last_finish, self._seq, now)
+            tenant.queue.append(ticket)
+            tenant.submitted += 1
+            tenant.max_depth = max(tenant.max_depth, len(tenant.queue))
+            deadline = now + self.config.max_wait
+
+            throttled = False
+            while True:
+                active = self._active
+                next_refill = self._dispatch(now)
+                if self._active - active > (1 if ticket.granted else 0):
+                    # 다른 테넌트의 요청도 배정되었으면 그 스레드를 깨움
+                    self._cond.notify_all()
+                if ticket.granted:
+                    break
+                if not throttled and self._rate is not None and tenant.tokens < 1:
+                    throttled = True
+                    tenant.throttled += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    tenant.queue.remove(ticket)
+                    tenant.rejected += 1
+                    # 취소한 요청의 몫은 돌려줌 (뒤 요청이 불필요하게 밀리지 않도록)
+                    tenant.last_finish -= 1.0 / tenant.weight
+                    raise QueueTimeoutError(
+                        f"요청이 많아 {self.config.max_wait:g}초 안에 차례가 오지 않았습니다. "
+                        f"잠시 후 다시 시도해주세요."
+                    )
+                self._cond.wait(min(remaining, next_refill) if next_refill else remaining)
+                now = self._clock()
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._dispatch(self._clock())
+            self._cond.notify_all()
+
+    def run(self, tenant: str, fn: Callable):
+        """tenant 차례가 오면 fn() 실행 (대기 초과 시 QueueTimeoutError)"""
+        self._acquire(tenant or DEFAULT_TENANT)
+        try:
+            return fn()
+        finally:
+            self._release()
+
+    def stats(self) -> Dict:
+        """전체/테넌트별 대기열 지표 (대기 시간 단위: ms)"""
+        with self._cond:
+            tenants = {}
+            for name, tenant in self._tenants.items():
+                waits = list(tenant.waits)
+                tenants[name] = {
+                    "weight": tenant.weight,
+                    "queue_depth": len(tenant.queue),
+                    "max_depth": tenant.max_depth,
+                    "submitted": tenant.submitted,
+                    "dispatched": tenant.dispatched,
+                    "rejected": tenant.rejected,
+                    "throttled": tenant.throttled,
+                    "wait_p50_ms": round(_percentile(waits, 50) * 1000, 1),
+                    "wait_p95_ms": round(_percentile(waits, 95) * 1000, 1),
+                    "wait_max_ms": round(max(waits, default=0.0) * 1000, 1),
+                }
+            return {
+                "active": self._active,
+                "queued": sum(len(t.queue) for t in self._tenants.values()),
+                "tenants": tenants,
+            }
+
+
+_scheduler: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def shared_scheduler(config: SchedulerConfig) -> FairScheduler:
+    """프로세스 전역 스케줄러 (모든 세션/엔드포인트가 같은 API 키 몫을 나눔)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler(config)
+        return _scheduler
+
+
+def configure_scheduler(config: SchedulerConfig) -> FairScheduler:
+    """프로세스 전역 스케줄러를 주어진 설정으로 교체 (일괄 보고서/부하 테스트처럼 앱 설정과
+    다른 몫이 필요한 도구가 챗봇을 만들기 전에 호출)"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = FairScheduler(config)
+        return _scheduler
+
+
+def get_scheduler_stats() -> Dict:
+    """스케줄러 지표 (아직 만들어지지 않았으면 빈 값)"""
+    with _scheduler_lock:
+        scheduler = _scheduler
+    return scheduler.stats() if scheduler is not None else {"active": 0, "queued": 0, "tenants": {}}
@@ -0,0 +1,223 @@
+"""
+학급 표 입력 채점
+교사가 표에 학생별 기록을 입력하면 평가기준 인덱스로 행 전체를 한 번에 채점
+
+- 종목(학생군/평가종목)별 구간 경계를 NumPy 배열로 만들어 두고 np.searchsorted로 한 번에 조회
+  (CriteriaIndex.lookup과 같은 규칙: 시작값이 기록 이하인 마지막 구간, 기록이 그 구간 끝 이하일 때만 일치)
+- 바뀐 행만 다시 채점 (VectorScorer.update, 추가/삭제된 행 반영)
+- 결과를 roster.py와 같은 열 구성의 CSV로 내보내기
+
+사용 예 (명단 CSV 채점 시간 측정):
+    python grid_scoring.py roster.csv [--repeat 100]
+"""
+import argparse
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from paps_criteria import FACTORS, CriteriaIndex, CriteriaKey, make_key
+
+INFO_COLUMNS = ['번호', '이름', '학교과정', '학년', '성별']
+RECORD_COLUMNS = [f'{factor}_기록' for factor in FACTORS]
+EVENT_COLUMNS = [f'{factor}_평가종목' for factor in FACTORS]
+# 채점에 영향을 주는 입력 열 (이름/번호는 제외)
+SCORING_INPUTS = ['학교과정', '학년', '성별'] + EVENT_COLUMNS + RECORD_COLUMNS
+
+# 총점 → 전체 등급 (paps_criteria.total_grade와 동일)
+_TOTAL_BOUNDS = np.array([20, 40, 60, 80])
+_TOTAL_GRADES = np.array(['5등급', '4등급', '3등급', '2등급', '1등급'], dtype=object)
+
+
+class VectorScorer:
+    """평가기준 인덱스의 종목별 구간을 배열로 캐시한 채점기"""
+
+    def __init__(self, index: CriteriaIndex):
+        self.index = index
+        self._arrays: Dict[CriteriaKey, Optional[Tuple[np.ndarray, ...]]] = {}
+
+    def _key_arrays(self, key: CriteriaKey) -> Optional[Tuple[np.ndarray, ...]]:
+        if key not in self._arrays:
+            ranges = self.index.ranges(*key)
+            self._arrays[key] = (
+                np.array([r.min_record for r in ranges], dtype=np.float64),
+                np.array([r.max_record for r in ranges], dtype=np.float64),
+                np.array([r.score for r in ranges], dtype=np.int64),
+                np.array([r.grade for r in ranges], dtype=object),
+            ) if ranges else None
+        return self._arrays[key]
+
+    def score_records(self, key: CriteriaKey, records: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """같은 학생군/종목 기록 배열 → (점수, 등급) 배열 (일치 구간 없거나 NaN이면 0점, '-')"""
+        records = np.asarray(records, dtype=np.float64)
+        scores = np.zeros(len(records), dtype=np.int64)
+        grades = np.full(len(records), '-', dtype=object)
+        arrays = self._key_arrays(key)
+        if arrays is None or not len(records):
+            return scores, grades
+        mins, maxs, range_scores, range_grades = arrays
+        i = np.searchsorted(mins, records, side='right') - 1
+        safe = np.clip(i, 0, len(mins) - 1)
+        hit = (i >= 0) & (records <= maxs[safe])  # NaN은 비교가 모두 False
+        scores[hit] = range_scores[safe[hit]]
+        grades[hit] = range_grades[safe[hit]]
+        return scores, grades
+
+    def score_frame(self, frame: pd.DataFrame, rows: Optional[Sequence] = None) -> pd.DataFrame:
+        """입력 표(INFO/EVENT/RECORD 열) → 요인별 점수/등급과 총점/등급 표 (rows만 채점)"""
+        if rows is not None:
+            frame = frame.loc[list(rows)]
+        return pd.DataFrame(self._score_columns(frame), index=frame.index)
+
+    def _score_columns(self, frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        n = len(frame)
+        out: Dict[str, np.ndarray] = {}
+        total = np.zeros(n, dtype=np.int64)
+        cohorts = list(zip(*(_text_column(frame, c) for c in ('학교과정', '학년', '성별'))))
+        for factor in FACTORS:
+            records = _float_column(frame, f'{factor}_기록')
+            events = _text_column(frame, f'{factor}_평가종목')
+            scores = np.zeros(n, dtype=np.int64)
+            grades = np.full(n, '-', dtype=object)
+            # 학생군/종목이 같은 행끼리 묶어 한 번에 조회 (한 학급은 보통 1~2개 묶음)
+            groups: Dict[CriteriaKey, List[int]] = {}
+            for pos, (cohort, event) in enumerate(zip(cohorts, events)):
+                if event:
+                    groups.setdefault(make_key(*cohort, factor, event), []).append(pos)
+            for key, positions in groups.items():
+                idx = np.array(positions)
+                scores[idx], grades[idx] = self.score_records(key, records[idx])
+            out[f'{factor}_점수'] = scores
+            out[f'{factor}_등급'] = grades
+            total += scores
+        out['총점'] = total
+        out['등급'] = _TOTAL_GRADES[np.searchsorted(_TOTAL_BOUNDS, total, side='right')]
+        return out
+
+    def update(self, results: Optional[pd.DataFrame], before: Optional[pd.DataFrame],
+               after: pd.DataFrame) -> Tuple[pd.DataFrame, List]:
+        """이전 결과에서 after의 바뀐 행만 다시 채점한 결과와 바뀐 행 목록 (삭제된 행은 빠짐)"""
+        if results is None or before is None:
+            return self.score_frame(after), list(after.index)
+        rows = changed_rows(before, after)
+        if not rows and results.index.equals(after.index):
+            return results, rows
+        positions = after.index.get_indexer(rows)
+        kept = np.maximum(results.index.get_indexer(after.index), 0)  # 새 행은 아래에서 채점됨
+        rescored = self._score_columns(after.iloc[positions]) if rows else {}
+        columns = {}
+        for column in results.columns:
+            values = results[column].to_numpy()[kept]
+            if rows:
+                values[positions] = rescored[column]
+            columns[column] = values
+        return pd.DataFrame(columns, index=after.index), rows
+
+
+def _float_column(frame: pd.DataFrame, column: str) -> np.ndarray:
+    """기록 열 → float 배열 (표 편집기는 이미 숫자 열, 문자열이 섞이면 변환 실패 값은 NaN)"""
+    values = frame[column]
+    if values.dtype.kind in 'fiu':
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _text_column(frame: pd.DataFrame, column: str) -> List[str]:
+    return ['' if v is None or v != v else str(v) for v in frame[column].tolist()]
+
+
+def changed_rows(before: Optional[pd.DataFrame], after: pd.DataFrame,
+                 columns: Sequence[str] = SCORING_INPUTS) -> List:
+    """채점 입력이 바뀐 행 (새로 추가된 행 포함, before가 없으면 전체)"""
+    if before is None:
+        return list(after.index)
+    positions = before.index.get_indexer(after.index)
+    take = np.maximum(positions, 0)
+    changed = positions < 0
+    for column in columns:  # 열 단위 비교 (열 부분집합 DataFrame을 만들지 않음)
+        old = before[column].to_numpy(dtype=object)[take]
+        new = after[column].to_numpy(dtype=object)
+        changed |= ~((old == new) | (pd.isna(old) & pd.isna(new)))
+    return list(after.index[changed])
+
+
+def cohort_events(index: CriteriaIndex, school_level: str, grade: str, gender: str) -> Dict[str, List[str]]:
+    """학생군의 체력요인별 평가종목 목록"""
+    cohort = make_key(school_level, grade, gender, '', '')[:3]
+    events: Dict[str, List[str]] = {factor: [] for factor in FACTORS}
+    for key in index.keys():
+        if key[:3] == cohort and key[3] in events:
+            events[key[3]].append(key[4])
+    return events
+
+
+def to_roster_csv(inputs: pd.DataFrame, results: pd.DataFrame, measured_on: Optional[str] = None) -> bytes:
+    """roster.py 형식 CSV (엑셀 호환 UTF-8 BOM)"""
+    columns = {c: inputs[c] for c in INFO_COLUMNS}
+    if measured_on:
+        columns['측정일'] = measured_on
+    for factor in FACTORS:
+        columns[f'{factor}_평가종목'] = inputs[f'{factor}_평가종목']
+        columns[f'{factor}_기록'] = inputs[f'{factor}_기록']
+        columns[f'{factor}_점수'] = results.loc[inputs.index, f'{factor}_점수']
+        columns[f'{factor}_등급'] = results.loc[inputs.index, f'{factor}_등급']
+    return pd.DataFrame(columns).to_csv(index=False).encode('utf-8-sig')
+
+
+def roster_frame(students: List[Dict]) -> pd.DataFrame:
+    """roster.load_roster 결과 → 입력 표"""
+    rows = []
+    for student in students:
+        row = {'번호': student['student_id'], '이름': student['name'], **student['user_info']}
+        for factor in FACTORS:
+            result = student['user_results'][factor]
+            row[f'{factor}_평가종목'] = result['평가종목']
+            row[f'{factor}_기록'] = result['기록']
+        rows.append(row)
+    return pd.DataFrame(rows, columns=INFO_COLUMNS + EVENT_COLUMNS + RECORD_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="명단 CSV 표 채점 시간 측정 (행 단위 조회와 비교)")
+    parser.add_argument('roster', help="학생 명단 CSV (roster.py 참고)")
+    parser.add_argument('--repeat', type=int, default=100, help="반복 횟수")
+    args = parser.parse_args()
+
+    from paps_criteria import get_criteria_index
+    from roster import load_roster
+
+    frame = roster_frame(load_roster(args.roster))
+    index = get_criteria_index()
+    scorer = VectorScorer(index)
+    scorer.score_frame(frame)  # 배열 캐시 채우기
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        results = scorer.score_frame(frame)
+    vector_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+    # 한 칸 수정 후 바뀐 행만 다시 채점
+    edited = frame.copy()
+    edited.loc[edited.index[0], RECORD_COLUMNS[0]] = 1.0
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        scorer.update(results, frame, edited)
+    update_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for row in frame.itertuples(index=False):
+            row = row._asdict()
+            for factor in FACTORS:
+                index.score(row['학교과정'], row['학년'], row['성별'], factor,
+                            row[f'{factor}_평가종목'] or '', row[f'{factor}_기록'])
+    scalar_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+    print(f"{len(frame)}명 채점: 표 한 번에 {vector_ms:.2f}ms, 한 칸 수정 후 바뀐 행만 {update_ms:.2f}ms, "
+          f"행 단위 조회 {scalar_ms:.2f}ms")
+    print(results[['총점', '등급']].value_counts().head().to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+운동 지침 지식베이스 모듈
+exercise_guidance.json의 평가종목/체력요인별 운동 지침을 BM25 키워드 인덱스로 검색하여
+질문과 관련된 상위 k개만 프롬프트에 넣음 (외부 벡터DB/네트워크 없음)
+"""
+import json
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+GUIDANCE_PATH = Path(__file__).parent / 'exercise_guidance.json'
+
+_WORD_RE = re.compile(r'[0-9a-zA-Z]+|[가-힣]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """키워드 토큰화: 영문/숫자 단어 + 한글 단어의 글자 bigram
+
+    한글은 조사가 붙어도 같은 어근이 매칭되도록 bigram으로 쪼갠다
+    (예: '심폐지구력을' → 심폐, 폐지, 지구, 구력, 력을).
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word[0].isascii():
+            tokens.append(word)
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """BM25 역색인 (문서 수가 적으므로 메모리 내 dict로 충분)"""
+
+    def __init__(self, documents: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        for doc_id, doc in enumerate(documents):
+            # 제목과 종목명은 본문보다 중요하므로 두 번 반영
+            field_text = " ".join([
+                doc.get('title', ''), doc.get('title', ''),
+                doc.get('평가종목', ''), doc.get('평가종목', ''),
+                doc.get('체력요인', ''), doc.get('text', ''),
+            ])
+            counts = Counter(tokenize(field_text))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc_id, tf))
+        n = len(documents)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0,
+               relative_cutoff: float = 0.0) -> List[Tuple[float, Dict]]:
+        """점수 상위 k개 문서 (점수, 문서)
+
+        relative_cutoff: 1위 점수 대비 이 비율 미만인 문서는 제외 (관련 없는 지침이 섞이지 않도록)
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        if not ranked:
+            return []
+        threshold = max(min_score, ranked[0][1] * relative_cutoff)
+        return [(score, self.documents[doc_id]) for doc_id, score in ranked[:k] if score >= threshold]
+
+
+def load_guidance(path=GUIDANCE_PATH) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=1)
+def get_guidance_index() -> BM25Index:
+    """운동 지침 인덱스 (프로세스당 한 번 생성)"""
+    return BM25Index(load_guidance())
+
+
+def weak_result_terms(user_results: Optional[Dict], max_score: int = 12) -> List[str]:
+    """점수가 낮은 체력요인의 종목명 (질문에 종목이 없을 때 검색어 보강용)"""
+    terms = []
+    for factor, result in (user_results or {}).items():
+        score = result.get('점수', 0) or 0
+        if 0 < score <= max_score:
+            terms.append(result.get('평가종목') or factor)
+    return terms
+
+
+def retrieve_guidance(question: str, k: int = 3, extra_terms: Iterable[str] = ()) -> List[Dict]:
+    """질문(+보강어)에 관련된 운동 지침 상위 k개"""
+    if k <= 0:
+        return []
+    query = " ".join([question, *extra_terms])
+    return [doc for _, doc in get_guidance_index().search(query, k=k, min_score=1.0, relative_cutoff=0.5)]
+
+
+def format_guidance(snippets: List[Dict]) -> str:
+    """프롬프트에 넣을 지침 블록"""
+    if not snippets:
+        return ""
+    lines = ["[참고 운동 지침]"]
+    lines += [f"- {doc['title']}: {doc['text']}" for doc in snippets]
+    return "\n".join(lines) + "\n"
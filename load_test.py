@@ -0,0 +1,202 @@
+"""
+챗봇 부하 생성기
+Streamlit 세션처럼 동작하는 N개의 동시 세션이 PAPSChatbot.get_response를 호출하고
+처리량과 p50/p95/p99 지연을 보고
+
+사용 예:
+    python load_test.py --spawn-stub --sessions 30 --turns 3
+    python load_test.py --base-url http://127.0.0.1:8765/v1 --sessions 50
+    python load_test.py --spawn-stub --sessions 40 --noisy-sessions 30 --tenants 5 --tenant-rate 30
+
+공정 스케줄러는 앱 배포 설정 대신 이 실행의 --max-concurrent(기본: 세션 수)/--tenant-rate(기본: 제한 없음)로
+설정하므로, 결과는 스케줄러 몫이 아니라 대상 서버의 처리량을 보여 준다.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import stub_server
+from fair_scheduler import SchedulerConfig, configure_scheduler
+
+# 세션마다 번갈아 사용하는 질문 (예시 질문 버튼과 동일)
+SAMPLE_QUESTIONS = [
+    "내 체력요인 중 어떤 부분이 부족한가요?",
+    "다음 등급으로 올라가려면 어떻게 해야 하나요?",
+    "심폐지구력을 향상시키는 방법을 알려주세요",
+    "왕복오래달리기를 더 잘 할 수 있는 팁을 주세요",
+    "전체적으로 체력을 향상시키려면 어떻게 해야 하나요?",
+]
+
+SAMPLE_USER_INFO = {"학교과정": "초등학교", "학년": "5학년", "성별": "남자"}
+SAMPLE_RESULTS = {
+    "심폐지구력": {"점수": 12, "등급": "3", "기록": 45.0, "평가종목": "왕복오래달리기"},
+    "유연성": {"점수": 15, "등급": "2", "기록": 8.0, "평가종목": "앉아윗몸앞으로굽히기"},
+    "근력근지구력": {"점수": 9, "등급": "3", "기록": 16.0, "평가종목": "악력"},
+    "순발력": {"점수": 14, "등급": "2", "기록": 9.8, "평가종목": "50m달리기"},
+    "비만": {"점수": 20, "등급": "정상", "기록": 17.5, "평가종목": "체질량지수"},
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """정렬된 값에서 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class _SessionResult:
+    __slots__ = ("latencies", "errors")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+
+def session_tenant(index: int, args: argparse.Namespace) -> str:
+    """세션의 학급 (--noisy-sessions개는 한 학급에 몰림, 나머지는 --tenants개 학급에 고르게)"""
+    if index < args.noisy_sessions:
+        return "noisy"
+    return f"class-{index % max(1, args.tenants)}"
+
+
+def _run_session(index: int, args: argparse.Namespace, start_gate: threading.Barrier,
+                 out: _SessionResult) -> None:
+    """세션 하나: 챗봇 생성 후 여러 턴 대화 (Streamlit 세션 하나와 같은 흐름)"""
+    from chat_module import PAPSChatbot
+
+    try:
+        chatbot = PAPSChatbot()
+    except Exception as e:
+        print(f"[session {index}] 챗봇 초기화 실패: {e}")
+        out.errors += args.turns
+        start_gate.wait()
+        return
+    rng = random.Random(index)
+    with_context = not args.no_context
+    start_gate.wait()
+    for turn in range(args.turns):
+        if args.same_question:
+            question = SAMPLE_QUESTIONS[turn % len(SAMPLE_QUESTIONS)]
+        else:
+            question = rng.choice(SAMPLE_QUESTIONS)
+        started = time.perf_counter()
+        response = chatbot.get_response(
+            question,
+            user_results=SAMPLE_RESULTS if with_context else None,
+            user_info=SAMPLE_USER_INFO if with_context else None,
+            total_summary={"총점": 70, "등급": "2등급"} if with_context else None,
+            tenant=session_tenant(index, args),
+        )
+        elapsed = time.perf_counter() - started
+        if response.startswith("오류가 발생했습니다"):
+            out.errors += 1
+        else:
+            out.latencies.append(elapsed)
+        if args.think_time:
+            time.sleep(rng.uniform(0, args.think_time))
+
+
+def run_load(args: argparse.Namespace) -> Dict:
+    """부하 실행 후 요약 지표 반환"""
+    server = None
+    if args.spawn_stub:
+        server = stub_server.run_stub_server(stub_server.config_from_args(args))
+        os.environ["API_BASE_URL"] = stub_server.stub_base_url(server)
+        os.environ.setdefault("API_KEY", "stub")
+    elif args.base_url:
+        os.environ["API_BASE_URL"] = args.base_url
+        os.environ.setdefault("API_KEY", "stub")
+
+    configure_scheduler(SchedulerConfig(
+        max_concurrent=args.max_concurrent or max(1, args.sessions),
+        tenant_rate=args.tenant_rate,
+    ))
+    results = [_SessionResult() for _ in range(args.sessions)]
+    # 모든 세션이 챗봇 생성을 마친 뒤 동시에 시작
+    gate = threading.Barrier(args.sessions + 1)
+    threads = [
+        threading.Thread(target=_run_session, args=(i, args, gate, results[i]), daemon=True)
+        for i in range(args.sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    if server is not None:
+        server.shutdown()
+
+    latencies = sorted(x for r in results for x in r.latencies)
+    errors = sum(r.errors for r in results)
+    summary = {
+        "sessions": args.sessions,
+        "requests": len(latencies) + errors,
+        "ok": len(latencies),
+        "errors": errors,
+        "duration_s": duration,
+        "throughput_rps": len(latencies) / duration if duration else 0.0,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "max_s": latencies[-1] if latencies else 0.0,
+    }
+    return summary
+
+
+def print_summary(summary: Dict, extra: Optional[Dict] = None) -> None:
+    print("=== 부하 테스트 결과 ===")
+    print(f"세션 {summary['sessions']}개, 요청 {summary['requests']}건 "
+          f"(성공 {summary['ok']}, 오류 {summary['errors']})")
+    print(f"소요 {summary['duration_s']:.2f}s, 처리량 {summary['throughput_rps']:.2f} req/s")
+    print(f"지연 p50 {summary['p50_s'] * 1000:.0f}ms / p95 {summary['p95_s'] * 1000:.0f}ms / "
+          f"p99 {summary['p99_s'] * 1000:.0f}ms / max {summary['max_s'] * 1000:.0f}ms")
+    for name, value in (extra or {}).items():
+        print(f"{name}: {value}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="PAPS 챗봇 동시 세션 부하 생성기")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 세션 수")
+    parser.add_argument("--turns", type=int, default=3, help="세션당 대화 턴 수")
+    parser.add_argument("--think-time", type=float, default=0.0, help="턴 사이 최대 대기(초)")
+    parser.add_argument("--same-question", action="store_true",
+                        help="모든 세션이 같은 순서로 같은 질문 (수업 중 예시 질문 클릭 재현)")
+    parser.add_argument("--no-context", action="store_true", help="학생 측정 결과 없이 질문")
+    parser.add_argument("--tenants", type=int, default=1, help="세션을 나눌 학급(테넌트) 수")
+    parser.add_argument("--noisy-sessions", type=int, default=0,
+                        help="한 학급(noisy)에 몰리는 세션 수 (공정 스케줄러 확인)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="스케줄러 동시 호출 수 (기본: 세션 수, 앱 설정 재현 시 8)")
+    parser.add_argument("--tenant-rate", type=float, default=None,
+                        help="학급별 분당 요청 수 (기본: 제한 없음)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--spawn-stub", action="store_true", help="프로세스 내 스텁 서버를 띄워 사용")
+    target.add_argument("--base-url", help="대상 API_BASE_URL (기본: 환경변수)")
+    stub_server.add_stub_arguments(parser)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    summary = run_load(args)
+
+    from call_policy import get_policy_stats
+    from chat_module import get_coalescing_stats, get_routing_stats
+    from fair_scheduler import get_scheduler_stats
+    print_summary(summary, {
+        "요청 병합": get_coalescing_stats(),
+        "호출 정책": get_policy_stats(),
+        "공정 스케줄러": get_scheduler_stats(),
+        "질문 라우팅": get_routing_stats(),
+    })
+
+
+if __name__ == "__main__":
+    main()
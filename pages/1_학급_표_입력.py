@@ -0,0 +1,166 @@
+# pages/1_학급_표_입력.py
+"""
+학급 표 입력 (교사용)
+학교과정/학년/평가종목은 학급 단위로 한 번만 고르고, 표에 학생별 기록만 입력하면
+바뀐 행만 바로 다시 채점 (grid_scoring.VectorScorer)
+
+학생용 페이지 메뉴에는 보이지 않음 (.streamlit/config.toml showSidebarNavigation),
+TEACHER_CODE를 설정하면 교사 코드를 입력해야 사용 가능
+"""
+import hmac
+import time
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from grid_scoring import VectorScorer, cohort_events, to_roster_csv
+from paps_criteria import FACTORS, get_criteria_index, version_for_date
+from settings import get_setting
+
+st.set_page_config(page_title="PAPS 학급 표 입력", layout="wide", initial_sidebar_state="collapsed")
+
+DEFAULT_ROWS = 30
+GENDERS = ["남자", "여자"]
+
+
+@st.cache_resource
+def get_scorer(version: str) -> VectorScorer:
+    """평가기준 버전별 채점기 (모든 세션 공유, 종목 배열은 처음 쓸 때 생성)"""
+    return VectorScorer(get_criteria_index(version))
+
+
+def empty_grid(rows: int) -> pd.DataFrame:
+    grid = pd.DataFrame({
+        "번호": [str(i + 1) for i in range(rows)],
+        "이름": [""] * rows,
+        "성별": [None] * rows,
+    })
+    for factor in FACTORS:
+        grid[f"{factor}_기록"] = pd.Series([None] * rows, dtype="float64")
+    return grid
+
+
+st.title("📝 학급 표 입력")
+
+# 교사 코드 확인 (설정하지 않으면 주소를 아는 사람만 사용)
+TEACHER_CODE = get_setting("TEACHER_CODE", "") or ""
+if TEACHER_CODE and not st.session_state.get("teacher_ok"):
+    code = st.text_input("교사 코드", type="password")
+    if code and hmac.compare_digest(code.encode(), TEACHER_CODE.encode()):
+        st.session_state.teacher_ok = True
+        st.rerun()
+    if code:
+        st.error("교사 코드가 맞지 않습니다.")
+    st.stop()
+
+st.caption("학급 공통 항목을 고른 뒤 표에 기록만 입력하세요. 입력한 행은 바로 채점됩니다.")
+
+# 학급 공통 설정
+measured_on = st.date_input("측정일", value=date.today())
+version = version_for_date(measured_on)
+scorer = get_scorer(version)
+cohorts = sorted({key[:3] for key in scorer.index.keys()})
+school_levels = sorted({c[0] for c in cohorts})
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    school_level = st.selectbox("학교과정", school_levels)
+with col2:
+    grades = sorted({c[1] for c in cohorts if c[0] == school_level})
+    grade = st.selectbox("학년", grades)
+with col3:
+    default_gender = st.selectbox("기본 성별", GENDERS, help="표의 성별 칸을 비워 두면 이 값으로 채점합니다.")
+
+# 평가종목은 학급 전체가 같은 종목으로 측정 (선택지는 두 성별의 종목을 합치고, 한 성별만 있는 종목은 표시)
+events_by_gender = {gender: cohort_events(scorer.index, school_level, grade, gender) for gender in GENDERS}
+events_by_factor = {factor: [] for factor in FACTORS}
+for gender in GENDERS:
+    for factor, events in events_by_gender[gender].items():
+        events_by_factor[factor] += [e for e in events if e not in events_by_factor[factor]]
+
+
+def event_label(factor: str, event: str) -> str:
+    genders = [g for g in GENDERS if event in events_by_gender[g][factor]]
+    return f"{event} ({genders[0]}만)" if event and len(genders) == 1 else event
+
+
+event_cols = st.columns(len(FACTORS))
+selected_events = {}
+for col, factor in zip(event_cols, FACTORS):
+    with col:
+        options = events_by_factor[factor] or [""]
+        selected_events[factor] = st.selectbox(
+            factor, options, key=f"event_{factor}", format_func=lambda e, f=factor: event_label(f, e)
+        )
+
+if "grid_inputs" not in st.session_state:
+    st.session_state.grid_inputs = empty_grid(DEFAULT_ROWS)  # 표의 초기 데이터 (편집 내용은 위젯 상태에 있음)
+    st.session_state.grid_prev = None        # 마지막으로 채점한 입력 (학급 공통 항목 포함)
+    st.session_state.grid_results = None     # 행별 채점 결과
+
+column_config = {
+    "번호": st.column_config.TextColumn("번호", width="small"),
+    "이름": st.column_config.TextColumn("이름"),
+    "성별": st.column_config.SelectboxColumn("성별", options=GENDERS, width="small"),
+}
+# 표 데이터와 열 설정은 바꾸지 않음 (바꾸면 편집 중인 표 상태가 초기화됨), 평가종목은 위에서 선택
+for factor in FACTORS:
+    column_config[f"{factor}_기록"] = st.column_config.NumberColumn(f"{factor} 기록", format="%g")
+
+input_col, result_col = st.columns([3, 2])
+with input_col:
+    edited = st.data_editor(
+        st.session_state.grid_inputs,
+        column_config=column_config,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key="grid_editor",
+    )
+
+# 표 + 학급 공통 항목 → 채점 입력
+inputs = edited.copy()
+inputs["성별"] = inputs["성별"].fillna(default_gender).replace("", default_gender)
+inputs["학교과정"] = school_level
+inputs["학년"] = grade
+# 학생 성별의 기준에 없는 종목은 비워 둠 (채점·CSV에서 미측정, 결과 표에는 '해당 없음')
+not_applicable = {}
+for factor in FACTORS:
+    event = selected_events[factor]
+    applicable = inputs["성별"].map(lambda g, f=factor: event in events_by_gender.get(g, {}).get(f, []))
+    not_applicable[factor] = (~applicable & bool(event)).to_numpy()
+    inputs[f"{factor}_평가종목"] = event
+    inputs.loc[~applicable, f"{factor}_평가종목"] = ""
+
+# 바뀐 행만 다시 채점 (공통 항목이 바뀌면 모든 행이 바뀐 것으로 잡힘)
+started = time.perf_counter()
+prev = st.session_state.grid_prev
+if prev is not None and prev.attrs.get("version") != version:
+    prev = None  # 측정일이 바뀌어 평가기준 버전이 달라지면 전체 다시 채점
+results, rows = scorer.update(st.session_state.grid_results, prev, inputs)
+elapsed_ms = (time.perf_counter() - started) * 1000
+inputs.attrs["version"] = version
+st.session_state.grid_prev = inputs
+st.session_state.grid_results = results
+
+with result_col:
+    view = pd.DataFrame({"번호": inputs["번호"], "이름": inputs["이름"]})
+    for factor in FACTORS:
+        view[factor] = [
+            "해당 없음" if na else f"{score}점 ({grade_})" if grade_ != "-" else "-"
+            for na, score, grade_ in zip(not_applicable[factor], results[f"{factor}_점수"], results[f"{factor}_등급"])
+        ]
+    view["총점"] = results["총점"]
+    view["등급"] = results["등급"]
+    st.dataframe(view, hide_index=True, use_container_width=True)
+    st.caption(f"{len(rows)}행 다시 채점 · {elapsed_ms:.1f}ms · 평가기준 {version}")
+
+entered = inputs[[f"{factor}_기록" for factor in FACTORS]].notna().any(axis=1)
+st.download_button(
+    "⬇️ 명단 CSV 내려받기 (일괄 보고서/결과 저장소용)",
+    data=to_roster_csv(inputs[entered], results, measured_on.isoformat()),
+    file_name=f"{school_level}_{grade}_{measured_on.isoformat()}.csv",
+    mime="text/csv",
+    disabled=not entered.any(),
+)
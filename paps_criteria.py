@@ -0,0 +1,307 @@
+"""
+팝스 평가기준 인덱스 모듈
+paps_data.js의 평가기준을 (학교과정, 학년, 성별, 체력요인, 평가종목)별 정렬된 기록 구간으로
+인덱싱하여 기록 → 등급/점수 조회를 이분 탐색으로 처리
+
+학년도별 평가기준은 criteria_versions.json에 버전으로 등록되며, 버전별 인덱스는
+처음 사용할 때만 읽어 LRU 캐시에 보관 (모든 연도를 한 번에 메모리에 올리지 않음)
+"""
+import json
+from bisect import bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+ROOT = Path(__file__).parent
+PAPS_DATA_PATH = ROOT / 'paps_data.js'
+VERSIONS_PATH = ROOT / 'criteria_versions.json'
+# 학년도별 기준표 (Streamlit 정적 파일로 제공되어 계산기가 필요할 때만 내려받음)
+STATIC_DIR = ROOT / 'static'
+
+# 동시에 메모리에 유지할 버전별 인덱스 수
+CRITERIA_CACHE_SIZE = 3
+
+FACTORS = ['심폐지구력', '유연성', '근력근지구력', '순발력', '비만']
+
+# (학교과정, 학년, 성별, 체력요인, 평가종목)
+CriteriaKey = Tuple[str, str, str, str, str]
+
+
+class GradeRange(NamedTuple):
+    """기록 구간 하나 (양 끝 포함)"""
+    min_record: float
+    max_record: float
+    grade: str
+    score: int
+    label: str  # 원본 기록 구간 문자열 (예: "94.0 ~ 99.0")
+
+
+def parse_range(range_str: str) -> Tuple[float, float]:
+    """'94.0 ~ 99.0' 형식의 기록 구간 파싱"""
+    low, high = range_str.split('~')
+    return float(low.strip()), float(high.strip())
+
+
+def make_key(school_level: str, grade: str, gender: str, factor: str, event: str) -> CriteriaKey:
+    """계산기와 같이 앞뒤 공백을 제거한 조회 키"""
+    return (
+        str(school_level).strip(), str(grade).strip(), str(gender).strip(),
+        str(factor).strip(), str(event).strip(),
+    )
+
+
+def total_grade(total_score: float) -> str:
+    """총점으로 전체 등급 계산 (app.js calculateTotalGrade와 동일)"""
+    if total_score >= 80:
+        return '1등급'
+    if total_score >= 60:
+        return '2등급'
+    if total_score >= 40:
+        return '3등급'
+    if total_score >= 20:
+        return '4등급'
+    return '5등급'
+
+
+def load_paps_data(path=PAPS_DATA_PATH) -> Dict:
+    """paps_data.js (const PAPS_DATA = {...};)에서 JSON 부분 파싱"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    json_start = content.find('{')
+    json_end = content.rfind('}') + 1
+    return json.loads(content[json_start:json_end])
+
+
+class CriteriaIndex:
+    """평가기준 조회 인덱스"""
+
+    def __init__(self, criteria: List[Dict]):
+        ranges: Dict[CriteriaKey, List[GradeRange]] = {}
+        for item in criteria:
+            try:
+                low, high = parse_range(item['기록'])
+            except (KeyError, ValueError):
+                continue
+            key = make_key(item['학교과정'], item['학년'], item['성별'], item['체력요인'], item['평가종목'])
+            ranges.setdefault(key, []).append(
+                GradeRange(low, high, str(item['등급']).strip(), int(item['점수']), item['기록'])
+            )
+        self._ranges: Dict[CriteriaKey, List[GradeRange]] = {}
+        self._mins: Dict[CriteriaKey, List[float]] = {}
+        # (학교과정, 학년, 성별)별 기준 요약 (처음 요청될 때 생성)
+        self._excerpts: Dict[Tuple[str, str, str], str] = {}
+        for key, items in ranges.items():
+            items.sort(key=lambda r: (r.min_record, r.max_record))
+            self._ranges[key] = items
+            self._mins[key] = [r.min_record for r in items]
+
+    @classmethod
+    def from_paps_data(cls, data: Dict) -> "CriteriaIndex":
+        return cls(data.get('평가기준', []))
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def keys(self) -> List[CriteriaKey]:
+        return list(self._ranges)
+
+    def ranges(self, school_level: str, grade: str, gender: str, factor: str,
+               event: str) -> List[GradeRange]:
+        """해당 학생군/종목의 기록 구간 (기록 오름차순)"""
+        return self._ranges.get(make_key(school_level, grade, gender, factor, event), [])
+
+    def lookup(self, school_level: str, grade: str, gender: str, factor: str, event: str,
+               record: float) -> Optional[GradeRange]:
+        """기록이 속한 구간 (없으면 None)"""
+        key = make_key(school_level, grade, gender, factor, event)
+        mins = self._mins.get(key)
+        if not mins:
+            return None
+        i = bisect_right(mins, record) - 1
+        if i < 0:
+            return None
+        found = self._ranges[key][i]
+        return found if record <= found.max_record else None
+
+    def score(self, school_level: str, grade: str, gender: str, factor: str, event: str,
+              record) -> Dict:
+        """계산기 결과와 같은 형식의 {점수, 등급} 반환 (일치 구간 없으면 0점, '-')"""
+        try:
+            value = float(record)
+        except (TypeError, ValueError):
+            return {'점수': 0, '등급': '-'}
+        found = self.lookup(school_level, grade, gender, factor, event, value)
+        if found is None:
+            return {'점수': 0, '등급': '-'}
+        return {'점수': found.score, '등급': found.grade}
+
+    def grade_bands(self, school_level: str, grade: str, gender: str, factor: str,
+                    event: str) -> List[Tuple[str, float, float]]:
+        """같은 등급이 이어지는 구간을 합친 (등급, 최소 기록, 최대 기록) 목록 (기록 오름차순)"""
+        bands: List[Tuple[str, float, float]] = []
+        for r in self.ranges(school_level, grade, gender, factor, event):
+            if bands and bands[-1][0] == r.grade:
+                bands[-1] = (r.grade, bands[-1][1], max(bands[-1][2], r.max_record))
+            else:
+                bands.append((r.grade, r.min_record, r.max_record))
+        return bands
+
+    def next_grade(self, school_level: str, grade: str, gender: str, factor: str, event: str,
+                   record: float) -> Optional[Dict]:
+        """한 단계 위 등급과 가장 가까운 목표 기록 (숫자 등급만, 1등급이거나 구간 밖이면 None)
+
+        기록이 높을수록 좋은 종목은 다음 등급 구간의 시작값, 낮을수록 좋은 종목(50m달리기 등)은
+        끝값이 목표가 되며, 방향은 구간 배치로 판단한다.
+        """
+        current = self.lookup(school_level, grade, gender, factor, event, record)
+        if current is None or not current.grade.isdigit() or int(current.grade) <= 1:
+            return None
+        target_grade = str(int(current.grade) - 1)
+        best = None
+        for band_grade, low, high in self.grade_bands(school_level, grade, gender, factor, event):
+            if band_grade != target_grade:
+                continue
+            target = low if low > record else high
+            improvement = abs(target - record)
+            if best is None or improvement < best[1]:
+                best = (target, improvement)
+        if best is None:
+            return None
+        return {
+            'next_grade': int(target_grade),
+            'target_record': best[0],
+            'improvement_needed': best[1],
+            'current_record': record,
+        }
+
+    def cohort_excerpt(self, school_level: str, grade: str, gender: str) -> str:
+        """학생군의 종목별 등급 경계 요약 (종목당 한 줄, 학생군별 캐시)
+
+        예: - 왕복오래달리기(심폐지구력): 1등급 77 이상 | 2등급 57~76 | ... | 5등급 20 이하
+        """
+        cohort = make_key(school_level, grade, gender, '', '')[:3]
+        cached = self._excerpts.get(cohort)
+        if cached is not None:
+            return cached
+        keys = sorted(
+            (key for key in self._ranges if key[:3] == cohort),
+            key=lambda k: (FACTORS.index(k[3]) if k[3] in FACTORS else len(FACTORS), k[4]),
+        )
+        lines = []
+        for key in keys:
+            bands = self.grade_bands(*key)
+            parts = []
+            for i, (band_grade, low, high) in enumerate(bands):
+                if i == 0:
+                    span = f"{high:g} 이하"
+                elif i == len(bands) - 1:
+                    span = f"{low:g} 이상"
+                elif low == high:
+                    span = f"{low:g}"
+                else:
+                    span = f"{low:g}~{high:g}"
+                label = f"{band_grade}등급" if band_grade.isdigit() else band_grade
+                parts.append((band_grade, f"{label} {span}"))
+            if all(g.isdigit() for g, _ in parts):
+                parts.sort(key=lambda p: int(p[0]))  # 1등급부터
+            lines.append(f"- {key[4]}({key[3]}): " + " | ".join(text for _, text in parts))
+        excerpt = ""
+        if lines:
+            excerpt = f"[평가기준 요약: {' '.join(cohort)}]\n" + "\n".join(lines) + "\n"
+        self._excerpts[cohort] = excerpt
+        return excerpt
+
+
+@lru_cache(maxsize=1)
+def load_versions() -> List[Dict]:
+    """등록된 평가기준 버전 목록 (적용 시작일 오름차순, 시작일 없는 버전이 맨 앞)"""
+    if not VERSIONS_PATH.exists():
+        return [{"version": "기본", "label": "기본 평가기준", "effective_from": None,
+                 "path": PAPS_DATA_PATH.name}]
+    with open(VERSIONS_PATH, 'r', encoding='utf-8') as f:
+        versions = json.load(f)["versions"]
+    return sorted(versions, key=lambda v: v.get("effective_from") or "")
+
+
+def _as_date(value: Union[date, datetime, str]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def version_for_date(when: Union[date, datetime, str, None] = None) -> str:
+    """측정일에 적용되던 평가기준 버전 (없으면 오늘 기준)"""
+    when = _as_date(when) if when else date.today()
+    selected = load_versions()[0]["version"]
+    for entry in load_versions():
+        effective_from = entry.get("effective_from")
+        if effective_from is None or _as_date(effective_from) <= when:
+            selected = entry["version"]
+    return selected
+
+
+def version_for_school_year(year: int) -> str:
+    """학년도(3월 시작)에 적용되던 평가기준 버전"""
+    return version_for_date(date(int(year), 3, 1))
+
+
+def _version_entry(version: str) -> Dict:
+    for entry in load_versions():
+        if entry["version"] == version:
+            return entry
+    known = ", ".join(v["version"] for v in load_versions())
+    raise KeyError(f"등록되지 않은 평가기준 버전: {version} (등록된 버전: {known})")
+
+
+def criteria_path(version: str) -> Path:
+    return ROOT / _version_entry(version)["path"]
+
+
+@lru_cache(maxsize=CRITERIA_CACHE_SIZE)
+def _load_index(version: str) -> CriteriaIndex:
+    return CriteriaIndex.from_paps_data(load_paps_data(criteria_path(version)))
+
+
+def get_criteria_index(version: Optional[str] = None) -> CriteriaIndex:
+    """평가기준 인덱스 (버전 미지정 시 오늘 적용되는 버전, 버전별 LRU 캐시)"""
+    return _load_index(version or version_for_date())
+
+
+def static_url(path: Path) -> Optional[str]:
+    """static/ 아래 파일의 Streamlit 정적 파일 주소 (앱 기준 상대 경로, static/ 밖이면 None)"""
+    try:
+        relative = path.resolve().relative_to(STATIC_DIR.resolve())
+    except ValueError:
+        return None
+    return f"app/static/{relative.as_posix()}"
+
+
+def calculator_versions_html(builtin_path: Path = PAPS_DATA_PATH) -> str:
+    """계산기용 버전 목록 + 오늘 적용되는 버전의 기준표 JSON 태그
+
+    기본 paps_data.js 외의 버전은 오늘 적용되는 버전만 문서에 넣고, 나머지는 목록의 url로
+    선택될 때 app.js가 내려받는다 (모든 학년도 기준표를 매번 보내지 않음).
+    """
+    current = version_for_date()
+    builtin = None
+    tags = []
+    versions = []
+    for entry in load_versions():
+        path = ROOT / entry["path"]
+        item = {"version": entry["version"], "label": entry.get("label") or entry["version"],
+                "effective_from": entry.get("effective_from")}
+        versions.append(item)
+        if builtin is None and path.resolve() == builtin_path.resolve():
+            builtin = entry["version"]
+            continue
+        item["url"] = static_url(path)
+        if entry["version"] == current or item["url"] is None:
+            content = path.read_text(encoding='utf-8')
+            payload = content[content.find('{'):content.rfind('}') + 1].replace('</', '<\\/')
+            tags.append(f'<script type="application/json" id="paps-criteria-{entry["version"]}">{payload}</script>')
+    registry = {"current": current, "builtin": builtin, "versions": versions}
+    tags.append(f"<script>window.PAPS_CRITERIA_VERSIONS = {json.dumps(registry, ensure_ascii=False)};</script>")
+    return "\n".join(tags)
@@ -0,0 +1,321 @@
+"""
+상담 분석지 렌더러
+계산기(app.js generateAnalysisReport / updateChart)와 같은 내용의 분석지를 Python에서 생성
+
+- 형식: txt(계산기 분석지와 동일한 텍스트), md, html(레이더 차트 SVG 포함, 인쇄용 CSS), pdf(reportlab 설치 시)
+- 학급 전체를 프로세스 풀에서 렌더링하고, 끝나는 순서대로 zip에 바로 기록
+
+사용 예:
+    python report_renderer.py roster.csv --out 3-2_분석지.zip --format txt html --workers 4
+"""
+import argparse
+import html
+import io
+import math
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from paps_criteria import FACTORS, total_grade
+
+FORMATS = ('txt', 'md', 'html', 'pdf')
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfgen import canvas as pdf_canvas
+    HAS_REPORTLAB = True
+except ImportError:
+    HAS_REPORTLAB = False
+
+
+def _format_record(value) -> str:
+    if value is None or value == '':
+        return ''
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+
+def radar_data(user_results: Dict) -> List[Optional[int]]:
+    """레이더 차트 값 (app.js updateChart와 동일: '-' → 0, n등급 → 6 - n)
+
+    등급이 숫자가 아닌 경우(비만의 '정상' 등) 계산기에서는 NaN으로 점이 표시되지 않으므로 None
+    """
+    values = []
+    for factor in FACTORS:
+        grade = str((user_results.get(factor) or {}).get('등급') or '-')
+        if grade == '-':
+            values.append(0)
+            continue
+        match = re.match(r'\s*(\d+)', grade.replace('등급', ''))
+        values.append(6 - int(match.group(1)) if match else None)
+    return values
+
+
+def _summary(student: Dict) -> Tuple[int, str]:
+    results = student.get('user_results') or {}
+    total = sum(int((results.get(f) or {}).get('점수') or 0) for f in FACTORS)
+    return total, total_grade(total)
+
+
+def analysis_text(student: Dict) -> str:
+    """계산기 '상담 분석지 생성'과 같은 텍스트"""
+    info = student.get('user_info') or {}
+    results = student.get('user_results') or {}
+    total, grade = _summary(student)
+    lines = [
+        '=== PAPS 체력 평가 상담 분석지 ===', '',
+        '[기본 정보]',
+        f"학교과정: {info.get('학교과정') or '미입력'}",
+        f"학년: {info.get('학년') or '미입력'}",
+        f"성별: {info.get('성별') or '미입력'}", '',
+        '[체력요인별 평가 결과]',
+        '=' * 40,
+    ]
+    for factor in FACTORS:
+        result = results.get(factor) or {}
+        lines += ['', factor, f"  평가종목: {result.get('평가종목') or '미선택'}"]
+        record = _format_record(result.get('기록'))
+        if record:
+            lines.append(f"  기록: {record}")
+        lines.append(f"  점수: {int(result.get('점수') or 0)}점")
+        lines.append(f"  등급: {result.get('등급') or '-'}등급")
+    lines += [
+        '', '=' * 40,
+        '[전체 평가 결과]',
+        f"총점: {total}점",
+        f"전체 등급: {grade}", '',
+        '위 결과를 바탕으로 체력 개선 방안을 제시해주세요.', '',
+    ]
+    return '\n'.join(lines)
+
+
+def _title(student: Dict) -> str:
+    return f"PAPS 체력 평가 상담 분석지 - {student.get('name') or student.get('student_id', '')}".rstrip(' -')
+
+
+def render_markdown(student: Dict, feedback: Optional[str] = None) -> str:
+    info = student.get('user_info') or {}
+    results = student.get('user_results') or {}
+    total, grade = _summary(student)
+    radar = radar_data(results)
+    lines = [
+        f"# {_title(student)}", '',
+        f"- 학교과정: {info.get('학교과정') or '미입력'}",
+        f"- 학년: {info.get('학년') or '미입력'}",
+        f"- 성별: {info.get('성별') or '미입력'}", '',
+        '| 체력요인 | 평가종목 | 기록 | 점수 | 등급 | 차트 값 |',
+        '|---|---|---|---|---|---|',
+    ]
+    for factor, value in zip(FACTORS, radar):
+        result = results.get(factor) or {}
+        lines.append(
+            f"| {factor} | {result.get('평가종목') or '미선택'} | {_format_record(result.get('기록')) or '-'} | "
+            f"{int(result.get('점수') or 0)}점 | {result.get('등급') or '-'} | {'-' if value is None else value} |"
+        )
+    lines += ['', f"**총점 {total}점 / 전체 등급 {grade}**", '']
+    if feedback:
+        lines += ['## 상담 피드백', '', feedback.strip(), '']
+    return '\n'.join(lines)
+
+
+def radar_svg(values: Sequence[Optional[int]], size: int = 320) -> str:
+    """계산기 레이더 차트와 같은 축(1~5, 바깥쪽일수록 높은 등급)의 SVG"""
+    center = size / 2
+    radius = size / 2 - 50
+    count = len(FACTORS)
+
+    def point(index: int, value: float) -> Tuple[float, float]:
+        angle = -math.pi / 2 + 2 * math.pi * index / count
+        r = radius * max(0.0, value - 1) / 4  # 차트 축 최소 1, 최대 5
+        return center + r * math.cos(angle), center + r * math.sin(angle)
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}">']
+    for level in range(1, 6):
+        ring = " ".join(f"{x:.1f},{y:.1f}" for x, y in (point(i, level) for i in range(count)))
+        parts.append(f'<polygon points="{ring}" fill="none" stroke="#ddd"/>')
+        x, y = point(0, level)
+        parts.append(f'<text x="{x + 4:.1f}" y="{y + 4:.1f}" font-size="10" fill="#999">{6 - level}등급</text>')
+    for i, factor in enumerate(FACTORS):
+        x, y = point(i, 5)
+        parts.append(f'<line x1="{center}" y1="{center}" x2="{x:.1f}" y2="{y:.1f}" stroke="#ddd"/>')
+        lx, ly = point(i, 5.9)
+        parts.append(f'<text x="{lx:.1f}" y="{ly:.1f}" font-size="12" text-anchor="middle">{html.escape(factor)}</text>')
+    shape = " ".join(f"{x:.1f},{y:.1f}" for x, y in (point(i, v or 0) for i, v in enumerate(values)))
+    parts.append(f'<polygon points="{shape}" fill="rgba(54,162,235,0.2)" stroke="rgba(54,162,235,1)"/>')
+    for i, value in enumerate(values):
+        if value:
+            x, y = point(i, value)
+            parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="rgba(54,162,235,1)"/>')
+    parts.append('</svg>')
+    return "".join(parts)
+
+
+_HTML_STYLE = """
+body { font-family: 'Malgun Gothic', 'Apple SD Gothic Neo', sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 20px; border-bottom: 2px solid #2196F3; padding-bottom: 6px; }
+table { border-collapse: collapse; width: 100%; margin: 12px 0; }
+th, td { border: 1px solid #ccc; padding: 6px 8px; text-align: center; }
+th { background: #f0f6fc; }
+.layout { display: flex; gap: 24px; align-items: flex-start; }
+.total { font-size: 16px; font-weight: bold; }
+.feedback { white-space: pre-wrap; }
+@media print { body { margin: 0; } @page { size: A4; margin: 15mm; } }
+"""
+
+
+def render_html(student: Dict, feedback: Optional[str] = None) -> str:
+    """인쇄용 단일 HTML (브라우저 '인쇄 → PDF로 저장'으로 PDF 생성 가능)"""
+    info = student.get('user_info') or {}
+    results = student.get('user_results') or {}
+    total, grade = _summary(student)
+    esc = html.escape
+    rows = []
+    for factor in FACTORS:
+        result = results.get(factor) or {}
+        rows.append(
+            f"<tr><td>{esc(factor)}</td><td>{esc(result.get('평가종목') or '미선택')}</td>"
+            f"<td>{esc(_format_record(result.get('기록')) or '-')}</td>"
+            f"<td>{int(result.get('점수') or 0)}점</td><td>{esc(str(result.get('등급') or '-'))}</td></tr>"
+        )
+    body = [
+        f"<h1>{esc(_title(student))}</h1>",
+        f"<p>학교과정: {esc(info.get('학교과정') or '미입력')} · 학년: {esc(info.get('학년') or '미입력')} · "
+        f"성별: {esc(info.get('성별') or '미입력')}</p>",
+        '<div class="layout"><div style="flex: 1">',
+        "<table><tr><th>체력요인</th><th>평가종목</th><th>기록</th><th>점수</th><th>등급</th></tr>",
+        *rows,
+        "</table>",
+        f'<p class="total">총점 {total}점 / 전체 등급 {esc(grade)}</p>',
+        "</div>",
+        radar_svg(radar_data(results)),
+        "</div>",
+    ]
+    if feedback:
+        body += ["<h2>상담 피드백</h2>", f'<div class="feedback">{esc(feedback.strip())}</div>']
+    return (
+        '<!doctype html><html lang="ko"><head><meta charset="utf-8">'
+        f"<title>{esc(_title(student))}</title><style>{_HTML_STYLE}</style></head>"
+        f"<body>{''.join(body)}</body></html>"
+    )
+
+
+def render_pdf(student: Dict, feedback: Optional[str] = None) -> bytes:
+    """분석지 PDF (reportlab 필요, 한글은 내장 CID 글꼴 사용 - 오프라인 동작)"""
+    if not HAS_REPORTLAB:
+        raise RuntimeError("PDF 출력에는 reportlab이 필요합니다 (pip install reportlab)")
+    pdfmetrics.registerFont(UnicodeCIDFont('HYSMyeongJo-Medium'))
+    buffer = io.BytesIO()
+    page = pdf_canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 50
+    text = analysis_text(student)
+    if feedback:
+        text += "\n[상담 피드백]\n" + feedback.strip() + "\n"
+    page.setFont('HYSMyeongJo-Medium', 11)
+    for line in text.split('\n'):
+        if y < 50:
+            page.showPage()
+            page.setFont('HYSMyeongJo-Medium', 11)
+            y = height - 50
+        page.drawString(50, y, line)
+        y -= 16
+    page.save()
+    return buffer.getvalue()
+
+
+def _safe_filename(text: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', text).strip('_') or 'student'
+
+
+def report_basename(student: Dict) -> str:
+    name = f"{student.get('student_id', '')}_{student['name']}" if student.get('name') else str(student.get('student_id', ''))
+    return _safe_filename(name)
+
+
+def render_student(student: Dict, formats: Sequence[str] = ('txt', 'html'),
+                   feedback: Optional[str] = None) -> List[Tuple[str, bytes]]:
+    """학생 한 명의 분석지 파일들 [(파일 이름, 내용)] (프로세스 풀 작업 단위)"""
+    base = report_basename(student)
+    files = []
+    for fmt in formats:
+        if fmt == 'txt':
+            files.append((f"{base}.txt", analysis_text(student).encode('utf-8')))
+        elif fmt == 'md':
+            files.append((f"{base}.md", render_markdown(student, feedback).encode('utf-8')))
+        elif fmt == 'html':
+            files.append((f"{base}.html", render_html(student, feedback).encode('utf-8')))
+        elif fmt == 'pdf':
+            files.append((f"{base}.pdf", render_pdf(student, feedback)))
+        else:
+            raise ValueError(f"지원하지 않는 형식: {fmt}")
+    return files
+
+
+def _render_job(job: Tuple[Dict, Tuple[str, ...], Optional[str]]) -> List[Tuple[str, bytes]]:
+    student, formats, feedback = job
+    return render_student(student, formats, feedback)
+
+
+def render_class_zip(students: Iterable[Dict], zip_path, formats: Sequence[str] = ('txt', 'html'),
+                     workers: Optional[int] = None, feedback: Optional[Dict[str, str]] = None) -> Dict:
+    """학급 전체 분석지를 zip 하나로 (임시 파일에 쓴 뒤 원자적 교체)
+
+    feedback: 학생 번호 → 상담 피드백 (batch_reports 결과 등, 선택)
+    """
+    started = time.perf_counter()
+    zip_path = Path(zip_path)
+    formats = tuple(formats)
+    if 'pdf' in formats and not HAS_REPORTLAB:
+        raise RuntimeError("PDF 출력에는 reportlab이 필요합니다 (pip install reportlab)")
+    jobs = [(s, formats, (feedback or {}).get(s.get('student_id'))) for s in students]
+    tmp = zip_path.with_name(zip_path.name + '.tmp')
+    files = 0
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if workers == 1 or len(jobs) < 2:
+            results = map(_render_job, jobs)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+            results = pool.map(_render_job, jobs, chunksize=chunksize)
+        try:
+            # 렌더링이 끝난 학생부터 바로 압축 파일에 기록 (전체를 메모리에 모으지 않음)
+            for result in results:
+                for name, content in result:
+                    archive.writestr(name, content)
+                    files += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    os.replace(tmp, zip_path)
+    return {"students": len(jobs), "files": files, "elapsed_s": time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학급 전체 PAPS 상담 분석지 렌더링 (zip)")
+    parser.add_argument("roster", help="학생 명단 CSV (roster.py 참고)")
+    parser.add_argument("--out", default="분석지.zip", help="출력 zip 경로")
+    parser.add_argument("--format", nargs="+", default=['txt', 'html'], choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=None, help="렌더링 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args()
+
+    from roster import load_roster, score_roster
+    students = score_roster(load_roster(args.roster))
+    try:
+        summary = render_class_zip(students, args.out, args.format, args.workers)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    print(f"✅ {summary['students']}명, 파일 {summary['files']}개 → {args.out} "
+          f"({summary['elapsed_s']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
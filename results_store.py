@@ -0,0 +1,313 @@
+"""
+측정 결과 저장소 (SQLite)
+학교/학급/학생/측정일별 측정 결과를 로컬 DB에 누적하여 측정 회차 간 비교에 사용
+
+- 명단 채점 결과(roster.score_roster) 일괄 저장 (한 트랜잭션, 같은 학생·측정일은 덮어씀)
+- 학생별 추이, 학급 체력요인별 평균, 회차 간 등급 이동 조회 (모두 인덱스 조회)
+- 챗봇 컨텍스트용 추이 요약
+
+사용 예:
+    python results_store.py ingest roster.csv --school 한빛중 --class 3-2 --date 2025-04-10
+    python results_store.py trend --school 한빛중 --class 3-2 --student 7
+    python results_store.py averages --school 한빛중 --class 3-2
+    python results_store.py migration --school 한빛중 --class 3-2 --from 2024-04-10 --to 2025-04-10
+"""
+import argparse
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from paps_criteria import FACTORS, version_for_date
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'paps_results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY,
+    school TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    measured_on TEXT NOT NULL,          -- YYYY-MM-DD
+    school_level TEXT NOT NULL DEFAULT '',
+    grade TEXT NOT NULL DEFAULT '',
+    gender TEXT NOT NULL DEFAULT '',
+    criteria_version TEXT,
+    total_score INTEGER NOT NULL DEFAULT 0,
+    total_grade TEXT NOT NULL DEFAULT '-',
+    UNIQUE (school, class_name, student_id, measured_on)
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_class_date
+    ON measurements (school, class_name, measured_on);
+CREATE INDEX IF NOT EXISTS idx_measurements_date
+    ON measurements (measured_on, school);
+
+CREATE TABLE IF NOT EXISTS factor_results (
+    measurement_id INTEGER NOT NULL REFERENCES measurements(id) ON DELETE CASCADE,
+    factor TEXT NOT NULL,
+    event TEXT NOT NULL DEFAULT '',
+    record REAL,
+    score INTEGER NOT NULL DEFAULT 0,
+    grade TEXT NOT NULL DEFAULT '-',
+    PRIMARY KEY (measurement_id, factor)
+) WITHOUT ROWID;
+"""
+
+
+def _iso_date(value) -> str:
+    if value is None or str(value).strip() == '':
+        return date.today().isoformat()
+    return date.fromisoformat(str(value).strip()[:10]).isoformat()
+
+
+class ResultsStore:
+    """측정 결과 DB (스레드 간 공유 가능, 쓰기는 잠금으로 직렬화)"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---- 저장 ----
+
+    def ingest(self, students: Iterable[Dict], school: str, class_name: str,
+               measured_on=None) -> int:
+        """채점된 학생 레코드 일괄 저장, 저장한 학생 수 반환
+
+        측정일은 학생 레코드의 measured_on → 인자 measured_on → 오늘 순서로 정함
+        """
+        count = 0
+        with self._lock, self._conn:
+            for student in students:
+                day = _iso_date(student.get('measured_on') or measured_on)
+                info = student.get('user_info') or {}
+                summary = student.get('total_summary') or {}
+                row = self._conn.execute(
+                    """
+                    INSERT INTO measurements (school, class_name, student_id, name, measured_on,
+                        school_level, grade, gender, criteria_version, total_score, total_grade)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (school, class_name, student_id, measured_on) DO UPDATE SET
+                        name = excluded.name, school_level = excluded.school_level,
+                        grade = excluded.grade, gender = excluded.gender,
+                        criteria_version = excluded.criteria_version,
+                        total_score = excluded.total_score, total_grade = excluded.total_grade
+                    RETURNING id
+                    """,
+                    (
+                        school, class_name, str(student['student_id']), student.get('name') or '', day,
+                        info.get('학교과정', ''), info.get('학년', ''), info.get('성별', ''),
+                        version_for_date(day), int(summary.get('총점') or 0), summary.get('등급') or '-',
+                    ),
+                ).fetchone()
+                measurement_id = row[0]
+                self._conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO factor_results
+                        (measurement_id, factor, event, record, score, grade)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (measurement_id, factor, result.get('평가종목') or '', result.get('기록'),
+                         int(result.get('점수') or 0), result.get('등급') or '-')
+                        for factor, result in (student.get('user_results') or {}).items()
+                    ],
+                )
+                count += 1
+        return count
+
+    # ---- 조회 ----
+
+    def rounds(self, school: str, class_name: str) -> List[str]:
+        """학급의 측정 회차(측정일) 목록"""
+        rows = self._query(
+            "SELECT DISTINCT measured_on FROM measurements WHERE school = ? AND class_name = ? "
+            "ORDER BY measured_on",
+            (school, class_name),
+        )
+        return [r['measured_on'] for r in rows]
+
+    def student_trend(self, school: str, class_name: str, student_id: str,
+                      limit: Optional[int] = None) -> List[Dict]:
+        """학생의 회차별 결과 (측정일 오름차순, limit이면 최근 limit회)"""
+        rows = self._query(
+            """
+            SELECT m.id, m.measured_on, m.total_score, m.total_grade, m.criteria_version,
+                   r.factor, r.event, r.record, r.score, r.grade
+            FROM measurements m LEFT JOIN factor_results r ON r.measurement_id = m.id
+            WHERE m.school = ? AND m.class_name = ? AND m.student_id = ?
+            ORDER BY m.measured_on
+            """,
+            (school, class_name, str(student_id)),
+        )
+        trend: Dict[int, Dict] = {}
+        for r in rows:
+            entry = trend.setdefault(r['id'], {
+                'measured_on': r['measured_on'],
+                'criteria_version': r['criteria_version'],
+                'total_summary': {'총점': r['total_score'], '등급': r['total_grade']},
+                'user_results': {},
+            })
+            if r['factor'] is not None:
+                entry['user_results'][r['factor']] = {
+                    '점수': r['score'], '등급': r['grade'], '기록': r['record'], '평가종목': r['event'],
+                }
+        result = list(trend.values())
+        return result[-limit:] if limit else result
+
+    def cohort_rows(self, measured_on: Optional[str] = None) -> List[sqlite3.Row]:
+        """집단 분석용 (측정, 체력요인) 행 - 측정일 지정 시 그 회차, 없으면 학생별 최신 회차"""
+        if measured_on:
+            condition, params = "m.measured_on = ?", (_iso_date(measured_on),)
+        else:
+            condition, params = """m.measured_on = (SELECT MAX(l.measured_on) FROM measurements l
+                WHERE l.school = m.school AND l.class_name = m.class_name
+                AND l.student_id = m.student_id)""", ()
+        return self._query(
+            f"""
+            SELECT m.id, m.school, m.class_name, m.school_level, m.grade, m.gender, m.total_score,
+                   r.factor, r.score, r.grade AS result_grade
+            FROM measurements m LEFT JOIN factor_results r ON r.measurement_id = m.id
+            WHERE {condition}
+            ORDER BY m.id
+            """,
+            params,
+        )
+
+    def class_averages(self, school: str, class_name: str,
+                       measured_on: Optional[str] = None) -> List[Dict]:
+        """회차별·체력요인별 평균 점수와 인원 (측정일 지정 시 해당 회차만, 미측정 종목 제외)"""
+        sql = """
+            SELECT m.measured_on, r.factor, AVG(r.score) AS avg_score, COUNT(*) AS students
+            FROM measurements m JOIN factor_results r ON r.measurement_id = m.id
+            WHERE m.school = ? AND m.class_name = ? AND r.grade != '-'
+        """
+        params: Tuple = (school, class_name)
+        if measured_on:
+            sql += " AND m.measured_on = ?"
+            params += (_iso_date(measured_on),)
+        sql += " GROUP BY m.measured_on, r.factor ORDER BY m.measured_on"
+        return [dict(r) for r in self._query(sql, params)]
+
+    def grade_migration(self, school: str, class_name: str, from_date: str, to_date: str,
+                        factor: Optional[str] = None) -> Dict[Tuple[str, str], int]:
+        """두 회차 사이 등급 이동 인원 {(이전 등급, 이후 등급): 인원}
+
+        factor를 주면 해당 체력요인 등급, 없으면 전체 등급 기준
+        """
+        if factor:
+            sql = """
+                SELECT a_r.grade AS before, b_r.grade AS after, COUNT(*) AS students
+                FROM measurements a
+                JOIN measurements b ON b.school = a.school AND b.class_name = a.class_name
+                    AND b.student_id = a.student_id AND b.measured_on = ?
+                JOIN factor_results a_r ON a_r.measurement_id = a.id AND a_r.factor = ?
+                JOIN factor_results b_r ON b_r.measurement_id = b.id AND b_r.factor = ?
+                WHERE a.school = ? AND a.class_name = ? AND a.measured_on = ?
+                GROUP BY a_r.grade, b_r.grade
+            """
+            params = (_iso_date(to_date), factor, factor, school, class_name, _iso_date(from_date))
+        else:
+            sql = """
+                SELECT a.total_grade AS before, b.total_grade AS after, COUNT(*) AS students
+                FROM measurements a
+                JOIN measurements b ON b.school = a.school AND b.class_name = a.class_name
+                    AND b.student_id = a.student_id AND b.measured_on = ?
+                WHERE a.school = ? AND a.class_name = ? AND a.measured_on = ?
+                GROUP BY a.total_grade, b.total_grade
+            """
+            params = (_iso_date(to_date), school, class_name, _iso_date(from_date))
+        return {(r['before'], r['after']): r['students'] for r in self._query(sql, params)}
+
+
+def ingest_roster(store: ResultsStore, path, school: str, class_name: str, measured_on=None) -> int:
+    """명단 CSV를 저장할 측정일의 평가기준 버전으로 채점해 저장 (점수와 criteria_version이 어긋나지 않도록)
+
+    측정일은 CSV의 측정일 열 → measured_on → 오늘 순서로 정하고, 채점 전에 학생 레코드에 넣음
+    """
+    from roster import load_roster, score_roster
+    students = load_roster(path)
+    for student in students:
+        student['measured_on'] = _iso_date(student.get('measured_on') or measured_on)
+    return store.ingest(score_roster(students), school, class_name)
+
+
+def format_trend(trend: List[Dict], max_rounds: int = 3) -> str:
+    """챗봇 컨텍스트용 이전 측정 추이 블록 (최근 max_rounds회)"""
+    if not trend:
+        return ""
+    lines = ["[이전 측정 추이]"]
+    for entry in trend[-max_rounds:]:
+        parts = []
+        for factor in FACTORS:
+            result = entry['user_results'].get(factor)
+            if result and result['등급'] != '-':
+                parts.append(f"{factor} {result['점수']}점({result['등급']})")
+        summary = entry['total_summary']
+        lines.append(f"- {entry['measured_on']}: 총점 {summary['총점']}점({summary['등급']}) / " + ", ".join(parts))
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PAPS 측정 결과 저장소")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="SQLite DB 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="명단 CSV 채점 후 저장")
+    ingest.add_argument("roster")
+    ingest.add_argument("--date", default=None, help="측정일 (CSV에 측정일 열이 없을 때)")
+
+    trend = sub.add_parser("trend", help="학생별 추이")
+    trend.add_argument("--student", required=True)
+
+    averages = sub.add_parser("averages", help="학급 체력요인별 평균")
+    averages.add_argument("--date", default=None)
+
+    migration = sub.add_parser("migration", help="회차 간 등급 이동")
+    migration.add_argument("--from", dest="from_date", required=True)
+    migration.add_argument("--to", dest="to_date", required=True)
+    migration.add_argument("--factor", default=None, choices=FACTORS)
+
+    for command in (ingest, trend, averages, migration):
+        command.add_argument("--school", required=True)
+        command.add_argument("--class", dest="class_name", required=True)
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        if args.command == "ingest":
+            count = ingest_roster(store, args.roster, args.school, args.class_name, args.date)
+            print(f"✅ {count}명 저장 ({args.school} {args.class_name})")
+        elif args.command == "trend":
+            print(format_trend(store.student_trend(args.school, args.class_name, args.student), max_rounds=100)
+                  or "저장된 측정 결과가 없습니다.")
+        elif args.command == "averages":
+            for row in store.class_averages(args.school, args.class_name, args.date):
+                print(f"{row['measured_on']} {row['factor']}: 평균 {row['avg_score']:.1f}점 ({row['students']}명)")
+        else:
+            moves = store.grade_migration(args.school, args.class_name, args.from_date, args.to_date, args.factor)
+            for (before, after), students in sorted(moves.items()):
+                print(f"{before} → {after}: {students}명")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+학급 명단(roster) 모듈
+학생별 측정 기록 CSV를 읽고, 평가기준 인덱스로 점수/등급을 채움
+
+CSV 열 (엑셀에서 'CSV UTF-8'로 저장):
+    번호, 이름, 학교과정, 학년, 성별, [측정일(YYYY-MM-DD)],
+    <체력요인>_평가종목, <체력요인>_기록[, <체력요인>_점수, <체력요인>_등급] ...
+    (예: 심폐지구력_평가종목, 심폐지구력_기록)
+점수/등급 열이 비어 있으면 기록으로 계산 (측정일에 적용되던 평가기준 버전 사용)
+"""
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from paps_criteria import FACTORS, CriteriaIndex, get_criteria_index, total_grade, version_for_date
+
+USER_INFO_FIELDS = ('학교과정', '학년', '성별')
+
+
+def _parse_record(value) -> Optional[float]:
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_score(value) -> Optional[int]:
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def student_from_row(row: Dict, position: int) -> Dict:
+    """CSV 한 행 → 학생 레코드 (챗봇 get_response 인자와 같은 구조)"""
+    student_id = (row.get('번호') or '').strip() or str(position)
+    user_info = {field: (row.get(field) or '').strip() for field in USER_INFO_FIELDS}
+    user_results = {}
+    for factor in FACTORS:
+        user_results[factor] = {
+            '점수': _parse_score(row.get(f'{factor}_점수')),
+            '등급': (row.get(f'{factor}_등급') or '').strip() or None,
+            '기록': _parse_record(row.get(f'{factor}_기록')),
+            '평가종목': (row.get(f'{factor}_평가종목') or '').strip(),
+        }
+    return {
+        'student_id': student_id,
+        'name': (row.get('이름') or '').strip(),
+        'measured_on': (row.get('측정일') or '').strip() or None,
+        'user_info': user_info,
+        'user_results': user_results,
+        'total_summary': None,
+    }
+
+
+def load_roster(path) -> List[Dict]:
+    """명단 CSV 읽기 (번호 중복 시 ValueError)"""
+    with open(Path(path), 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    students = [student_from_row(row, i + 1) for i, row in enumerate(rows)]
+    seen = set()
+    for student in students:
+        if student['student_id'] in seen:
+            raise ValueError(f"명단에 중복된 번호가 있습니다: {student['student_id']}")
+        seen.add(student['student_id'])
+    return students
+
+
+def score_student(student: Dict, index: Optional[CriteriaIndex] = None) -> Dict:
+    """비어 있는 점수/등급을 기록으로 계산하고 총점/전체 등급 채우기
+
+    index를 주지 않으면 학생의 측정일에 적용되던 평가기준 버전을 사용
+    """
+    if index is None:
+        index = get_criteria_index(version_for_date(student.get('measured_on')))
+    info = student['user_info']
+    total = 0
+    for factor, result in student['user_results'].items():
+        if result.get('점수') is None or not result.get('등급'):
+            if result.get('기록') is not None and result.get('평가종목'):
+                scored = index.score(
+                    info.get('학교과정', ''), info.get('학년', ''), info.get('성별', ''),
+                    factor, result['평가종목'], result['기록']
+                )
+            else:
+                scored = {'점수': 0, '등급': '-'}
+            result['점수'] = scored['점수']
+            result['등급'] = scored['등급']
+        total += result['점수'] or 0
+    student['total_summary'] = {'총점': total, '등급': total_grade(total)}
+    return student
+
+
+def score_roster(students: List[Dict], index: Optional[CriteriaIndex] = None) -> List[Dict]:
+    """명단 전체 채점 (index를 주지 않으면 학생별 측정일 기준 버전)"""
+    for student in students:
+        score_student(student, index)
+    return students
@@ -0,0 +1,205 @@
+"""
+세션 레코드
+Streamlit 세션마다 들고 있던 중첩 dict(user_results, user_info, total_summary)와
+카운터/해시 값을 __slots__ 레코드 하나로 묶어 세션당 메모리를 줄임
+
+- 계산기 데이터 동기화는 마지막 페이로드의 16바이트 다이제스트만 보관
+- 프로세스 전역 레지스트리로 세션별 메모리 보고서와 유휴 세션 정리 제공
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+from paps_criteria import FACTORS
+
+_FACTOR_INDEX = {factor: i for i, factor in enumerate(FACTORS)}
+INFO_FIELDS = ('학교과정', '학년', '성별', '기준버전')
+
+
+def payload_digest(data) -> bytes:
+    """계산기 페이로드 다이제스트 (키 순서와 무관, 16바이트)"""
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+
+class FactorResult:
+    """체력요인 하나의 결과"""
+    __slots__ = ('score', 'grade', 'record', 'event')
+
+    def __init__(self, score: int = 0, grade: str = '-', record: Optional[float] = None, event: str = ''):
+        self.score = score
+        self.grade = grade
+        self.record = record
+        self.event = event
+
+    def to_dict(self) -> Dict:
+        return {'점수': self.score, '등급': self.grade, '기록': self.record, '평가종목': self.event}
+
+
+class SessionRecord:
+    """세션 하나의 상태 (챗봇 인자는 필요할 때 dict로 만들어 전달)"""
+    __slots__ = (
+        'session_id', 'results', 'info', 'total_score', 'total_grade', 'messages',
+        'chatbot', 'chatbot_error', 'last_payload_digest', 'last_update_time',
+        'last_js_timestamp', 'auto_refresh_counter', 'results_sent_to_chatbot',
+        'last_seen', 'evicted', '_lock', '__weakref__',
+    )
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.results = [FactorResult() for _ in FACTORS]
+        self.info = ['', '', '', '']  # INFO_FIELDS 순서
+        self.total_score = 0
+        self.total_grade = '-'
+        self.messages: List[Dict] = []
+        self.chatbot = None
+        self.chatbot_error: Optional[str] = None
+        self.last_payload_digest: Optional[bytes] = None
+        self.last_update_time = 0.0
+        self.last_js_timestamp = 0
+        self.auto_refresh_counter = 0
+        self.results_sent_to_chatbot = False
+        self.last_seen = time.monotonic()
+        self.evicted = False
+        # 정리(다른 세션의 스레드)와 touch(소유 세션의 스레드)가 엇갈리지 않도록
+        self._lock = threading.Lock()
+
+    def touch(self) -> bool:
+        """사용 시각 갱신, 그 사이 정리되었으면 True (한 번만)"""
+        with self._lock:
+            self.last_seen = time.monotonic()
+            was_evicted, self.evicted = self.evicted, False
+            return was_evicted
+
+    # ---- 계산기 동기화 ----
+
+    def set_result(self, factor: str, score: int, grade: str, record, event: str) -> None:
+        i = _FACTOR_INDEX.get(factor)
+        if i is None:
+            return
+        result = self.results[i]
+        result.score, result.grade, result.record, result.event = score, grade, record, event
+
+    def set_info(self, user_info: Dict) -> None:
+        self.info = [str(user_info.get(field, '') or '') for field in INFO_FIELDS]
+
+    def payload_changed(self, data) -> bool:
+        """마지막으로 반영한 페이로드와 다른지 (같으면 False)"""
+        return payload_digest(data) != self.last_payload_digest
+
+    def remember_payload(self, data) -> None:
+        self.last_payload_digest = payload_digest(data)
+
+    # ---- 챗봇/화면용 dict ----
+
+    def user_results(self) -> Dict[str, Dict]:
+        return {factor: result.to_dict() for factor, result in zip(FACTORS, self.results)}
+
+    def user_info(self) -> Dict[str, str]:
+        return dict(zip(INFO_FIELDS, self.info))
+
+    def total_summary(self) -> Dict:
+        return {'총점': self.total_score, '등급': self.total_grade}
+
+    # ---- 정리 ----
+
+    def evict_if_idle(self, max_idle_seconds: float, now: float) -> bool:
+        """잠금 안에서 유휴 여부를 다시 확인하고 정리 (방금 touch한 세션은 건드리지 않음)"""
+        with self._lock:
+            if self.evicted or now - self.last_seen < max_idle_seconds:
+                return False
+            self.evict()
+            return True
+
+    def evict(self) -> None:
+        """유휴 세션의 큰 상태(챗봇, 대화, 결과) 해제 (evict_if_idle에서 잠금을 잡고 호출)"""
+        self.chatbot = None
+        self.chatbot_error = None
+        self.messages = []
+        self.results = [FactorResult() for _ in FACTORS]
+        self.total_score = 0
+        self.total_grade = '-'
+        self.last_payload_digest = None
+        self.results_sent_to_chatbot = False
+        self.evicted = True
+
+
+# Streamlit 세션들은 한 프로세스의 스레드이므로 레지스트리도 프로세스 전역
+# (세션이 끊겨 session_state가 사라지면 약한 참조라 자동으로 빠짐)
+_sessions: "weakref.WeakValueDictionary[str, SessionRecord]" = weakref.WeakValueDictionary()
+_sessions_lock = threading.Lock()
+
+
+def new_session(session_id: str) -> SessionRecord:
+    record = SessionRecord(session_id)
+    with _sessions_lock:
+        _sessions[session_id] = record
+    return record
+
+
+def _live_sessions() -> List[SessionRecord]:
+    with _sessions_lock:
+        return list(_sessions.values())
+
+
+def evict_idle(max_idle_seconds: float) -> int:
+    """max_idle_seconds 이상 사용하지 않은 세션 정리, 정리한 수 반환"""
+    now = time.monotonic()
+    evicted = 0
+    for record in _live_sessions():
+        if record.evict_if_idle(max_idle_seconds, now):
+            evicted += 1
+    return evicted
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """객체가 참조하는 메모리 추정 (공유 객체는 호출자가 제외)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, name), seen)
+                    for name in obj.__slots__ if name not in ('__weakref__', '_lock') and hasattr(obj, name))
+    return size
+
+
+def session_bytes(record: SessionRecord) -> int:
+    """세션 하나의 메모리 (챗봇은 대화 기록과 인스턴스 속성만, 공유 클라이언트/정책/스케줄러 제외)"""
+    seen: set = set()
+    size = deep_sizeof(record, seen)
+    bot = record.chatbot
+    if bot is not None:
+        shared = {id(getattr(bot, name, None)) for name in ('client', 'call_policy', 'scheduler', 'cassette', 'root')}
+        own = {k: v for k, v in vars(bot).items() if id(v) not in shared}
+        size += deep_sizeof(own, seen)
+    return size
+
+
+def memory_report() -> Dict:
+    """세션별 메모리 보고서 (세션 id는 넣지 않음)"""
+    now = time.monotonic()
+    sessions = []
+    for record in _live_sessions():
+        sessions.append({
+            'bytes': session_bytes(record),
+            'messages': len(record.messages),
+            'has_chatbot': record.chatbot is not None,
+            'idle_s': round(now - record.last_seen, 1),
+            'evicted': record.evicted,
+        })
+    sessions.sort(key=lambda s: -s['bytes'])
+    return {
+        'sessions': len(sessions),
+        'total_bytes': sum(s['bytes'] for s in sessions),
+        'per_session': sessions,
+    }
@@ -0,0 +1,51 @@
+"""
+설정값 조회
+Streamlit Secrets → 환경변수(로컬 개발용 .env 포함) 순서로 선택 설정값을 읽음
+
+openai 등 무거운 모듈을 불러오지 않으므로 앱 첫 화면(streamlit_app.py)과 도구에서도 같은 규칙으로 사용
+(chat_module도 API 키를 포함한 모든 설정을 이 함수로 읽음)
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).parent
+ENV_PATH = ROOT / '.env'
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env() -> None:
+    """프로젝트 루트의 .env를 한 번만 환경변수로 불러옴 (이미 설정된 환경변수는 유지)"""
+    global _env_loaded
+    with _env_lock:
+        if _env_loaded:
+            return
+        _env_loaded = True
+        if not ENV_PATH.exists():
+            return
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            print("python-dotenv가 없어 .env 파일을 읽지 않습니다.")
+            return
+        load_dotenv(dotenv_path=ENV_PATH)
+
+
+def get_setting(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Streamlit Secrets → 환경변수 순서로 선택 설정값 조회"""
+    try:
+        import streamlit as st
+    except ImportError:
+        st = None
+    if st is not None:
+        try:
+            value = st.secrets.get(name, None)
+            if value not in (None, ""):
+                return str(value)
+        except (AttributeError, KeyError, FileNotFoundError):
+            pass
+    load_env()
+    return os.getenv(name, default)
@@ -0,0 +1,156 @@
+"""
+시작 시간 프로파일
+콜드 스타트에서 어디에 시간이 쓰이는지 측정
+
+- 모듈별 import 시간: 모듈마다 새 인터프리터에서 python -X importtime으로 측정 (서로 캐시 영향 없음)
+- 첫 렌더링 단계: 계산기 문서 조립(첫 호출/캐시), 평가기준 인덱스, 챗봇 생성
+- 예열 경합: 새 인터프리터에서 첫 화면 준비 시간을 예열 없이/백그라운드 예열과 동시에 측정
+  (앱은 스크립트를 처음 불러올 때 예열을 시작하므로 뒤의 값이 현재 동작)
+- streamlit이 설치되어 있으면 AppTest로 streamlit_app.py 첫 실행/재실행 시간
+
+사용 예:
+    python startup_profile.py [--json]
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).parent
+
+PROFILE_MODULES = [
+    'streamlit', 'streamlit_javascript', 'calculator_assets', 'paps_criteria',
+    'chat_module', 'openai', 'dotenv', 'numpy', 'pandas',
+]
+
+_IMPORTTIME_RE = re.compile(r'import time:\s+\d+ \|\s+(\d+) \|\s?(\S.*)$')
+
+
+def import_time_ms(module: str) -> Optional[float]:
+    """새 인터프리터에서 module을 import하는 데 걸린 누적 시간 (설치 안 됨이면 None)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return None
+    for line in reversed(proc.stderr.splitlines()):
+        match = _IMPORTTIME_RE.match(line)
+        if match and match.group(2).strip() == module:
+            return int(match.group(1)) / 1000
+    return None
+
+
+def _timed(fn: Callable) -> Dict:
+    started = time.perf_counter()
+    try:
+        fn()
+        error = None
+    except Exception as e:  # 프로파일은 실패해도 나머지 단계 계속
+        error = str(e)
+    return {'ms': (time.perf_counter() - started) * 1000, 'error': error}
+
+
+def render_steps() -> List[Dict]:
+    """이 프로세스에서 첫 렌더링 단계별 시간 (처음 호출 = 콜드)"""
+    steps = []
+
+    def calculator_html():
+        from calculator_assets import build_calculator_html
+        build_calculator_html()
+
+    def criteria_index():
+        from paps_criteria import get_criteria_index
+        get_criteria_index()
+
+    def chatbot():
+        from chat_module import PAPSChatbot
+        PAPSChatbot()
+
+    steps.append({'step': '계산기 문서 조립 (첫 호출)', **_timed(calculator_html)})
+    steps.append({'step': '계산기 문서 조립 (캐시)', **_timed(calculator_html)})
+    steps.append({'step': '평가기준 인덱스 생성', **_timed(criteria_index)})
+    steps.append({'step': '챗봇 생성 (chat_module import 포함)', **_timed(chatbot)})
+    return steps
+
+
+# 첫 화면에 필요한 준비 (streamlit_app.py가 첫 실행에서 하는 일 중 앱 코드 부분)
+_FIRST_RENDER_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+if sys.argv[1] == 'concurrent':
+    from warmup import start_background_warmup
+    start_background_warmup()
+from calculator_assets import build_calculator_html
+from session_records import new_session
+build_calculator_html()
+new_session('profile')
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _first_render_ms(mode: str, repeat: int) -> Optional[float]:
+    """새 인터프리터에서 첫 화면 준비 시간 중앙값"""
+    values = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', _FIRST_RENDER_SCRIPT, mode],
+                              cwd=ROOT, capture_output=True, text=True)
+        try:
+            values.append(float(proc.stdout.strip().splitlines()[-1]))
+        except (IndexError, ValueError):
+            return None
+    return sorted(values)[len(values) // 2]
+
+
+def warmup_contention(repeat: int = 3) -> List[Dict]:
+    """예열을 첫 렌더링과 동시에 시작할 때(현재 동작) 첫 화면 준비가 얼마나 늦어지는지"""
+    steps = []
+    for mode, label in (('none', '첫 화면 준비 (예열 없음)'),
+                        ('concurrent', '첫 화면 준비 (예열과 동시, 현재)')):
+        ms = _first_render_ms(mode, repeat)
+        steps.append({'step': label, 'ms': ms if ms is not None else 0.0,
+                      'error': None if ms is not None else '측정 실패'})
+    return steps
+
+
+def app_runs() -> List[Dict]:
+    """streamlit AppTest로 앱 스크립트 첫 실행/재실행 시간"""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return []
+    app = AppTest.from_file(str(ROOT / 'streamlit_app.py'), default_timeout=60)
+    return [
+        {'step': '앱 첫 실행', **_timed(app.run)},
+        {'step': '앱 재실행', **_timed(app.run)},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트 시간 프로파일")
+    parser.add_argument('--json', action='store_true', help="JSON으로 출력")
+    args = parser.parse_args()
+
+    imports = [{'module': m, 'ms': import_time_ms(m)} for m in PROFILE_MODULES]
+    steps = render_steps() + warmup_contention() + app_runs()
+
+    if args.json:
+        print(json.dumps({'imports': imports, 'steps': steps}, ensure_ascii=False, indent=2))
+        return
+
+    print("[모듈 import 시간 (각각 새 프로세스)]")
+    for entry in sorted(imports, key=lambda e: -(e['ms'] or 0)):
+        value = f"{entry['ms']:8.1f}ms" if entry['ms'] is not None else "  설치 안 됨"
+        print(f"  {entry['module']:<22}{value}")
+    print("\n[첫 렌더링 단계]")
+    for entry in steps:
+        suffix = f"  (실패: {entry['error']})" if entry['error'] else ""
+        print(f"  {entry['step']:<32}{entry['ms']:8.1f}ms{suffix}")
+
+
+if __name__ == '__main__':
+    main()
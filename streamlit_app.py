@@ -1,20 +1,27 @@
 # streamlit_app.py
-from pathlib import Path
-import re
+import hmac
 import json
 import os
 import streamlit as st
 from streamlit.components.v1 import html as st_html
 import streamlit.components.v1 as components
 from streamlit_javascript import st_javascript
-from dotenv import load_dotenv
-from chat_module import PAPSChatbot
+from calculator_assets import build_calculator_html
+from fair_scheduler import tenant_key
+from session_records import evict_idle, memory_report, new_session, session_bytes
+from settings import get_setting
+from warmup import reset_status, start_background_warmup
 import time
+import uuid
 
-# .env 파일 명시적으로 로드
-root = Path(__file__).parent
-env_path = root / '.env'
-load_dotenv(dotenv_path=env_path)
+# 챗봇 모듈(openai, dotenv 등)은 채팅을 처음 사용할 때 불러옴 - get_chatbot() 참고
+
+# 스크립트를 처음 불러올 때(첫 화면을 그리기 전) 프로세스당 한 번 백그라운드 예열
+# (평가기준, 운동 지침, 공유 LLM 연결), 끄면 이전 프로세스의 준비 상태 파일만 초기화
+if get_setting("WARMUP", "on").lower() not in ("0", "off", "false"):
+    start_background_warmup(primer=get_setting("WARMUP_PRIMER", "").lower() in ("1", "true"))
+else:
+    reset_status()
 
 st.set_page_config(page_title="PAPS Calculator", layout="wide", initial_sidebar_state="collapsed")
 
@@ -65,50 +72,39 @@ st.markdown("""
 # 전역 리스너는 st_javascript로 등록하므로 여기서는 제거
 # components.html은 iframe에서 실행되어 메인 윈도우 접근이 제한될 수 있음
 
-# 세션 상태 초기화
-if "chatbot" not in st.session_state:
-    try:
-        st.session_state.chatbot = PAPSChatbot()
-    except Exception as e:
-        st.session_state.chatbot = None
-        st.session_state.chatbot_error = str(e)
-
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# 세션 상태 초기화 (세션 하나 = 슬롯 레코드 하나, session_records 참고)
+SESSION_IDLE_SECONDS = float(get_setting("SESSION_IDLE_MINUTES", "") or 30) * 60
 
-if "user_results" not in st.session_state:
-    st.session_state.user_results = {
-        "심폐지구력": {"점수": 0, "등급": "-", "기록": None, "평가종목": ""},
-        "유연성": {"점수": 0, "등급": "-", "기록": None, "평가종목": ""},
-        "근력근지구력": {"점수": 0, "등급": "-", "기록": None, "평가종목": ""},
-        "순발력": {"점수": 0, "등급": "-", "기록": None, "평가종목": ""},
-        "비만": {"점수": 0, "등급": "-", "기록": None, "평가종목": ""}
-    }
+if "session" not in st.session_state:
+    st.session_state.session = new_session(uuid.uuid4().hex[:12])
+session = st.session_state.session
 
-if "user_info" not in st.session_state:
-    st.session_state.user_info = {
-        "학교과정": "",
-        "학년": "",
-        "성별": ""
-    }
+# 오래 쓰지 않은 다른 세션의 챗봇/대화/결과 정리 (현재 세션은 touch 전에 정리되었는지 확인)
+evict_idle(SESSION_IDLE_SECONDS)
+if session.touch():
+    st.info("ℹ️ 오래 사용하지 않아 이전 대화와 계산 결과가 정리되었습니다. 계산기에서 다시 계산해 주세요.")
 
-if "total_summary" not in st.session_state:
-    st.session_state.total_summary = {"총점": 0, "등급": "-"}
+# 공정 스케줄러의 학교/학급: 학급별 링크에 ?school=한빛중&class=3-2
+tenant = tenant_key(st.query_params.get("school"), st.query_params.get("class"))
 
-if "last_update_time" not in st.session_state:
-    st.session_state.last_update_time = 0
+# 세션 메모리 보고서: ?memory=<MEMORY_REPORT_KEY> (설정하지 않으면 사용 안 함)
+MEMORY_REPORT_KEY = get_setting("MEMORY_REPORT_KEY", "") or ""
+if MEMORY_REPORT_KEY and hmac.compare_digest(
+    st.query_params.get("memory", "").encode(), MEMORY_REPORT_KEY.encode()
+):
+    st.json(memory_report())
+    st.stop()
 
-if "results_sent_to_chatbot" not in st.session_state:
-    st.session_state.results_sent_to_chatbot = False
 
-if "last_calculator_data_hash" not in st.session_state:
-    st.session_state.last_calculator_data_hash = None
-
-if "last_js_timestamp" not in st.session_state:
-    st.session_state.last_js_timestamp = 0
-
-if "auto_refresh_counter" not in st.session_state:
-    st.session_state.auto_refresh_counter = 0
+def get_chatbot():
+    """챗봇은 채팅을 처음 사용할 때 생성 (콜드 스타트 시 첫 화면을 늦추지 않도록)"""
+    if session.chatbot is None and session.chatbot_error is None:
+        try:
+            from chat_module import PAPSChatbot
+            session.chatbot = PAPSChatbot()
+        except Exception as e:
+            session.chatbot_error = str(e)
+    return session.chatbot
 
 def update_state_from_calculator(data: dict) -> None:
     """계산기 데이터를 세션 상태에 업데이트 (각 종목의 점수 포함)"""
@@ -126,87 +122,35 @@ def update_state_from_calculator(data: dict) -> None:
             record = info.get("기록")
             event = info.get("평가종목", "")
             
-            st.session_state.user_results[factor] = {
-                "점수": score,
-                "등급": grade,
-                "기록": record,
-                "평가종목": event
-            }
+            session.set_result(factor, score, grade, record, event)
             print(f"[Python] {factor} 업데이트: 점수={score}, 등급={grade}, 기록={record}, 평가종목={event}")
 
     user_info = data.get("userInfo")
     if user_info:
-        for key in st.session_state.user_info.keys():
-            st.session_state.user_info[key] = user_info.get(key, "")
+        session.set_info(user_info)
         print(f"[Python] 사용자 정보 업데이트: {user_info}")
 
     total_score = data.get("totalScore")
     total_grade = data.get("totalGrade")
     if total_score is not None:
-        st.session_state.total_summary["총점"] = total_score
+        session.total_score = total_score
     if total_grade is not None:
-        st.session_state.total_summary["등급"] = total_grade
+        session.total_grade = total_grade
     
     print(f"[Python] 총점 업데이트 완료: {total_score}점, 등급: {total_grade}")
     
     # 각 종목의 점수가 모두 저장되었는지 확인
-    saved_scores = {k: v.get("점수", 0) for k, v in st.session_state.user_results.items()}
+    saved_scores = {k: v["점수"] for k, v in session.user_results().items()}
     print(f"[Python] 저장된 각 종목 점수: {saved_scores}")
+    session.remember_payload(data)
 
 
 # 메인 레이아웃
 st.title("🏃‍♂️ PAPS 체력 평가 시스템")
 st.markdown("### 📊 체력 측정 및 평가")
 
-# 파일 읽기
-idx = (root / "index.html").read_text(encoding="utf-8")
-css = (root / "style.css").read_text(encoding="utf-8")
-app = (root / "app.js").read_text(encoding="utf-8")
-data = (root / "paps_data.js").read_text(encoding="utf-8")
-
-# <body>만 추출하고, body 안에 있을 수도 있는 중복된 내부 리소스 태그 제거
-m = re.search(r"<body[^>]*>(?P<body>.*)</body>", idx, flags=re.I | re.S)
-body = m.group("body") if m else idx
-body = re.sub(
-    r"<script[^>]*src=[\"']?(?:\.\/)?(?:paps_data\.js|app\.js)[\"']?[^>]*></script>",
-    "",
-    body,
-    flags=re.I | re.S,
-)
-body = re.sub(
-    r"<link[^>]*href=[\"']?(?:\.\/)?style\.css[\"']?[^>]*>",
-    "",
-    body,
-    flags=re.I | re.S,
-)
-
-# CSS에 추가 스타일 적용 (스크롤 제거 및 높이 자동 조정)
-additional_css = """
-html, body {
-    overflow-x: hidden !important;
-    overflow-y: visible !important;
-    height: auto !important;
-    min-height: auto !important;
-    margin: 0;
-    padding: 0;
-}
-.container {
-    padding-bottom: 20px;
-    max-width: 100%;
-}
-"""
-
-html_doc = f"""<!doctype html>
-<html><head><meta charset="utf-8" />
-    <style>{css}</style>
-    <style>{additional_css}</style>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
-    </head>
-<body>
-{body}
-<script>{data}</script>
-<script>{app}</script>
-</body></html>"""
+# 계산기 문서 (원본 파일이 바뀌지 않으면 프로세스 단위 캐시 사용)
+html_doc = build_calculator_html()
 
 # HTML 컴포넌트로 렌더링 (높이를 충분히 크게 설정하여 스크롤 제거)
 components.html(
@@ -217,7 +161,7 @@ components.html(
 
 if True:
     # 자동 새로고침을 위한 카운터 증가
-    st.session_state.auto_refresh_counter += 1
+    session.auto_refresh_counter += 1
     
     # 전역 리스너 등록 (st_javascript를 사용하여 메인 윈도우에서 실행)
     _ = st_javascript("""
@@ -281,7 +225,7 @@ if True:
             return 'error';
         }
     })();
-    """, key=f"register_listener_{st.session_state.auto_refresh_counter % 100}")
+    """, key=f"register_listener_{session.auto_refresh_counter % 100}")
     
     # 계산기에서 전송된 데이터 자동 감지 및 업데이트
     # window.top을 통해 메인 윈도우에 접근 (iframe 내부에서 실행될 수 있으므로)
@@ -381,7 +325,7 @@ if True:
             return null;
         }
     })();
-    """, key=f"data_check_{st.session_state.auto_refresh_counter % 10}")
+    """, key=f"data_check_{session.auto_refresh_counter % 10}")
 
     # 자동 전송 기능 제거 - 사용자가 분석지를 직접 복사하여 붙여넣도록 변경
     
@@ -400,22 +344,19 @@ if True:
                 data_timestamp = 0
             
             new_total = calculator_data.get("totalScore", 0)
-            current_total = st.session_state.total_summary.get("총점", 0)
+            current_total = session.total_score
             
             results_count = len(calculator_data.get("results", {}))
             results_detail = {k: v.get("점수", 0) for k, v in calculator_data.get("results", {}).items()}
             print(f"[Python] js_data 파싱 완료: totalScore={new_total}, results 개수={results_count}, 상세={results_detail}")
             
             if new_total > 0:
-                data_hash = hash(str(calculator_data))
-                last_hash = st.session_state.last_calculator_data_hash
-                
-                if current_total != new_total or last_hash != data_hash:
+                # 마지막으로 반영한 페이로드의 다이제스트만 비교 (반영 시 update_state_from_calculator가 기록)
+                if current_total != new_total or session.payload_changed(calculator_data):
                     print(f"[Python] 데이터 업데이트 시작: {current_total} -> {new_total}")
                     update_state_from_calculator(calculator_data)
-                    st.session_state.last_update_time = time.time()
-                    st.session_state.last_calculator_data_hash = data_hash
-                    st.session_state.results_sent_to_chatbot = True
+                    session.last_update_time = time.time()
+                    session.results_sent_to_chatbot = True
                     data_updated = True
                     if current_total == 0 and new_total > 0:
                         should_rerun = True
@@ -451,7 +392,7 @@ if True:
                 return JSON.stringify({error: e.message});
             }
         })();
-        """, key=f"debug_check_{st.session_state.auto_refresh_counter}")
+        """, key=f"debug_check_{session.auto_refresh_counter}")
         if debug_js:
             try:
                 debug_info = json.loads(debug_js)
@@ -481,14 +422,14 @@ if True:
             return null;
         }
     })();
-    """, key=f"timestamp_check_{st.session_state.auto_refresh_counter % 10}")
+    """, key=f"timestamp_check_{session.auto_refresh_counter % 10}")
     
     if js_timestamp and js_timestamp not in ("null", "", "undefined"):
         try:
             new_timestamp = int(js_timestamp)
-            last_timestamp = st.session_state.get("last_js_timestamp", 0)
+            last_timestamp = session.last_js_timestamp
             if new_timestamp > last_timestamp + 100:  # 100ms 이상 차이날 때만
-                st.session_state.last_js_timestamp = new_timestamp
+                session.last_js_timestamp = new_timestamp
                 if js_data and js_data not in ("null", "", "undefined"):
                     try:
                         js_parsed = json.loads(js_data)
@@ -498,7 +439,7 @@ if True:
                             calculator_data = js_parsed
                         if calculator_data.get("totalScore", 0) > 0:
                             update_state_from_calculator(calculator_data)
-                            st.session_state.results_sent_to_chatbot = True
+                            session.results_sent_to_chatbot = True
                             data_updated = True
                             should_rerun = True
                     except:
@@ -512,10 +453,10 @@ if True:
         st.rerun()
     
     # 주기적 자동 새로고침 (2초마다, 데이터가 있을 때만)
-    total_score = st.session_state.total_summary.get("총점", 0)
+    total_score = session.total_score
     if total_score == 0:
         # 데이터가 없으면 2초마다 체크
-        if st.session_state.auto_refresh_counter % 5 == 0:  # 약 2초마다 (0.4초 * 5)
+        if session.auto_refresh_counter % 5 == 0:  # 약 2초마다 (0.4초 * 5)
             time.sleep(0.1)
             st.rerun()
     
@@ -523,7 +464,7 @@ if True:
     st.markdown("---")
     
     # 현재 총점 확인
-    total_score = st.session_state.total_summary.get("총점", 0)
+    total_score = session.total_score
     
     # 추가 확인: 전역 변수와 localStorage에서 직접 확인
     js_total_check = st_javascript("""
@@ -569,7 +510,7 @@ if True:
             return null;
         }
     })();
-    """, key=f"total_check_{st.session_state.auto_refresh_counter % 10}")
+    """, key=f"total_check_{session.auto_refresh_counter % 10}")
     
     if js_total_check and js_total_check not in ("null", "", "undefined"):
         try:
@@ -579,7 +520,7 @@ if True:
                 total_score = check_total
                 if check_data.get("data"):
                     update_state_from_calculator(check_data["data"])
-                    st.session_state.results_sent_to_chatbot = True
+                    session.results_sent_to_chatbot = True
                     data_updated = True
                     should_rerun = True
         except:
@@ -593,13 +534,14 @@ if True:
         with st.expander("🔍 데이터 상태 확인", expanded=False):
             col_debug1, col_debug2, col_debug3 = st.columns(3)
             with col_debug1:
-                st.write("**세션 상태 총점:**", st.session_state.total_summary.get("총점", 0))
+                st.write("**세션 상태 총점:**", session.total_score)
                 st.write("**확인된 총점:**", total_score)
                 st.write("**각 종목 점수:**")
-                for factor, result in st.session_state.user_results.items():
-                    score = result.get("점수", 0)
+                for factor, result in session.user_results().items():
+                    score = result["점수"]
                     if score > 0:
                         st.write(f"  - {factor}: {score}점")
+                st.write("**세션 메모리:**", f"{session_bytes(session) / 1024:.1f} KB")
             with col_debug2:
                 js_debug_global = st_javascript("""
                 (() => {
@@ -669,9 +611,9 @@ with st.container():
     3. 아래 채팅창에 붙여넣기(Ctrl+V) 후 상담을 시작하세요.
     """)
     
-    # 챗봇 초기화 확인
-    if st.session_state.chatbot is None:
-        st.error(f"챗봇 초기화 실패: {st.session_state.get('chatbot_error', '알 수 없는 오류')}")
+    # 챗봇 초기화 확인 (생성은 첫 질문 때)
+    if session.chatbot_error is not None:
+        st.error(f"챗봇 초기화 실패: {session.chatbot_error or '알 수 없는 오류'}")
         
         # Streamlit Cloud 배포인지 확인
         is_streamlit_cloud = os.getenv("STREAMLIT_SERVER_PORT") is not None or hasattr(st, 'secrets')
@@ -708,13 +650,13 @@ with st.container():
         # 대화 기록 표시
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.messages:
+            for message in session.messages:
                 with st.chat_message(message["role"]):
                     st.markdown(message["content"])
         
         # 사용자 입력
         if prompt := st.chat_input("팝스에 대해 궁금한 점을 물어보세요..."):
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            session.messages.append({"role": "user", "content": prompt})
             with st.chat_message("user"):
                 st.markdown(prompt)
             
@@ -723,26 +665,30 @@ with st.container():
                     try:
                         # 사용자가 붙여넣은 분석지 내용을 기반으로 상담 진행
                         # 챗봇이 사용자 메시지에서 직접 정보를 추출하도록 함
-                        response = st.session_state.chatbot.get_response(
+                        chatbot = get_chatbot()
+                        if chatbot is None:
+                            st.rerun()
+                        response = chatbot.get_response(
                             prompt,
                             user_results=None,
                             user_info=None,
-                            total_summary=None
+                            total_summary=None,
+                            tenant=tenant
                         )
                         st.markdown(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
+                        session.messages.append({"role": "assistant", "content": response})
                     except Exception as e:
                         error_msg = f"오류가 발생했습니다: {str(e)}"
                         st.error(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                        session.messages.append({"role": "assistant", "content": error_msg})
         
         # 하단 버튼들
         col1, col2 = st.columns([1, 4])
         with col1:
             if st.button("🔄 대화 초기화", use_container_width=True):
-                st.session_state.messages = []
-                if st.session_state.chatbot:
-                    st.session_state.chatbot.reset_conversation()
+                session.messages = []
+                if session.chatbot:
+                    session.chatbot.reset_conversation()
                 st.rerun()
         
         # 예시 질문
@@ -757,7 +703,7 @@ with st.container():
             
             for question in example_questions:
                 if st.button(f"❓ {question}", key=f"example_{question}", use_container_width=True):
-                    st.session_state.messages.append({"role": "user", "content": question})
+                    session.messages.append({"role": "user", "content": question})
                     with st.chat_message("user"):
                         st.markdown(question)
                     
@@ -765,16 +711,20 @@ with st.container():
                         with st.spinner("답변을 생성하는 중..."):
                             try:
                                 # 사용자가 붙여넣은 분석지 내용을 기반으로 상담 진행
-                                response = st.session_state.chatbot.get_response(
+                                chatbot = get_chatbot()
+                                if chatbot is None:
+                                    st.rerun()
+                                response = chatbot.get_response(
                                     question,
                                     user_results=None,
                                     user_info=None,
-                                    total_summary=None
+                                    total_summary=None,
+                                    tenant=tenant
                                 )
                                 st.markdown(response)
-                                st.session_state.messages.append({"role": "assistant", "content": response})
+                                session.messages.append({"role": "assistant", "content": response})
                             except Exception as e:
                                 error_msg = f"오류가 발생했습니다: {str(e)}"
                                 st.error(error_msg)
-                                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                                session.messages.append({"role": "assistant", "content": error_msg})
                     st.rerun()
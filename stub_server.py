@@ -0,0 +1,262 @@
+"""
+로컬 OpenAI 호환 스텁 서버
+실제 API 비용 없이 챗봇 경로를 부하 테스트하기 위한 chat-completions 대역 (스트리밍 포함)
+
+사용 예:
+    python stub_server.py --port 8765 --latency 0.4 --tokens-per-sec 80 --error-rate 0.05
+    (앱/부하 생성기에서 API_BASE_URL=http://127.0.0.1:8765/v1, API_KEY=stub)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from cassette import load_latency_profile
+
+# 응답 본문에 사용할 토큰 (토큰 하나 = 단어 하나로 취급)
+_REPLY_WORDS = (
+    "현재 측정 결과를 보면 심폐지구력과 근력근지구력을 꾸준히 향상시키는 것이 좋습니다. "
+    "주 3회 이상 규칙적으로 운동하고 충분히 휴식하세요. 다음 등급까지 조금만 더 노력해봅시다!"
+).split()
+
+
+@dataclass
+class StubConfig:
+    """스텁 서버 동작 설정 (단위: 초)"""
+    latency: float = 0.3            # 첫 토큰까지의 지연
+    jitter: float = 0.1             # 지연에 더해지는 균등분포 지터 상한
+    tokens_per_sec: float = 60.0    # 출력 토큰 생성 속도 (0이면 즉시)
+    reply_tokens: int = 120         # 기본 응답 토큰 수 (max_tokens로 잘림)
+    error_rate: float = 0.0         # 오류 주입 비율
+    error_status: int = 503         # 주입할 오류 상태 코드
+    hang_rate: float = 0.0          # 응답 없이 멈추는 비율 (타임아웃 시험용)
+    hang_seconds: float = 60.0
+    latency_profile: Optional[List[float]] = None  # 녹화된 실제 지연 분포 (있으면 latency/토큰 속도 대신 사용)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+class _StubState:
+    """요청 간에 공유되는 서버 상태 (프롬프트 캐시 흉내, 지표)"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.seen_prefixes = set()
+        self.requests = 0
+        self.errors = 0
+
+    def cached_tokens(self, messages: List[Dict]) -> int:
+        """이전에 본 system 메시지와 같으면 캐시 적중으로 보고"""
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        prefix = messages[0].get("content", "")
+        with self.lock:
+            hit = prefix in self.seen_prefixes
+            self.seen_prefixes.add(prefix)
+        return _estimate_tokens(prefix) if hit else 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """chat-completions 요청 처리"""
+    server_version = "PAPSStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> _StubState:
+        return self.server.stub_state
+
+    def log_message(self, format, *args):
+        pass  # 부하 테스트 중 콘솔 출력 억제
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        config = self.state.config
+        with self.state.lock:
+            self.state.requests += 1
+
+        if config.hang_rate and random.random() < config.hang_rate:
+            time.sleep(config.hang_seconds)
+        if config.error_rate and random.random() < config.error_rate:
+            with self.state.lock:
+                self.state.errors += 1
+            self._send_json(config.error_status, {
+                "error": {"message": "injected error", "type": "stub_error", "code": config.error_status}
+            })
+            return
+
+        recorded_latency = random.choice(config.latency_profile) if config.latency_profile else None
+        if recorded_latency is None:
+            time.sleep(config.latency + random.uniform(0, config.jitter))
+
+        messages = request.get("messages", [])
+        max_tokens = request.get("max_tokens") or config.reply_tokens
+        n_tokens = min(config.reply_tokens, int(max_tokens))
+        words = [_REPLY_WORDS[i % len(_REPLY_WORDS)] for i in range(n_tokens)]
+        prompt_tokens = sum(_estimate_tokens(m.get("content", "")) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": n_tokens,
+            "total_tokens": prompt_tokens + n_tokens,
+            "prompt_tokens_details": {"cached_tokens": self.state.cached_tokens(messages)},
+        }
+        model = request.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        delay = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+        if recorded_latency is not None:
+            # 녹화된 전체 응답 시간을 토큰 생성 구간에 고르게 분배
+            delay = recorded_latency / max(1, n_tokens)
+
+        if request.get("stream"):
+            self._stream(completion_id, model, words, delay, usage)
+            return
+
+        time.sleep(delay * n_tokens)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop" if n_tokens < max_tokens else "length",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, words: List[str], delay: float, usage: Dict):
+        """SSE 형식으로 토큰 단위 스트리밍"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def chunk(delta: Dict, finish_reason: Optional[str] = None, extra: Optional[Dict] = None):
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if extra:
+                body.update(extra)
+            self.wfile.write(f"data: {json.dumps(body, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                chunk({"content": (" " if i else "") + word})
+                if delay:
+                    time.sleep(delay)
+            chunk({}, finish_reason="stop", extra={"usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 클라이언트가 먼저 끊음
+        self.close_connection = True
+
+
+def _make_server(config: StubConfig, host: str, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.stub_state = _StubState(config)
+    return server
+
+
+def run_stub_server(config: Optional[StubConfig] = None, host: str = "127.0.0.1",
+                    port: int = 0) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 스텁 서버 시작 (port=0이면 빈 포트 자동 선택)
+
+    반환된 서버의 server_address로 주소를 확인하고, 끝나면 shutdown() 호출.
+    """
+    server = _make_server(config or StubConfig(), host, port)
+    thread = threading.Thread(target=server.serve_forever, name="paps-stub-server", daemon=True)
+    thread.start()
+    return server
+
+
+def stub_base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """스텁 설정 명령행 인자 (부하 생성기와 공유)"""
+    defaults = StubConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="첫 토큰까지 지연(초)")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="지연 지터 상한(초)")
+    parser.add_argument("--tokens-per-sec", type=float, default=defaults.tokens_per_sec, help="출력 토큰 속도")
+    parser.add_argument("--reply-tokens", type=int, default=defaults.reply_tokens, help="응답 토큰 수")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="오류 주입 비율 (0~1)")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status, help="주입할 HTTP 상태 코드")
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate, help="응답 정지 비율 (0~1)")
+    parser.add_argument("--latency-profile", help="녹화된 카세트 파일의 실제 응답 지연 분포를 사용")
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_sec=args.tokens_per_sec,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        latency_profile=load_latency_profile(args.latency_profile) if args.latency_profile else None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 chat-completions 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = _make_server(config_from_args(args), args.host, args.port)
+    print(f"스텁 서버 실행 중: {stub_base_url(server)} (Ctrl+C로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"요청 {server.stub_state.requests}건, 주입 오류 {server.stub_state.errors}건")
+
+
+if __name__ == "__main__":
+    main()
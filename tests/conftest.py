@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 저장소 루트의 모듈(paps_criteria, chat_module 등)을 불러오기 위함
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
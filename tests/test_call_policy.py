@@ -0,0 +1,117 @@
+"""완성 호출 정책: 로컬 스텁 서버를 상대로 마감시간, 재시도, 서킷 브레이커, 대체 모델 확인"""
+import threading
+import time
+
+import pytest
+
+import stub_server
+from call_policy import CallPolicy, CallPolicyConfig, CircuitOpenError, DeadlineExceededError
+
+openai = pytest.importorskip("openai")
+
+FAST = dict(latency=0, jitter=0, tokens_per_sec=0, reply_tokens=3)
+
+
+@pytest.fixture
+def stubs():
+    servers = []
+
+    def start(**overrides):
+        server = stub_server.run_stub_server(stub_server.StubConfig(**{**FAST, **overrides}))
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def _sender(routes):
+    """모델 이름별 스텁 서버로 보내는 send(model, timeout)"""
+    clients = {
+        model: openai.OpenAI(api_key="stub", base_url=stub_server.stub_base_url(server), max_retries=0)
+        for model, server in routes.items()
+    }
+
+    def send(model, timeout):
+        return clients[model].with_options(timeout=timeout).chat.completions.create(
+            model=model, messages=[{"role": "user", "content": "안녕"}])
+    return send
+
+
+def _policy(**overrides):
+    return CallPolicy(CallPolicyConfig(**{"backoff_base": 0.01, "backoff_max": 0.05, **overrides}))
+
+
+def test_retries_server_errors_then_raises(stubs):
+    server = stubs(error_rate=1.0, error_status=503)
+    policy = _policy(max_retries=2, breaker_threshold=10)
+    with pytest.raises(openai.InternalServerError):
+        policy.call(_sender({"primary": server}), "primary")
+    assert server.stub_state.requests == 3
+    assert policy.stats()["failures"] == 3
+
+
+def test_bad_request_is_not_retried_or_counted(stubs):
+    server = stubs(error_rate=1.0, error_status=400)
+    policy = _policy(max_retries=2, breaker_threshold=1)
+    with pytest.raises(openai.BadRequestError):
+        policy.call(_sender({"primary": server}), "primary")
+    stats = policy.stats()
+    assert server.stub_state.requests == 1
+    assert (stats["failures"], stats["circuit_open"]) == (0, False)
+
+
+def test_deadline_covers_retries(stubs):
+    server = stubs(hang_rate=1.0, hang_seconds=1.0)
+    policy = _policy(timeout=0.3, max_retries=3)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        policy.call(_sender({"primary": server}), "primary")
+    assert time.monotonic() - started < 0.9
+    assert policy.stats()["timeouts"] == 1
+
+
+def test_breaker_opens_and_rejects_without_calling(stubs):
+    server = stubs(error_rate=1.0, error_status=503)
+    policy = _policy(max_retries=0, breaker_threshold=2, breaker_cooldown=5.0)
+    send = _sender({"primary": server})
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            policy.call(send, "primary")
+    with pytest.raises(CircuitOpenError) as rejected:
+        policy.call(send, "primary")
+    assert server.stub_state.requests == 2
+    assert 4 < rejected.value.retry_in <= 5
+    assert "0초" not in str(rejected.value)
+
+
+def test_half_open_admits_one_probe(stubs):
+    failing = stubs(error_rate=1.0, error_status=503)
+    slow = stubs(latency=0.5)
+    policy = _policy(timeout=3.0, max_retries=0, breaker_threshold=1, breaker_cooldown=0.1)
+    with pytest.raises(openai.InternalServerError):
+        policy.call(_sender({"primary": failing}), "primary")
+    time.sleep(0.15)
+
+    send = _sender({"primary": slow})
+    probe = threading.Thread(target=policy.call, args=(send, "primary"))
+    probe.start()
+    time.sleep(0.1)
+    with pytest.raises(CircuitOpenError) as rejected:
+        policy.call(send, "primary")
+    probe.join()
+    assert rejected.value.retry_in > 2  # 시험 호출의 남은 마감시간
+    assert slow.stub_state.requests == 1
+    assert policy.call(send, "primary").choices[0].message.content  # 시험 호출 성공 후 닫힘
+
+
+def test_slo_timeout_switches_to_fallback_without_tripping_breaker(stubs):
+    slow = stubs(latency=1.0)
+    fast = stubs()
+    policy = _policy(timeout=5.0, max_retries=1, breaker_threshold=1, latency_slo=0.2, fallback_model="fast")
+    response = policy.call(_sender({"primary": slow, "fast": fast}), "primary")
+    assert response.model == "fast"
+    stats = policy.stats()
+    assert (stats["slo_breaches"], stats["failures"], stats["circuit_open"]) == (1, 0, False)
+    assert stats["fallback_active"] is True
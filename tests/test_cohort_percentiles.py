@@ -0,0 +1,42 @@
+"""계산기 집단 내 위치: 스냅샷 누적표 키를 app.js cohortTopPercent가 실제로 찾는지"""
+import json
+import subprocess
+
+import pytest
+
+import criteria_sweep
+from cohort_analytics import CohortAnalytics
+
+INFO = {'학교과정': '중학교', '학년': '1학년', '성별': '남자'}
+
+
+def _table():
+    analytics = CohortAnalytics()
+    students = [
+        {'user_info': INFO, 'user_results': {}, 'total_summary': {'총점': score}}
+        for score in (40, 50, 60, 70)
+    ]
+    analytics.add_students(students, '한빛중', '1-1')
+    return analytics.calculator_table()
+
+
+def test_table_key_format():
+    assert list(_table()) == ['중학교|1학년|남자']
+
+
+def test_calculator_resolves_snapshot_key():
+    node = criteria_sweep.find_node(None)
+    if node is None:
+        pytest.skip("node가 없음")
+    with open(criteria_sweep.APP_JS_PATH, encoding='utf-8') as f:
+        function = criteria_sweep._js_function(f.read(), 'cohortTopPercent')
+    fields = {'학교과정': ' 중학교', '학년': '1학년 ', '성별': '남자'}
+    script = "\n".join([
+        f"const fields = {json.dumps(fields, ensure_ascii=False)};",
+        "const document = { getElementById: id => (id in fields ? { value: fields[id] } : null) };",
+        f"const window = {{ PAPS_COHORT_PERCENTILES: {json.dumps(_table(), ensure_ascii=False)} }};",
+        function,
+        "process.stdout.write(JSON.stringify(cohortTopPercent(60)));",
+    ])
+    completed = subprocess.run([node, '-e', script], capture_output=True, text=True, encoding='utf-8', check=True)
+    assert json.loads(completed.stdout) == {'topPercent': 38, 'n': 4}
@@ -0,0 +1,42 @@
+"""챗봇 평가기준 요약의 학생군: 이전 학생의 학생군이 다음 학생에게 넘어가지 않음"""
+import pytest
+
+from paps_criteria import get_criteria_index
+
+QUESTION = '2등급 기준이 몇 개야?'
+INFO = {'학교과정': '중학교', '학년': '1학년', '성별': '여자'}
+
+
+@pytest.fixture
+def chatbot(monkeypatch):
+    monkeypatch.setenv('API_KEY', 'test-key')
+    from chat_module import PAPSChatbot
+    return PAPSChatbot()
+
+
+def test_incomplete_info_does_not_reuse_previous_cohort(chatbot):
+    criteria = get_criteria_index()
+    assert '중학교 1학년 여자' in chatbot._criteria_excerpt(QUESTION, criteria, {}, INFO)
+    assert chatbot._criteria_excerpt(QUESTION, criteria, {}, {'학교과정': '중학교', '학년': '', '성별': ''}) == ''
+
+
+def test_pasted_sheet_cohort_is_kept_for_follow_up(chatbot):
+    criteria = get_criteria_index()
+    sheet = '학교과정: 중학교\n학년: 1학년\n성별: 여자\n' + QUESTION
+    assert chatbot._criteria_excerpt(sheet, criteria) != ''
+    assert '중학교 1학년 여자' in chatbot._criteria_excerpt(QUESTION, criteria)
+
+
+def test_batch_worker_resets_cohort(chatbot, tmp_path):
+    import batch_reports
+
+    chatbot.cohort = ('중학교', '1학년', '여자')
+    chatbot.complete = lambda messages, tenant=None: '피드백'
+    student = {
+        'student_id': '1', 'name': '가', 'measured_on': None,
+        'user_info': {'학교과정': '', '학년': '', '성별': ''},
+        'user_results': {}, 'total_summary': {'총점': 0, '등급': '-'},
+    }
+    checkpoint = batch_reports.Checkpoint(tmp_path)
+    batch_reports._generate_one(batch_reports._WorkerChatbots(lambda: chatbot), student, tmp_path, checkpoint, None)
+    assert chatbot.cohort is None
@@ -0,0 +1,69 @@
+"""학년도별 평가기준: 엑셀 → 버전 빌드/등록 → 날짜별 선택, 계산기에는 오늘 버전만 포함"""
+import json
+
+import pandas as pd
+import pytest
+
+import convert_excel
+import paps_criteria
+
+
+def _sheet(path, first_grade_max):
+    rows = [
+        ["중학교", "1학년", "남자", "심폐지구력", "왕복오래달리기", f"{first_grade_max + 1} ~ 150", "1", 20],
+        ["중학교", "1학년", "남자", "심폐지구력", "왕복오래달리기", f"0 ~ {first_grade_max}", "2", 16],
+    ]
+    pd.DataFrame(rows, columns=convert_excel.SOURCE_COLUMNS).to_excel(path, index=False)
+
+
+@pytest.fixture
+def versioned_root(tmp_path, monkeypatch):
+    """기본 + 2000(현재 적용) + 2099(미래) 세 버전이 등록된 임시 저장소"""
+    monkeypatch.setattr(convert_excel, "ROOT", tmp_path)
+    monkeypatch.setattr(convert_excel, "VERSIONS_PATH", tmp_path / "criteria_versions.json")
+    monkeypatch.setattr(paps_criteria, "ROOT", tmp_path)
+    monkeypatch.setattr(paps_criteria, "VERSIONS_PATH", tmp_path / "criteria_versions.json")
+    monkeypatch.setattr(paps_criteria, "STATIC_DIR", tmp_path / "static")
+
+    builtin = tmp_path / "paps_data.js"
+    _sheet(tmp_path / "base.xlsx", 60)
+    convert_excel.build(tmp_path / "base.xlsx", builtin, exceptions=[])
+    convert_excel.register_version("기본", builtin, None, "기본 평가기준")
+    static = tmp_path / "static" / "criteria"
+    static.mkdir(parents=True)
+    for version, first_grade_max in (("2000", 70), ("2099", 80)):
+        _sheet(tmp_path / f"{version}.xlsx", first_grade_max)
+        output = static / f"paps_data_{version}.js"
+        convert_excel.build(tmp_path / f"{version}.xlsx", output, exceptions=[])
+        convert_excel.register_version(version, output, f"{version}-03-01")
+
+    paps_criteria.load_versions.cache_clear()
+    paps_criteria._load_index.cache_clear()
+    yield builtin
+    paps_criteria.load_versions.cache_clear()
+    paps_criteria._load_index.cache_clear()
+
+
+def test_version_selected_by_measurement_date(versioned_root):
+    assert [v["version"] for v in paps_criteria.load_versions()] == ["기본", "2000", "2099"]
+    assert paps_criteria.version_for_date("1999-12-31") == "기본"
+    assert paps_criteria.version_for_date("2024-05-01") == "2000"
+    assert paps_criteria.version_for_date("2099-03-01") == "2099"
+    key = ("중학교", "1학년", "남자", "심폐지구력", "왕복오래달리기")
+    assert paps_criteria.get_criteria_index("기본").score(*key, 65)["등급"] == "1"
+    assert paps_criteria.get_criteria_index("2000").score(*key, 65)["등급"] == "2"
+    assert paps_criteria.get_criteria_index("2099").score(*key, 75)["등급"] == "2"
+
+
+def test_calculator_embeds_only_current_version(versioned_root):
+    html = paps_criteria.calculator_versions_html(builtin_path=versioned_root)
+    assert 'id="paps-criteria-2000"' in html
+    assert 'id="paps-criteria-2099"' not in html
+    assert 'id="paps-criteria-기본"' not in html  # paps_data.js로 이미 포함됨
+    prefix = "window.PAPS_CRITERIA_VERSIONS = "
+    registry = json.loads(html[html.index(prefix) + len(prefix):html.rindex(";</script>")])
+    assert registry["current"] == "2000"
+    assert registry["builtin"] == "기본"
+    urls = {v["version"]: v.get("url") for v in registry["versions"]}
+    assert urls["2099"] == "app/static/criteria/paps_data_2099.js"
+    assert urls["기본"] is None
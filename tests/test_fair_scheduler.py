@@ -0,0 +1,105 @@
+"""공정 스케줄러: 동시 호출 상한, 테넌트 간 순서, 대기 초과, 테넌트 수 제한"""
+import threading
+import time
+
+import pytest
+
+from fair_scheduler import DEFAULT_TENANT, OVERFLOW_TENANT, FairScheduler, QueueTimeoutError, SchedulerConfig
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "대기 시간 초과"
+        time.sleep(0.005)
+
+
+def _hold_slot(scheduler, tenant="holder"):
+    """슬롯 하나를 잡고 있는 스레드와 놓아 주는 이벤트"""
+    release = threading.Event()
+    thread = threading.Thread(target=scheduler.run, args=(tenant, lambda: release.wait(2)))
+    thread.start()
+    _wait_for(lambda: scheduler.stats()["active"] == 1)
+    return release, thread
+
+
+def test_concurrency_limit():
+    scheduler = FairScheduler(SchedulerConfig(max_concurrent=3))
+    lock = threading.Lock()
+    running = [0, 0]  # 현재, 최대
+
+    def work():
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.run, args=(f"t{i % 4}", work)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert running[1] == 3
+    assert scheduler.stats()["active"] == 0
+
+
+def test_light_tenant_is_not_stuck_behind_a_burst():
+    scheduler = FairScheduler(SchedulerConfig(max_concurrent=1))
+    release, holder = _hold_slot(scheduler)
+    order = []
+    threads = []
+    for tenant, count in (("busy", 6), ("light", 2)):
+        for _ in range(count):
+            thread = threading.Thread(target=scheduler.run, args=(tenant, lambda t=tenant: order.append(t)))
+            thread.start()
+            threads.append(thread)
+            queued = len(threads)
+            _wait_for(lambda: scheduler.stats()["queued"] == queued)
+    release.set()
+    for thread in threads + [holder]:
+        thread.join()
+    assert order.count("light") == 2
+    assert order[:4].count("light") == 2
+
+
+def test_queue_timeout_returns_the_slot_share():
+    scheduler = FairScheduler(SchedulerConfig(max_concurrent=1, max_wait=0.1))
+    release, holder = _hold_slot(scheduler)
+    with pytest.raises(QueueTimeoutError):
+        scheduler.run("waiting", lambda: None)
+    release.set()
+    holder.join()
+    stats = scheduler.stats()
+    assert stats["queued"] == 0
+    assert stats["tenants"]["waiting"]["rejected"] == 1
+    assert scheduler.run("waiting", lambda: "ok") == "ok"
+
+
+def test_no_rate_limit_by_default():
+    scheduler = FairScheduler(SchedulerConfig())
+    for _ in range(50):
+        scheduler.run("school/1-1", lambda: None)
+    assert scheduler.stats()["tenants"]["school/1-1"]["throttled"] == 0
+
+
+def test_tenant_cap_and_allow_list():
+    capped = FairScheduler(SchedulerConfig(max_tenants=2))
+    for name in ("a", "b", "c", "d"):
+        capped.run(name, lambda: None)
+    assert set(capped.stats()["tenants"]) == {"a", "b", OVERFLOW_TENANT}
+
+    allowed = FairScheduler(SchedulerConfig(allowed={"한빛중/3-2"}))
+    allowed.run("한빛중/3-2", lambda: None)
+    allowed.run("아무개/9-9", lambda: None)
+    assert set(allowed.stats()["tenants"]) == {"한빛중/3-2", DEFAULT_TENANT}
+
+
+def test_idle_tenants_are_pruned():
+    now = [0.0]
+    scheduler = FairScheduler(SchedulerConfig(tenant_idle=10.0), clock=lambda: now[0])
+    scheduler.run("old", lambda: None)
+    now[0] = 100.0
+    scheduler.run("new", lambda: None)
+    assert set(scheduler.stats()["tenants"]) == {"new"}
@@ -0,0 +1,27 @@
+from chat_module import filter_excerpt
+from paps_criteria import get_criteria_index
+
+PUSH_UP = '(무릎대고)팔굽혀펴기'
+
+
+def _excerpt():
+    return get_criteria_index().cohort_excerpt('중학교', '1학년', '여자')
+
+
+def test_measured_event_with_parentheses():
+    filtered = filter_excerpt(_excerpt(), [PUSH_UP, '악력'])
+    lines = filtered.rstrip('\n').split('\n')
+    assert lines[0] == '[평가기준 요약: 중학교 1학년 여자]'
+    assert [line.split('): ')[0] for line in lines[1:]] == [f'- {PUSH_UP}(근력근지구력', '- 악력(근력근지구력']
+
+
+def test_event_with_parentheses_mentioned_in_text():
+    filtered = filter_excerpt(_excerpt(), [], '무릎대고 팔굽혀펴기 2등급 되려면 몇 개 해야 해?')
+    lines = filtered.rstrip('\n').split('\n')
+    assert len(lines) == 2
+    assert lines[1].startswith(f'- {PUSH_UP}(근력근지구력): 1등급 45 이상')
+
+
+def test_unknown_event_keeps_whole_excerpt():
+    excerpt = _excerpt()
+    assert filter_excerpt(excerpt, ['없는종목']) == excerpt
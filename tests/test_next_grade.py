@@ -0,0 +1,42 @@
+"""챗봇 다음 등급 안내: 한 단계 위 등급 구간의 가장 가까운 끝이 목표 (기록이 낮을수록 좋은 종목 포함)"""
+import pytest
+
+from paps_criteria import get_criteria_index
+
+COHORT = ('중학교', '1학년', '여자')
+
+
+def test_higher_is_better():
+    info = get_criteria_index().next_grade(*COHORT, '심폐지구력', '왕복오래달리기', 30)
+    assert info == {'next_grade': 1, 'target_record': 35.0, 'improvement_needed': 5.0, 'current_record': 30}
+
+
+def test_lower_is_better():
+    info = get_criteria_index().next_grade(*COHORT, '순발력', '50m달리기', 9.0)
+    assert info['next_grade'] == 1
+    assert info['target_record'] == 8.8
+    assert info['improvement_needed'] == pytest.approx(0.2)
+
+
+@pytest.mark.parametrize('factor, event, record', [
+    ('심폐지구력', '왕복오래달리기', 40),  # 이미 1등급
+    ('비만', '체질량지수', 25),            # 숫자 등급이 아님
+])
+def test_no_next_grade(factor, event, record):
+    assert get_criteria_index().next_grade(*COHORT, factor, event, record) is None
+
+
+def test_context_message(monkeypatch):
+    monkeypatch.setenv('API_KEY', 'test-key')
+    from chat_module import PAPSChatbot
+
+    results = {
+        '심폐지구력': {'점수': 15, '등급': '2', '기록': 30, '평가종목': '왕복오래달리기'},
+        '순발력': {'점수': 15, '등급': '2', '기록': 9.0, '평가종목': '50m달리기'},
+        '비만': {'점수': 15, '등급': '정상', '기록': 20, '평가종목': '체질량지수'},
+    }
+    info = dict(zip(('학교과정', '학년', '성별'), COHORT))
+    message = PAPSChatbot()._create_context_message('질문', get_criteria_index(), results, info)
+    assert "심폐지구력의 다음 등급(1등급)을 위해서는 기록을 5만큼 개선해야 합니다 (목표 기록 35)." in message
+    assert "순발력의 다음 등급(1등급)을 위해서는 기록을 0.2만큼 개선해야 합니다 (목표 기록 8.8)." in message
+    assert "비만의 다음 등급" not in message
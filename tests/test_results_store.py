@@ -0,0 +1,26 @@
+"""결과 저장소: 측정일 열이 없는 명단은 --date의 평가기준 버전으로 채점하고 같은 버전을 기록"""
+import paps_criteria
+import results_store
+import roster
+from results_store import ResultsStore, ingest_roster
+
+CSV = "번호,이름,학교과정,학년,성별,심폐지구력_평가종목,심폐지구력_기록\n1,가,중학교,1학년,여자,왕복오래달리기,30\n"
+
+
+def test_ingest_scores_with_the_stored_date(tmp_path, monkeypatch):
+    scored_days = []
+
+    def version_for_date(day=None):
+        scored_days.append(day)
+        return paps_criteria.version_for_date(day)
+
+    monkeypatch.setattr(roster, "version_for_date", version_for_date)
+    path = tmp_path / "roster.csv"
+    path.write_text(CSV, encoding="utf-8")
+    with ResultsStore(tmp_path / "results.db") as store:
+        assert ingest_roster(store, path, "한빛중", "1-1", "2025-04-10") == 1
+        trend = store.student_trend("한빛중", "1-1", "1")
+    assert scored_days == ["2025-04-10"]
+    assert trend[0]["measured_on"] == "2025-04-10"
+    assert trend[0]["criteria_version"] == results_store.version_for_date("2025-04-10")
+    assert trend[0]["user_results"]["심폐지구력"]["점수"] > 0
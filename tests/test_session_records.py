@@ -0,0 +1,85 @@
+"""세션 레코드: 유휴 세션 정리, 정리와 touch의 잠금, 메모리 보고서"""
+import gc
+import threading
+import time
+
+from session_records import evict_idle, memory_report, new_session, session_bytes
+
+
+def _idle(record, seconds=100.0):
+    record.last_seen = time.monotonic() - seconds
+    return record
+
+
+def test_idle_session_is_evicted_once():
+    record = _idle(new_session('idle'))
+    record.messages = [{'role': 'user', 'content': '안녕'}]
+    record.chatbot = object()
+    assert evict_idle(50) >= 1
+    assert (record.messages, record.chatbot, record.evicted) == ([], None, True)
+    assert record.touch() is True   # 돌아온 세션에 한 번만 안내
+    assert record.touch() is False
+    assert not record.evicted
+
+
+def test_recent_session_is_kept():
+    record = new_session('recent')
+    record.messages = [{'role': 'user', 'content': '안녕'}]
+    evict_idle(50)
+    assert record.messages and not record.evicted
+
+
+def test_eviction_rechecks_idleness_under_the_lock():
+    """정리 판단 직후 소유 세션이 touch하면 정리하지 않음"""
+    record = _idle(new_session('racing'))
+    record.messages = [{'role': 'user', 'content': '안녕'}]
+    evicted = []
+    with record._lock:  # 소유 세션이 touch 중
+        evictor = threading.Thread(target=lambda: evicted.append(record.evict_if_idle(50, time.monotonic())))
+        evictor.start()
+        evictor.join(0.1)
+        assert evictor.is_alive()  # 잠금이 풀릴 때까지 기다림
+        record.last_seen = time.monotonic()
+    evictor.join(1)
+    assert evicted == [False]
+    assert record.messages and not record.evicted
+
+
+def test_concurrent_touch_never_loses_a_fresh_session():
+    record = new_session('busy')
+    stop = threading.Event()
+
+    def owner():
+        while not stop.is_set():
+            record.touch()
+
+    thread = threading.Thread(target=owner)
+    thread.start()
+    try:
+        for _ in range(2000):
+            evict_idle(0.5)
+    finally:
+        stop.set()
+        thread.join()
+    assert not record.evicted
+
+
+def test_report_has_no_session_ids_and_drops_closed_sessions():
+    record = new_session('secret-id')
+    before = memory_report()
+    assert 'secret-id' not in repr(before)
+    del record
+    gc.collect()
+    assert memory_report()['sessions'] == before['sessions'] - 1
+
+
+def test_session_bytes_excludes_shared_objects():
+    class Bot:
+        pass
+
+    record = new_session('bytes')
+    record.chatbot = Bot()
+    without = session_bytes(record)
+    for name in ('client', 'call_policy', 'scheduler', 'cassette', 'root'):
+        setattr(record.chatbot, name, [bytearray(1_000_000)])  # 프로세스 공유 객체 (속성마다 다른 객체)
+    assert session_bytes(record) - without < 1_000
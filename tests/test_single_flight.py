@@ -0,0 +1,87 @@
+"""동시 동일 요청 병합: 대표 호출 하나의 결과/오류를 기다리던 호출이 모두 공유"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chat_module import _SingleFlight
+
+WAITERS = 8
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "대기 시간 초과"
+        time.sleep(0.005)
+
+
+def _run_together(flight, fn, key="same"):
+    """WAITERS개 호출을 동시에 시작하고, 모두 합류한 뒤 대표 호출을 끝냄"""
+    release = threading.Event()
+    calls = []
+
+    def leader_fn():
+        calls.append(1)
+        release.wait(2)
+        return fn()
+
+    with ThreadPoolExecutor(WAITERS) as pool:
+        futures = [pool.submit(flight.do, key, leader_fn) for _ in range(WAITERS)]
+        _wait_for(lambda: flight.stats()["requests"] == WAITERS)
+        release.set()
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+    return calls, outcomes
+
+
+def test_waiters_share_one_result():
+    flight = _SingleFlight()
+    result = object()
+    calls, outcomes = _run_together(flight, lambda: result)
+    assert len(calls) == 1
+    assert all(outcome is result for outcome in outcomes)
+    stats = flight.stats()
+    assert (stats["upstream_calls"], stats["coalesced"], stats["inflight"]) == (1, WAITERS - 1, 0)
+
+
+def test_error_reaches_every_waiter():
+    flight = _SingleFlight()
+    error = RuntimeError("업스트림 실패")
+
+    def fail():
+        raise error
+    calls, outcomes = _run_together(flight, fail)
+    assert len(calls) == 1
+    assert all(outcome is error for outcome in outcomes)
+
+
+def test_finished_call_is_not_reused():
+    flight = _SingleFlight()
+    assert flight.do("same", lambda: 1) == 1
+    assert flight.do("same", lambda: 2) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_identical_chatbot_requests_make_one_upstream_call(monkeypatch):
+    pytest.importorskip("openai")
+    import stub_server
+
+    server = stub_server.run_stub_server(stub_server.StubConfig(latency=0.3, jitter=0, tokens_per_sec=0))
+    try:
+        monkeypatch.setenv("API_KEY", "stub")
+        monkeypatch.setenv("API_BASE_URL", stub_server.stub_base_url(server))
+        from chat_module import PAPSChatbot
+        chatbot = PAPSChatbot()
+        messages = [{"role": "user", "content": f"병합 시험 {time.time()}"}]
+        with ThreadPoolExecutor(4) as pool:
+            replies = list(pool.map(lambda _: chatbot.complete(messages, temperature=0), range(4)))
+        assert len(set(replies)) == 1
+        assert server.stub_state.requests == 1
+    finally:
+        server.shutdown()
@@ -0,0 +1,32 @@
+"""로컬 스텁 서버: OpenAI SDK로 일반/스트리밍 응답을 받을 수 있는지"""
+import pytest
+
+import stub_server
+
+openai = pytest.importorskip("openai")
+
+
+@pytest.fixture
+def stub():
+    server = stub_server.run_stub_server(stub_server.StubConfig(latency=0, jitter=0, tokens_per_sec=0, reply_tokens=5))
+    yield server
+    server.shutdown()
+
+
+def _client(server):
+    return openai.OpenAI(api_key="stub", base_url=stub_server.stub_base_url(server), max_retries=0)
+
+
+def test_completion(stub):
+    response = _client(stub).chat.completions.create(
+        model="stub", messages=[{"role": "user", "content": "안녕"}])
+    assert len(response.choices[0].message.content.split()) == 5
+
+
+def test_stream(stub):
+    stream = _client(stub).chat.completions.create(
+        model="stub", messages=[{"role": "user", "content": "안녕"}], stream=True)
+    chunks = list(stream)
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices)
+    assert len(text.split()) == 5
+    assert chunks[-1].choices[0].finish_reason == "stop"
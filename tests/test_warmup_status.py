@@ -0,0 +1,45 @@
+"""준비 상태 파일: 기록한 프로세스가 살아 있고 최근에 갱신한 상태만 인정"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import warmup
+
+
+@pytest.fixture
+def status_file(tmp_path, monkeypatch):
+    path = tmp_path / "status.json"
+    monkeypatch.setenv("WARMUP_STATUS_FILE", str(path))
+    return path
+
+
+def _write(path, **fields):
+    status = {"ready": True, "status": "ready", "steps": [], "pid": os.getpid(), "updated_at": time.time()}
+    path.write_text(json.dumps({**status, **fields}), encoding="utf-8")
+
+
+def test_missing_file_is_cold(status_file):
+    assert warmup.check_status()["status"] == "cold"
+
+
+def test_live_recent_status(status_file):
+    _write(status_file)
+    assert warmup.check_status()["ready"] is True
+
+
+def test_old_status_is_stale(status_file):
+    _write(status_file, updated_at=time.time() - warmup.STALE_AFTER_SECONDS - 1)
+    status = warmup.check_status()
+    assert (status["ready"], status["status"]) == (False, "stale")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows는 pid를 확인하지 않음")
+def test_dead_process_is_stale(status_file):
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True, check=True)
+    _write(status_file, pid=int(finished.stdout))
+    assert warmup.check_status()["status"] == "stale"
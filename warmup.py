@@ -0,0 +1,232 @@
+"""
+시작 후 예열(warm-up)과 준비 상태 확인
+배포/재시작 직후 첫 사용자가 평가기준 파싱, 계산기 문서 조립, LLM 클라이언트 생성과
+TLS 연결 비용을 떠안지 않도록 미리 처리
+
+- warm_up(): 평가기준 인덱스 → 운동 지침 인덱스 → 계산기 문서 → 챗봇 모듈/공유 클라이언트 →
+  연결 열기(GET /models) → (선택) 아주 짧은 프라이머 요청
+- start_background_warmup(): 프로세스당 한 번 백그라운드 스레드로 실행
+  (앱은 스크립트를 처음 불러올 때, 첫 화면을 그리기 전에 호출)
+- readiness(): 준비 상태, 앱 프로세스는 상태 파일(WARMUP_STATUS_FILE)에 pid/시작 시각과 함께 기록하고
+  예열 후에도 주기적으로 갱신 (Streamlit은 어떤 주소든 HTML과 200을 돌려주므로 외부 점검은 상태 파일로 함)
+- check_status(): 상태 파일을 쓴 프로세스가 살아 있고 최근에 갱신한 경우만 인정 (이전 프로세스의 ready 무시)
+
+사용 예:
+    python warmup.py [--primer] [--json]      # 배포 전 점검 (준비 실패 시 종료 코드 1)
+    python warmup.py --check                  # 실행 중인 앱의 준비 여부 (준비 전/실패면 종료 코드 1)
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from settings import get_setting
+
+_lock = threading.Lock()
+_state: Dict = {"status": "cold", "steps": [], "started_at": None, "ready_at": None}
+_thread: Optional[threading.Thread] = None
+_reset_done = False
+_process_started_at = time.time()
+
+HEARTBEAT_SECONDS = 30.0          # 예열 후 상태 파일 갱신 주기
+STALE_AFTER_SECONDS = 3 * HEARTBEAT_SECONDS
+
+
+def status_path() -> Path:
+    """준비 상태 파일 경로 (기본: 임시 폴더의 paps_warmup_status.json)"""
+    return Path(get_setting("WARMUP_STATUS_FILE", "") or Path(tempfile.gettempdir()) / "paps_warmup_status.json")
+
+
+def _write_status(report: Dict) -> None:
+    """상태 파일을 원자적으로 교체 (점검 중에 반쯤 쓴 파일을 읽지 않도록)"""
+    path = status_path()
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_text(json.dumps({**report, "pid": os.getpid(), "process_started_at": _process_started_at,
+                                   "updated_at": time.time()}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"준비 상태 파일 기록 실패: {e}")
+
+
+def _step(name: str, fn: Callable, required: bool = True) -> bool:
+    started = time.perf_counter()
+    entry = {"step": name, "ok": True, "ms": 0.0, "required": required}
+    try:
+        fn()
+    except Exception as e:  # 한 단계가 실패해도 나머지 예열은 계속
+        entry["ok"] = False
+        entry["error"] = str(e)
+    entry["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    with _lock:
+        _state["steps"].append(entry)
+    return entry["ok"] or not required
+
+
+def _criteria_index():
+    from paps_criteria import get_criteria_index
+    get_criteria_index()
+
+
+def _guidance_index():
+    from knowledge_base import get_guidance_index
+    get_guidance_index()
+
+
+def _calculator_html():
+    from calculator_assets import build_calculator_html
+    build_calculator_html()
+
+
+def _chatbot_factory():
+    from chat_module import PAPSChatbot
+    return PAPSChatbot()
+
+
+def warm_up(primer: bool = False, chatbot_factory: Callable = _chatbot_factory,
+            record_status: bool = False) -> Dict:
+    """예열 실행 후 준비 상태 반환 (LLM 설정이 없으면 챗봇 단계만 실패로 표시)
+
+    record_status는 앱 프로세스에서만 켬 (배포 전 점검 CLI가 실행 중인 앱의 상태 파일을 덮어쓰지 않도록)
+    """
+    with _lock:
+        _state.update(status="warming", steps=[], started_at=time.time(), ready_at=None)
+    if record_status:
+        _write_status(readiness())
+
+    ok = _step("평가기준 인덱스", _criteria_index)
+    ok &= _step("운동 지침 인덱스", _guidance_index)
+    ok &= _step("계산기 문서", _calculator_html)
+
+    holder: Dict = {}
+
+    def chatbot():
+        holder["bot"] = chatbot_factory()
+
+    def connection():
+        bot = holder["bot"]
+        if bot.cassette is None:
+            # 공유 클라이언트의 연결 풀에 TLS 연결을 미리 열어 둠
+            bot.client.with_options(timeout=10).models.list()
+
+    def primer_request():
+        holder["bot"].complete([{"role": "user", "content": "ping"}], temperature=0, max_tokens=1)
+
+    # 챗봇은 설정(API_KEY 등)이 없을 수 있으므로 준비 여부 판정에는 넣지 않음
+    if _step("챗봇/공유 클라이언트", chatbot, required=False) and "bot" in holder:
+        _step("LLM 연결", connection, required=False)
+        if primer:
+            _step("프라이머 요청", primer_request, required=False)
+
+    with _lock:
+        _state["status"] = "ready" if ok else "failed"
+        _state["ready_at"] = time.time()
+    report = readiness()
+    if record_status:
+        _write_status(report)
+    return report
+
+
+def _warm_up_and_heartbeat(primer: bool) -> None:
+    """예열 후 상태 파일을 주기적으로 갱신 (프로세스가 끝나면 갱신이 멈춰 오래된 상태로 판정됨)"""
+    warm_up(primer=primer, record_status=True)
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        _write_status(readiness())
+
+
+def start_background_warmup(primer: bool = False) -> None:
+    """프로세스당 한 번만 백그라운드 예열 시작 (상태 파일은 바로 이 프로세스의 warming으로 초기화)"""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _state.update(status="warming", steps=[], started_at=time.time(), ready_at=None)
+        _thread = threading.Thread(target=_warm_up_and_heartbeat, kwargs={"primer": primer},
+                                   name="paps-warmup", daemon=True)
+    _write_status(readiness())
+    _thread.start()
+
+
+def reset_status() -> None:
+    """예열을 끈 프로세스의 시작 시 상태 파일을 cold로 한 번 초기화 (이전 프로세스의 ready가 남지 않도록)"""
+    global _reset_done
+    with _lock:
+        if _reset_done or _thread is not None:
+            return
+        _reset_done = True
+    _write_status(readiness())
+
+
+def readiness() -> Dict:
+    """준비 상태 {'ready', 'status', 'llm_ready', 'warmup_ms', 'steps'}"""
+    with _lock:
+        state = dict(_state)
+        steps: List[Dict] = [dict(s) for s in _state["steps"]]
+    warmup_ms = None
+    if state["started_at"] and state["ready_at"]:
+        warmup_ms = round((state["ready_at"] - state["started_at"]) * 1000, 1)
+    optional = [s for s in steps if not s["required"]]
+    return {"ready": state["status"] == "ready", "status": state["status"],
+            "llm_ready": bool(optional) and all(s["ok"] for s in optional),
+            "warmup_ms": warmup_ms, "steps": steps}
+
+
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int):
+        return False
+    if os.name == "nt":
+        return True  # Windows의 os.kill(pid, 0)은 프로세스를 종료하므로 갱신 시각으로만 판정
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def check_status(max_age: float = STALE_AFTER_SECONDS) -> Dict:
+    """실행 중인 앱이 기록한 준비 상태 (파일이 없으면 cold, 쓴 프로세스가 없거나 갱신이 멈췄으면 stale)"""
+    try:
+        status = json.loads(status_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"ready": False, "status": "cold", "steps": []}
+    age = time.time() - float(status.get("updated_at") or 0)
+    if not _pid_alive(status.get("pid")) or age > max_age:
+        return {**status, "ready": False, "status": "stale", "age_s": round(age, 1)}
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예열 실행 및 준비 상태 확인")
+    parser.add_argument("--primer", action="store_true", help="max_tokens=1 프라이머 요청까지 보냄")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    parser.add_argument("--check", action="store_true",
+                        help="예열하지 않고 실행 중인 앱의 상태 파일만 확인")
+    args = parser.parse_args()
+
+    if args.check:
+        status = check_status()
+        print(json.dumps(status, ensure_ascii=False, indent=2) if args.json else
+              f"{status['status']} (ready={status['ready']})")
+        raise SystemExit(0 if status["ready"] else 1)
+
+    report = warm_up(primer=args.primer)  # 배포 전 점검: 상태 파일은 건드리지 않음
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for step in report["steps"]:
+            mark = "✅" if step["ok"] else ("❌" if step["required"] else "⚠️")
+            detail = f" - {step['error']}" if not step["ok"] else ""
+            print(f"{mark} {step['step']}: {step['ms']}ms{detail}")
+        print(f"{'준비 완료' if report['ready'] else '준비 실패'} ({report['warmup_ms']}ms)")
+    raise SystemExit(0 if report["ready"] else 1)
+
+
+if __name__ == "__main__":
+    main()